@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+
+"""
+	This file is part of Yandex Disk indicator and control (YDI).
+
+	Copyright 2025 Dandelion Systems <dandelion.systems@gmail.com>
+
+	YDI is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	YDI is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. 
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+"""
+
+# End-to-end benchmark of the indicator status updater against the
+# fake yandex-disk in fake_yd/. No Gtk and no Yandex account needed.
+#
+#	python3 bench/bench_indicator.py [--seconds 60] [--save results.json]
+#	                                 [--baseline results.json]
+#
+# Results are compared with baseline/indicator.json unless
+# --baseline names other ones
+#
+# For every update frequency setting and for the daemon with and
+# without a .sync/status file, YDIMonitor runs as in the indicator
+# with its changes recorded instead of shown. Reported per hour are
+# CPU time of the updater and of the yandex-disk processes it spawns,
+# the number of spawns and voluntary context switches (wakeups),
+# plus the delay from a daemon state change to the UI update
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from yd_cli import YandexDisk
+from yd_monitor import YDIMonitor, SCHEDULER_PROFILES
+from yd_snapshot import SYNC_STATES, NOT_RUNNING, SNAPSHOT_LABELS
+
+FAKE_YD_DIR = os.path.join(BENCH_DIR, "fake_yd")
+
+# Results of the current release to compare against, refreshed
+# with --save when a change is meant to move them
+BASELINE = os.path.join(BENCH_DIR, "baseline", "indicator.json")
+
+# The fake daemon plays this in a loop, see fake_yd/yandex-disk
+SCENARIO = {
+	"recent": 10,
+	"churn": 2,
+	"steps": [
+		{"state": "idle", "seconds": 12},
+		{"state": "index", "seconds": 2},
+		{"state": "busy", "seconds": 6, "bytes": 1 << 30},
+		{"state": "idle", "seconds": 12},
+		{"state": "paused", "seconds": 4}
+	]
+}
+
+# With the status file the daemon keeps .sync/status up to date,
+# without it YDI falls back to polling `yandex-disk status`
+MODES = {"status_file": True, "cli_only": False}
+
+def cpu_times():
+	own = resource.getrusage(resource.RUSAGE_SELF)
+	children = resource.getrusage(resource.RUSAGE_CHILDREN)
+	return (
+		own.ru_utime + own.ru_stime,
+		children.ru_utime + children.ru_stime,
+		own.ru_nvcsw
+	)
+
+def count_calls(home:str, since:float, until:float):
+	calls = 0
+	with open(os.path.join(home, "calls.log"), "r") as f:
+		for line in f:
+			if since <= float(line.split(maxsplit=1)[0]) < until:
+				calls += 1
+	return calls
+
+def state_changes(scenario:dict, started:float, since:float, until:float):
+	# (time, state) of every state change the daemon makes in between
+	changes = []
+	steps = scenario["steps"]
+	t = started
+	i = 0
+	previous = steps[-1]["state"]
+	while t < until:
+		step = steps[i % len(steps)]
+		if step["state"] != previous and t >= since:
+			changes.append((t, step["state"]))
+		previous = step["state"]
+		t += step["seconds"]
+		i += 1
+	return changes
+
+def latencies(changes:list, updates:list):
+	# Delay from each state change to the first update showing it,
+	# None for the changes no update has shown before the next one
+	result = []
+	for (n, (t, state)) in enumerate(changes):
+		until = changes[n + 1][0] if n + 1 < len(changes) else float("inf")
+		shown = [u for (u, s) in updates if t <= u < until and s == state]
+		result.append(shown[0] - t if shown else None)
+	return result
+
+def run(profile:str, status_file:bool, seconds:float):
+	home = tempfile.mkdtemp(prefix="ydi-bench-")
+	os.environ["FAKE_YD_HOME"] = home
+	scenario = dict(SCENARIO)
+	scenario["status_file"] = status_file
+	with open(os.path.join(home, "scenario.json"), "w") as f:
+		json.dump(scenario, f)
+
+	disk = YandexDisk()
+	disk.command("start")
+	with open(os.path.join(home, "daemon.json"), "r") as f:
+		started = json.load(f)["started"]
+
+	# Changes are recorded with the sync core state they show
+	updates = []
+	labels = {key: key for key in list(SYNC_STATES) + [NOT_RUNNING] + SNAPSHOT_LABELS}
+	labels.update(rate="%s/s", min_left="~%d min left", h_left="~%d h left",
+	              full_in="Full in about %d days")
+	def on_changes(n:int, changes:dict):
+		updates.append((time.time(), disk.get_sync_status()))
+
+	monitor = YDIMonitor([disk], SCHEDULER_PROFILES[profile], labels, on_changes)
+	(own_before, children_before, switches_before) = cpu_times()
+	since = time.time()
+	monitor.monitor()
+	time.sleep(seconds)
+	monitor.close()
+	until = time.time()
+	(own_after, children_after, switches_after) = cpu_times()
+
+	disk.command("stop")
+	calls = count_calls(home, since, until)
+	shutil.rmtree(home, ignore_errors=True)
+
+	per_hour = 3600 / (until - since)
+	delays = latencies(state_changes(scenario, started, since, until), updates)
+	shown = [d for d in delays if d is not None]
+	return {
+		"cpu_s_per_hour": (own_after - own_before) * per_hour,
+		"cli_cpu_s_per_hour": (children_after - children_before) * per_hour,
+		"spawns_per_hour": calls * per_hour,
+		"wakeups_per_hour": (switches_after - switches_before) * per_hour,
+		"latency_mean_ms": sum(shown) / len(shown) * 1000 if shown else None,
+		"latency_max_ms": max(shown) * 1000 if shown else None,
+		"missed_changes": len(delays) - len(shown)
+	}
+
+def main():
+	parser = argparse.ArgumentParser(description="YDI status updater benchmark")
+	parser.add_argument("--seconds", type=float, default=60, help="run time per case")
+	parser.add_argument("--profiles", default=",".join(SCHEDULER_PROFILES),
+		help="comma separated update frequency settings")
+	parser.add_argument("--modes", default=",".join(MODES),
+		help="comma separated daemon modes: " + ", ".join(MODES))
+	parser.add_argument("--save", help="save results to this JSON file")
+	parser.add_argument("--baseline", default=BASELINE,
+		help="compare with results saved earlier, %s by default" % os.path.relpath(BASELINE))
+	args = parser.parse_args()
+
+	os.environ["PATH"] = FAKE_YD_DIR + os.pathsep + os.environ.get("PATH", "")
+
+	baseline = {}
+	if os.path.exists(args.baseline):
+		with open(args.baseline, "r") as f:
+			baseline = json.load(f)
+
+	results = {}
+	for mode in args.modes.split(","):
+		for profile in args.profiles.split(","):
+			case = mode + "/" + profile
+			results[case] = run(profile, MODES[mode], args.seconds)
+			print(case)
+			for (metric, value) in results[case].items():
+				line = "  %-20s %12s" % (metric, "-" if value is None else "%.1f" % value)
+				was = baseline.get(case, {}).get(metric)
+				if value is not None and was:
+					line += "  %+7.1f %% vs baseline" % ((value / was - 1) * 100)
+				print(line)
+
+	if args.save is not None:
+		with open(args.save, "w") as f:
+			json.dump(results, f, indent=1)
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+"""
+	This file is part of Yandex Disk indicator and control (YDI).
+
+	Copyright 2025 Dandelion Systems <dandelion.systems@gmail.com>
+
+	YDI is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	YDI is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. 
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+"""
+
+# Microbenchmark of yd_cli.parse_status() over the captured
+# `yandex-disk status` outputs in status_corpus/.
+#
+#	python3 bench/bench_parser.py [--save results.json] [--baseline results.json]
+#
+# Results are compared with baseline/parser.json unless
+# --baseline names other ones
+#
+# Prints the cost of one parse for every sample. With --baseline
+# the change against earlier saved results is printed as well
+
+import argparse
+import json
+import os
+import sys
+from timeit import Timer
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from yd_cli import parse_status
+
+CORPUS_DIR = os.path.join(BENCH_DIR, "status_corpus")
+
+# Results of the current release to compare against, refreshed
+# with --save when a change is meant to move them
+BASELINE = os.path.join(BENCH_DIR, "baseline", "parser.json")
+
+def load_corpus():
+	corpus = {}
+	for name in sorted(os.listdir(CORPUS_DIR)):
+		if name.endswith(".txt"):
+			with open(os.path.join(CORPUS_DIR, name), "r") as f:
+				corpus[name[:-4]] = f.read()
+	return corpus
+
+def bench(raw:str, repeat:int=5):
+	# Best of `repeat` runs in microseconds per parse
+	timer = Timer(lambda: parse_status(raw))
+	(number, _) = timer.autorange()
+	return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+def main():
+	parser = argparse.ArgumentParser(description="yandex-disk status parser microbenchmark")
+	parser.add_argument("--save", help="save results to this JSON file")
+	parser.add_argument("--baseline", default=BASELINE,
+		help="compare with results saved earlier, %s by default" % os.path.relpath(BASELINE))
+	args = parser.parse_args()
+
+	baseline = {}
+	if os.path.exists(args.baseline):
+		with open(args.baseline, "r") as f:
+			baseline = json.load(f)
+
+	results = {}
+	for (name, raw) in load_corpus().items():
+		results[name] = bench(raw)
+		line = "%-16s %8.2f us" % (name, results[name])
+		if name in baseline:
+			change = (results[name] / baseline[name] - 1) * 100
+			line += "  %+6.1f %% vs baseline" % change
+		print(line)
+
+	if args.save is not None:
+		with open(args.save, "w") as f:
+			json.dump(results, f, indent=1)
+
+if __name__ == "__main__":
+	main()
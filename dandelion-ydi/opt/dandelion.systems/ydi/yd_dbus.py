@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+
+"""
+	This file is part of Yandex Disk indicator and control (YDI).
+
+	Copyright 2025 Dandelion Systems <dandelion.systems@gmail.com>
+
+	YDI is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	YDI is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. 
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+"""
+
+from gi.repository import Gio
+from gi.repository import GLib
+
+from yd_cli import YandexDisk, YDStatus
+
+# The status YDI has parsed is published on the session bus
+# so that other programs need not poll yandex-disk themselves,
+# e.g.
+#	gdbus introspect --session --dest systems.dandelion.YDI \
+#	                 --object-path /systems/dandelion/YDI
+DBUS_NAME = "systems.dandelion.YDI"
+DBUS_PATH = "/systems/dandelion/YDI"
+DBUS_INTERFACE = "systems.dandelion.YDI"
+
+# Property name, D-Bus type and YDStatus slot. Sizes unknown
+# to yandex-disk are published as -1
+DBUS_PROPERTIES = [
+	("SyncStatus",     "s",  "sync_status"),
+	("SyncProgress",   "s",  "sync_prog"),
+	("SyncDone",       "x",  "sync_done"),
+	("SyncTotal",      "x",  "sync_total"),
+	("Path",           "s",  "path"),
+	("Error",          "s",  "error"),
+	("Total",          "s",  "total"),
+	("Used",           "s",  "used"),
+	("Available",      "s",  "available"),
+	("MaxFile",        "s",  "maxfile"),
+	("Trash",          "s",  "trash"),
+	("TotalBytes",     "x",  "total_bytes"),
+	("UsedBytes",      "x",  "used_bytes"),
+	("AvailableBytes", "x",  "available_bytes"),
+	("MaxFileBytes",   "x",  "maxfile_bytes"),
+	("TrashBytes",     "x",  "trash_bytes"),
+	("LastFiles",      "as", "lastfiles"),
+	("LastDirs",       "as", "lastdirs")
+]
+
+# D-Bus methods and yandex-disk commands they run. Each returns
+# the command output
+DBUS_METHODS = {
+	"Start": "start",
+	"Stop": "stop",
+	"Sync": "sync"
+}
+
+DBUS_INTROSPECTION = (
+	"<node><interface name='%s'>" % DBUS_INTERFACE +
+	"".join(
+		"<property name='%s' type='%s' access='read'/>" % (name, signature)
+		for (name, signature, _) in DBUS_PROPERTIES
+	) +
+	"".join(
+		"<method name='%s'><arg name='output' type='s' direction='out'/></method>" % name
+		for name in DBUS_METHODS
+	) +
+	"</interface></node>"
+)
+
+def dbus_properties(status:YDStatus):
+	# Property values as plain Python values keyed by property name
+	properties = {}
+	for (name, signature, slot) in DBUS_PROPERTIES:
+		value = getattr(status, slot)
+		match signature:
+			case "x":
+				value = -1 if value is None else value
+			case "as":
+				value = list(value)
+		properties[name] = value
+	return properties
+
+class YDIDBusService:
+	# yandex-disk interface status and control
+	__disk:YandexDisk = None
+
+	# Called on the main loop after a D-Bus method has run its
+	# yandex-disk command, with the command as the argument
+	__on_command = None
+
+	# Object path, DBUS_PATH for the first account
+	__path = DBUS_PATH
+
+	__connection:Gio.DBusConnection = None
+	__registration_id = 0
+	__owner_id = 0
+
+	# Property values as last published
+	__properties:dict = None
+	__signatures:dict = None
+
+	def __init__(self, disk:YandexDisk, on_command=None, address:str=None,
+	             path:str=DBUS_PATH):
+		# Publish on the session bus, or on the bus at `address` if
+		# given, e.g. a private dbus-daemon started for testing.
+		# The service at DBUS_PATH owns DBUS_NAME, other accounts are
+		# published at their own `path` on the same connection.
+		# Raises GLib.Error if there is no bus to connect to
+		self.__disk = disk
+		self.__path = path
+		self.__on_command = on_command
+		self.__properties = dbus_properties(disk.get_status())
+		self.__signatures = {name: sig for (name, sig, _) in DBUS_PROPERTIES}
+
+		if address is None:
+			self.__connection = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+		else:
+			self.__connection = Gio.DBusConnection.new_for_address_sync(
+				address,
+				Gio.DBusConnectionFlags.AUTHENTICATION_CLIENT |
+				Gio.DBusConnectionFlags.MESSAGE_BUS_CONNECTION,
+				None, None
+				)
+
+		node = Gio.DBusNodeInfo.new_for_xml(DBUS_INTROSPECTION)
+		self.__registration_id = self.__connection.register_object(
+			path,
+			node.interfaces[0],
+			self.__on_method_call,
+			self.__on_get_property,
+			None
+			)
+		if path == DBUS_PATH:
+			self.__owner_id = Gio.bus_own_name_on_connection(
+				self.__connection,
+				DBUS_NAME,
+				Gio.BusNameOwnerFlags.NONE,
+				None, None
+				)
+
+	def update(self, status:YDStatus):
+		# Publish a new status, to be called on the main loop.
+		# Only the properties that have changed are signalled
+		properties = dbus_properties(status)
+		changed = {
+			name: GLib.Variant(self.__signatures[name], value)
+			for (name, value) in properties.items()
+			if self.__properties[name] != value
+		}
+		self.__properties = properties
+		if changed != {}:
+			self.__connection.emit_signal(
+				None,
+				self.__path,
+				"org.freedesktop.DBus.Properties",
+				"PropertiesChanged",
+				GLib.Variant("(sa{sv}as)", (DBUS_INTERFACE, changed, []))
+				)
+
+	def close(self):
+		if self.__owner_id != 0:
+			Gio.bus_unown_name(self.__owner_id)
+			self.__owner_id = 0
+		if self.__registration_id != 0:
+			self.__connection.unregister_object(self.__registration_id)
+			self.__registration_id = 0
+
+	def __on_get_property(self, connection, sender, object_path, interface_name, property_name):
+		return GLib.Variant(
+			self.__signatures[property_name],
+			self.__properties[property_name]
+			)
+
+	def __on_method_call(self, connection, sender, object_path, interface_name,
+	                     method_name, parameters, invocation):
+		# yandex-disk commands take a while, so run them off the
+		# main loop and reply when they are done
+		cmd = DBUS_METHODS[method_name]
+		self.__disk.command_async(
+			cmd, 
+			callback=lambda output: GLib.idle_add(self.__command_done, cmd, invocation, output)
+			)
+
+	def __command_done(self, cmd:str, invocation:Gio.DBusMethodInvocation, output:str):
+		invocation.return_value(GLib.Variant("(s)", (output,)))
+		if self.__on_command is not None:
+			self.__on_command(cmd)
+		return False
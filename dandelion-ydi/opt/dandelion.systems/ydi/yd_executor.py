@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+"""
+	This file is part of Yandex Disk indicator and control (YDI).
+
+	Copyright 2025 Dandelion Systems <dandelion.systems@gmail.com>
+
+	YDI is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	YDI is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. 
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+"""
+
+from threading import Thread, Condition, Event, current_thread
+import heapq
+
+# Command priorities, the lower the sooner. What the user has asked
+# for goes ahead of whatever is waiting to keep the daemon alive,
+# and both go ahead of status polls
+PRIORITY_USER = 0
+PRIORITY_WATCHDOG = 1
+PRIORITY_POLL = 2
+
+# Commands that undo each other. A request for one of these takes
+# the place of a waiting request for another
+EXCLUSIVE_COMMANDS = ["start", "stop"]
+
+class YDICommandRequest:
+	# A command waiting to run, running or done. Every request for
+	# the same command made while it waits shares this one
+	__slots__ = (
+		"cmd", "args", "priority", "seq",
+		"callbacks", "output", "error", "done"
+	)
+
+	def __init__(self, cmd:str, args:list, priority:int, seq:int):
+		self.cmd = cmd
+		self.args = args
+		self.priority = priority
+		self.seq = seq
+		self.callbacks = []
+		self.output = None
+		self.error = None
+		self.done = Event()
+
+	def result(self):
+		# Wait for the command to finish and return its output.
+		# Raises whatever running it has raised
+		self.done.wait()
+		if self.error is not None:
+			raise self.error
+		return self.output
+
+class YDICommandExecutor:
+	# Runs commands one at a time on its own thread, highest priority
+	# first and in the order they came within a priority. `run` is
+	# called with the command and its arguments and returns the output
+
+	__run = None
+
+	__thread:Thread = None
+	__lock:Condition = None
+
+	# (priority, seq, request) heap. Entries whose request has been
+	# raised to a higher priority since are skipped
+	__queue:list = None
+	__seq = 0
+
+	# Waiting requests keyed by what makes them the same, see __key()
+	__waiting:dict = None
+
+	def __init__(self, run):
+		self.__run = run
+		self.__lock = Condition()
+		self.__queue = []
+		self.__waiting = {}
+
+	def submit(self, cmd:str, args:list=[], priority:int=PRIORITY_USER, callback=None):
+		# Queue `cmd` and return its YDICommandRequest. If the same
+		# command is already waiting, that request is returned instead,
+		# raised to `priority` if it is higher. `callback` is called
+		# with the output on the executor thread once it has run
+		with self.__lock:
+			key = self.__key(cmd, args)
+			request = self.__waiting.get(key)
+			if request is None:
+				self.__seq += 1
+				request = YDICommandRequest(cmd, list(args), priority, self.__seq)
+				self.__waiting[key] = request
+				heapq.heappush(self.__queue, (priority, request.seq, request))
+			else:
+				# The latest of start and stop is what the user wants
+				request.cmd = cmd
+				if priority < request.priority:
+					request.priority = priority
+					heapq.heappush(self.__queue, (priority, request.seq, request))
+			if callback is not None:
+				request.callbacks.append(callback)
+
+			if self.__thread is None:
+				self.__thread = Thread(target=self.__worker, daemon=True)
+				self.__thread.start()
+			self.__lock.notify()
+		return request
+
+	def call(self, cmd:str, args:list=[], priority:int=PRIORITY_USER):
+		# Run `cmd` and wait for its output. Called from the executor
+		# thread itself, e.g. by a callback, it runs right away rather
+		# than wait for itself
+		if current_thread() is self.__thread:
+			return self.__run(cmd, args)
+		return self.submit(cmd, args, priority).result()
+
+	def __key(self, cmd:str, args:list):
+		if cmd in EXCLUSIVE_COMMANDS:
+			return (EXCLUSIVE_COMMANDS[0],)
+		return (cmd,) + tuple(args)
+
+	def __worker(self):
+		while True:
+			with self.__lock:
+				while True:
+					while not self.__queue:
+						self.__lock.wait()
+					(priority, _, request) = heapq.heappop(self.__queue)
+					if priority == request.priority and not request.done.is_set():
+						break
+				# From now on new requests for the command make a new run
+				self.__waiting.pop(self.__key(request.cmd, request.args), None)
+
+			try:
+				request.output = self.__run(request.cmd, request.args)
+			except Exception as e:
+				request.error = e
+			request.done.set()
+
+			for callback in request.callbacks:
+				try:
+					callback(request.output)
+				except Exception:
+					# One failing callback must not stop the commands
+					# of everybody else
+					pass
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+
+"""
+	This file is part of Yandex Disk indicator and control (YDI).
+
+	Copyright 2025 Dandelion Systems <dandelion.systems@gmail.com>
+
+	YDI is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	YDI is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. 
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+"""
+
+from threading import Lock, Thread
+from time import time
+import os
+
+from yd_cli import YDStatus, SyncState
+
+# Sync core states as exported, the daemon not running is "stopped"
+EXPORTER_STATES = {
+	SyncState.IDLE: "idle",
+	SyncState.BUSY: "busy",
+	SyncState.INDEX: "index",
+	SyncState.PAUSED: "paused",
+	SyncState.ERROR: "error",
+	SyncState.OTHER: "other",
+	SyncState.STOPPED: "stopped"
+}
+
+# Quota gauges, metric name and the YDStatus slot it comes from
+EXPORTER_QUOTA = [
+	("ydi_used_bytes", "used_bytes", "Space used on Yandex Disk."),
+	("ydi_total_bytes", "total_bytes", "Space on Yandex Disk."),
+	("ydi_available_bytes", "available_bytes", "Space left on Yandex Disk."),
+	("ydi_trash_bytes", "trash_bytes", "Space taken by the Yandex Disk trash.")
+]
+
+# The Prometheus text format, as the node_exporter textfile collector
+# reads nothing else. OpenMetrics scrapers take it as well
+EXPORTER_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def escape_label(value:str):
+	return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+class YDIAccountMetrics:
+	# What is exported of one yandex-disk instance
+	__slots__ = ("state", "quota", "last_sync", "restarts", "status_calls", "status_seconds")
+
+	def __init__(self):
+		self.state = SyncState.STOPPED
+		self.quota = {}
+		self.last_sync = None
+		self.restarts = 0
+		self.status_calls = 0
+		self.status_seconds = 0.0
+
+class YDIExporter:
+	# Exports sync state and quota of every account in the Prometheus
+	# text format, to a file for the node_exporter textfile collector
+	# and/or over HTTP on localhost. The file is written whenever
+	# anything but the status call latency changes, by writing a
+	# temporary file and renaming it over the old one. The latency
+	# goes along with the next write, HTTP always serves it fresh
+
+	# Account names for the "account" label
+	__names:list = None
+	__accounts:list = None
+
+	# Textfile path, None for no file
+	__path = None
+
+	# Text of the last write, to skip writes that change nothing
+	__written = None
+
+	# Localhost HTTP server, None if there is none
+	__server = None
+
+	# update() runs on the updater thread, the HTTP server on its own
+	__lock:Lock = None
+
+	def __init__(self, names:list, path:str=None, port:int=None):
+		# Raises OSError if the HTTP port cannot be bound
+		self.__names = names
+		self.__accounts = [YDIAccountMetrics() for name in names]
+		self.__path = path
+		self.__lock = Lock()
+		if port is not None:
+			self.__serve(port)
+
+	def update(self, n:int, status:YDStatus, restarts:int, status_calls:tuple):
+		# Take the status of account `n` just parsed, the number of
+		# watchdog restarts and the (count, seconds) of its status calls
+		with self.__lock:
+			account = self.__accounts[n]
+			if (status.sync_state == SyncState.IDLE and
+			    account.state in [SyncState.BUSY, SyncState.INDEX]):
+				account.last_sync = time()
+			account.state = status.sync_state
+			account.quota = {slot: getattr(status, slot) for (_, slot, _) in EXPORTER_QUOTA}
+			account.restarts = restarts
+			(account.status_calls, account.status_seconds) = status_calls
+			if self.__path is None:
+				return
+
+			# Latency alone is no reason to write
+			text = self.__render(latency=False)
+			if text == self.__written:
+				return
+			self.__written = text
+			text = self.__render(latency=True)
+		try:
+			self.__write(text)
+		except OSError:
+			# Maybe the collector directory is not there yet
+			pass
+
+	def render(self):
+		with self.__lock:
+			return self.__render(latency=True)
+
+	def close(self):
+		if self.__server is not None:
+			self.__server.shutdown()
+			self.__server.server_close()
+			self.__server = None
+
+	def __render(self, latency:bool):
+		labels = ['account="%s"' % escape_label(name) for name in self.__names]
+		lines = [
+			"# HELP ydi_sync_state Sync core state of the yandex-disk daemon, 1 for the current one.",
+			"# TYPE ydi_sync_state gauge"
+			]
+		for (label, account) in zip(labels, self.__accounts):
+			for (state, name) in EXPORTER_STATES.items():
+				lines.append('ydi_sync_state{%s,state="%s"} %d' %
+				             (label, name, account.state == state))
+
+		for (metric, slot, help) in EXPORTER_QUOTA:
+			lines += [
+				"# HELP %s %s" % (metric, help),
+				"# TYPE %s gauge" % metric
+				]
+			for (label, account) in zip(labels, self.__accounts):
+				value = account.quota.get(slot)
+				if value is not None:
+					lines.append("%s{%s} %d" % (metric, label, value))
+
+		lines += [
+			"# HELP ydi_last_sync_timestamp_seconds When a sync has last finished.",
+			"# TYPE ydi_last_sync_timestamp_seconds gauge"
+			]
+		for (label, account) in zip(labels, self.__accounts):
+			if account.last_sync is not None:
+				lines.append("ydi_last_sync_timestamp_seconds{%s} %.1f" % (label, account.last_sync))
+
+		lines += [
+			"# HELP ydi_daemon_restarts_total Restarts of the daemon by the YDI watchdog.",
+			"# TYPE ydi_daemon_restarts_total counter"
+			]
+		for (label, account) in zip(labels, self.__accounts):
+			lines.append("ydi_daemon_restarts_total{%s} %d" % (label, account.restarts))
+
+		if latency:
+			lines += [
+				"# HELP ydi_status_call_seconds Time taken by yandex-disk status.",
+				"# TYPE ydi_status_call_seconds summary"
+				]
+			for (label, account) in zip(labels, self.__accounts):
+				lines.append("ydi_status_call_seconds_count{%s} %d" % (label, account.status_calls))
+				lines.append("ydi_status_call_seconds_sum{%s} %.6f" % (label, account.status_seconds))
+
+		return "\n".join(lines) + "\n"
+
+	def __write(self, text:str):
+		# The collector may read the file any time, so it must never
+		# be seen half written
+		tmp = self.__path + ".tmp"
+		with open(tmp, "w") as f:
+			f.write(text)
+		os.replace(tmp, self.__path)
+
+	def __serve(self, port:int):
+		# Imported here as few want it
+		from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+		exporter = self
+
+		class Handler(BaseHTTPRequestHandler):
+			def do_GET(self):
+				if self.path not in ["/", "/metrics"]:
+					self.send_error(404)
+					return
+				body = exporter.render().encode("utf-8")
+				self.send_response(200)
+				self.send_header("Content-Type", EXPORTER_CONTENT_TYPE)
+				self.send_header("Content-Length", str(len(body)))
+				self.end_headers()
+				self.wfile.write(body)
+
+			def log_message(self, format, *args):
+				pass
+
+		# Only this computer gets to see it
+		self.__server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+		self.__server.daemon_threads = True
+		Thread(target=self.__server.serve_forever, daemon=True).start()
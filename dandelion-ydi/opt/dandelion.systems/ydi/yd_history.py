@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+
+"""
+	This file is part of Yandex Disk indicator and control (YDI).
+
+	Copyright 2025 Dandelion Systems <dandelion.systems@gmail.com>
+
+	YDI is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	YDI is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. 
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+"""
+
+from typing import NamedTuple
+from threading import Lock
+from time import time
+import mmap
+import os
+import struct
+
+from yd_cli import YDStatus, SyncState
+
+# History of sync state, progress and quota kept in a fixed size
+# file mapped into memory. The file is a header followed by
+# HISTORY_CAPACITY records used as a ring buffer, so that once full
+# every new record takes the place of the oldest one.
+#
+# Times are counted in tenths of a second. The header keeps the
+# absolute time of the oldest and of the newest record, every record
+# keeps the time passed since the record before it
+HISTORY_DIR = os.path.join(os.path.expanduser("~"), ".config", "yandex-disk")
+HISTORY_FILE = "ydi-history.bin"
+HISTORY_CAPACITY = 32768
+
+HISTORY_MAGIC = b"YDIH"
+HISTORY_VERSION = 1
+
+# Magic, version, record size, capacity, number of records, index
+# of the oldest one, times of the oldest and of the newest one
+HISTORY_HEADER = struct.Struct("<4sHHIIIqq")
+HISTORY_HEADER_SIZE = 64
+
+# Time since the previous record, sync core state, bytes synced and
+# to sync, bytes used, available and total. Unknown sizes are -1
+HISTORY_RECORD = struct.Struct("<IB3x5q")
+
+# Tenths of a second per second and the longest time between
+# records that fits into one
+HISTORY_TICKS = 10
+HISTORY_MAX_DELTA = 0xFFFFFFFF
+
+# Sync core states as stored, never reorder these
+HISTORY_STATES = [
+	SyncState.STOPPED,
+	SyncState.IDLE,
+	SyncState.BUSY,
+	SyncState.INDEX,
+	SyncState.PAUSED,
+	SyncState.ERROR,
+	SyncState.OTHER
+]
+HISTORY_STATE_CODES = {state: code for (code, state) in enumerate(HISTORY_STATES)}
+
+class YDIHistoryRecord(NamedTuple):
+	time: float
+	sync_state: SyncState
+	sync_done: int
+	sync_total: int
+	used: int
+	available: int
+	total: int
+
+def history_file(n:int=0):
+	# History file path of account `n`
+	if n == 0:
+		return os.path.join(HISTORY_DIR, HISTORY_FILE)
+	(name, ext) = os.path.splitext(HISTORY_FILE)
+	return os.path.join(HISTORY_DIR, "%s-%d%s" % (name, n, ext))
+
+def size_or_none(size:int):
+	return None if size < 0 else size
+
+class YDIHistory:
+	# Appends a record whenever the sync state, progress or quota
+	# changes and answers which records fall into a time range.
+	# Records of an idle stretch that differ in quota only are
+	# squeezed into its first and its latest one
+	__path = ""
+	__capacity = 0
+
+	__file = None
+	__map:mmap.mmap = None
+
+	# Header fields kept in memory, see HISTORY_HEADER
+	__count = 0
+	__head = 0
+	__first_time = 0
+	__last_time = 0
+
+	# Values of the newest record and of the one before it,
+	# less the time, to see what has changed
+	__last:tuple = None
+	__before_last:tuple = None
+
+	# record() runs on the updater thread, query() on any
+	__lock:Lock = None
+
+	def __init__(self, path:str=None, capacity:int=HISTORY_CAPACITY):
+		# Open the history at `path`, creating it if it is not there
+		# or cannot be used, e.g. after the capacity has changed.
+		# Raises OSError if it can be neither opened nor created
+		self.__path = history_file() if path is None else path
+		self.__capacity = capacity
+		self.__lock = Lock()
+
+		size = HISTORY_HEADER_SIZE + capacity * HISTORY_RECORD.size
+		fd = os.open(self.__path, os.O_RDWR | os.O_CREAT, 0o600)
+		self.__file = os.fdopen(fd, "r+b")
+		if os.fstat(fd).st_size != size:
+			self.__file.truncate(0)
+			self.__file.truncate(size)
+		self.__map = mmap.mmap(fd, size)
+
+		(magic, version, record_size, file_capacity, count, head,
+		 first_time, last_time) = HISTORY_HEADER.unpack_from(self.__map, 0)
+		if (magic == HISTORY_MAGIC and version == HISTORY_VERSION and
+		    record_size == HISTORY_RECORD.size and file_capacity == capacity and
+		    count <= capacity and head < capacity):
+			self.__count = count
+			self.__head = head
+			self.__first_time = first_time
+			self.__last_time = last_time
+			if count > 0:
+				self.__last = self.__read(count - 1)[1:]
+			if count > 1:
+				self.__before_last = self.__read(count - 2)[1:]
+		else:
+			self.__write_header()
+
+	def get_path(self):
+		return self.__path
+
+	def __len__(self):
+		return self.__count
+
+	def record(self, status:YDStatus, now:float=None):
+		# Add `status` at `now` unless nothing worth keeping has
+		# changed since the newest record
+		values = (
+			HISTORY_STATE_CODES[status.sync_state],
+			-1 if status.sync_done is None else status.sync_done,
+			-1 if status.sync_total is None else status.sync_total,
+			-1 if status.used_bytes is None else status.used_bytes,
+			-1 if status.available_bytes is None else status.available_bytes,
+			-1 if status.total_bytes is None else status.total_bytes
+		)
+		if values == self.__last:
+			return False
+
+		ticks = int((time() if now is None else now) * HISTORY_TICKS)
+		with self.__lock:
+			idle = HISTORY_STATE_CODES[SyncState.IDLE]
+			if (values[0] == idle and self.__last is not None and
+			    self.__before_last is not None and
+			    self.__last[0] == idle and self.__before_last[0] == idle):
+				# Still idle, the newest record moves along instead
+				# of a new one being added
+				self.__replace_last(ticks, values)
+			else:
+				self.__append(ticks, values)
+				self.__before_last = self.__last
+			self.__last = values
+			self.__write_header()
+		return True
+
+	def query(self, since:float=None, until:float=None):
+		# Records made from `since` (inclusive) till `until`
+		# (exclusive) oldest first. Either end may be left open
+		since = None if since is None else since * HISTORY_TICKS
+		until = None if until is None else until * HISTORY_TICKS
+		records = []
+		with self.__lock:
+			t = self.__first_time
+			for i in range(self.__count):
+				(delta, state, done, total, used, available,
+				 quota) = self.__read(i)
+				if i > 0:
+					t += delta
+				if until is not None and t >= until:
+					break
+				if since is None or t >= since:
+					records.append(YDIHistoryRecord(
+						t / HISTORY_TICKS,
+						HISTORY_STATES[state],
+						size_or_none(done),
+						size_or_none(total),
+						size_or_none(used),
+						size_or_none(available),
+						size_or_none(quota)
+						))
+		return records
+
+	def close(self):
+		with self.__lock:
+			if self.__map is not None:
+				self.__map.flush()
+				self.__map.close()
+				self.__map = None
+				self.__file.close()
+
+	def __offset(self, i:int):
+		# File offset of the `i`-th record counted from the oldest
+		return (HISTORY_HEADER_SIZE +
+		        (self.__head + i) % self.__capacity * HISTORY_RECORD.size)
+
+	def __read(self, i:int):
+		return HISTORY_RECORD.unpack_from(self.__map, self.__offset(i))
+
+	def __append(self, ticks:int, values:tuple):
+		if self.__count == 0:
+			self.__first_time = ticks
+		elif self.__count == self.__capacity:
+			# The oldest record goes, the next one becomes the oldest
+			self.__first_time += self.__read(1)[0]
+			self.__head = (self.__head + 1) % self.__capacity
+			self.__count -= 1
+		delta = 0 if self.__count == 0 else self.__delta(ticks, 0)
+		HISTORY_RECORD.pack_into(
+			self.__map, self.__offset(self.__count), delta, *values
+			)
+		self.__count += 1
+		self.__last_time = max(ticks, self.__last_time)
+
+	def __replace_last(self, ticks:int, values:tuple):
+		delta = self.__delta(ticks, self.__read(self.__count - 1)[0])
+		HISTORY_RECORD.pack_into(
+			self.__map, self.__offset(self.__count - 1), delta, *values
+			)
+		self.__last_time = max(ticks, self.__last_time)
+
+	def __delta(self, ticks:int, since_before:int):
+		# Time from the record before the newest one, or from the
+		# newest one if `since_before` is 0, till `ticks`. Clocks
+		# going back count as no time passed
+		delta = since_before + max(ticks - self.__last_time, 0)
+		return min(delta, HISTORY_MAX_DELTA)
+
+	def __write_header(self):
+		HISTORY_HEADER.pack_into(
+			self.__map, 0,
+			HISTORY_MAGIC, HISTORY_VERSION, HISTORY_RECORD.size,
+			self.__capacity, self.__count, self.__head,
+			self.__first_time, self.__last_time
+			)
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+
+"""
+	This file is part of Yandex Disk indicator and control (YDI).
+
+	Copyright 2025 Dandelion Systems <dandelion.systems@gmail.com>
+
+	YDI is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	YDI is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. 
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+"""
+
+from collections import deque
+from math import exp, log, ceil
+from time import monotonic
+
+# Sync rate is averaged over the progress samples of the last
+# PROGRESS_WINDOW seconds, a sample PROGRESS_HALF_LIFE seconds
+# older than another one weighs half as much
+PROGRESS_WINDOW = 60
+PROGRESS_HALF_LIFE = 10
+
+# Rates and sizes as the indicator shows them
+RATE_UNITS = ["B", "KB", "MB", "GB", "TB"]
+
+def format_size(size:float):
+	# Bytes to "12.3 MB"
+	for unit in RATE_UNITS[:-1]:
+		if size < 1024:
+			return "%.1f %s" % (size, unit)
+		size /= 1024
+	return "%.1f %s" % (size, RATE_UNITS[-1])
+
+class YDIProgressEstimator:
+	# Works out the sync rate and the time left from the bytes synced
+	# and to sync as yandex-disk reports them in `Sync progress`.
+	# A new sync batch starts the counters over, and so does the
+	# estimate
+	__window = PROGRESS_WINDOW
+	__half_life = PROGRESS_HALF_LIFE
+
+	# (monotonic time, bytes synced) of the current batch
+	__samples:deque = None
+	__total = None
+
+	# Bytes per second as last worked out, None until there
+	# are two samples
+	__rate = None
+
+	def __init__(self, window:float=PROGRESS_WINDOW, half_life:float=PROGRESS_HALF_LIFE):
+		self.__window = window
+		self.__half_life = half_life
+		self.__samples = deque()
+
+	def reset(self):
+		self.__samples.clear()
+		self.__total = None
+		self.__rate = None
+
+	def update(self, done:int, total:int, now:float=None):
+		# Add a progress sample, None for `done` when there is
+		# no sync in progress
+		if done is None or total is None:
+			self.reset()
+			return
+		now = monotonic() if now is None else now
+
+		if self.__samples:
+			(last_time, last_done) = self.__samples[-1]
+			if total != self.__total or done < last_done:
+				# A new batch has started
+				self.reset()
+			elif now <= last_time:
+				return
+		self.__total = total
+		self.__samples.append((now, done))
+		while now - self.__samples[0][0] > self.__window and len(self.__samples) > 2:
+			self.__samples.popleft()
+		self.__rate = self.__average()
+
+	def get_rate(self):
+		return self.__rate
+
+	def get_remaining(self):
+		# Seconds till the batch is done, None if it cannot be told
+		if not self.__rate or not self.__samples:
+			return None
+		return (self.__total - self.__samples[-1][1]) / self.__rate
+
+	def __average(self):
+		# Exponentially weighted average of the rates between
+		# consecutive samples, the older the less weight
+		if len(self.__samples) < 2:
+			return None
+		rate = None
+		decay = log(2) / self.__half_life
+		samples = iter(self.__samples)
+		(t0, done0) = next(samples)
+		for (t1, done1) in samples:
+			r = (done1 - done0) / (t1 - t0)
+			if rate is None:
+				rate = r
+			else:
+				alpha = 1 - exp(-decay * (t1 - t0))
+				rate += alpha * (r - rate)
+			(t0, done0) = (t1, done1)
+		return rate
+
+	def describe(self, labels:dict):
+		# "12.3 MB/s, ~5 min left" with the localized "rate",
+		# "min_left" and "h_left" labels, "" if nothing is known yet
+		rate = self.__rate
+		if rate is None:
+			return ""
+		text = labels["rate"] % format_size(rate)
+		remaining = self.get_remaining()
+		if remaining is not None:
+			minutes = max(ceil(remaining / 60), 1)
+			if minutes < 120:
+				text += ", " + labels["min_left"] % minutes
+			else:
+				text += ", " + labels["h_left"] % round(minutes / 60)
+		return text
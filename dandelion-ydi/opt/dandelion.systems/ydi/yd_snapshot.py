@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+"""
+	This file is part of Yandex Disk indicator and control (YDI).
+
+	Copyright 2025 Dandelion Systems <dandelion.systems@gmail.com>
+
+	YDI is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	YDI is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. 
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+"""
+
+from typing import NamedTuple
+
+from yd_cli import YandexDisk
+from yd_progress import YDIProgressEstimator
+
+# Status icon and whether the daemon is running for each sync
+# core state. Anything else means it is either stopped or in
+# `no internet access` state
+SYNC_STATES = {
+	"idle":   ("YDNormal.png", True),
+	"busy":   ("YDSync.png", True),
+	"index":  ("YDSync.png", True),
+	"paused": ("YDPaused.png", True),
+	"error":  ("YDError.png", True)
+}
+NOT_RUNNING = "not running"
+NOT_RUNNING_ICON = "YDDisconnect.png"
+
+# Shown instead of a less alarming icon when the quota is running out
+QUOTA_WARNING_ICON = "YDWarning.png"
+
+# Status icons from the least to the most alarming. With several
+# accounts the indicator shows the worst of them
+ICON_SEVERITY = [
+	"YDNormal.png",
+	"YDSync.png",
+	"YDPaused.png",
+	QUOTA_WARNING_ICON,
+	NOT_RUNNING_ICON,
+	"YDError.png"
+]
+
+def worst_icon(icons:list):
+	return max(icons, key=ICON_SEVERITY.index)
+
+# Keys of the localized labels YDISnapshotter expects: every state
+# in SYNC_STATES, NOT_RUNNING and the following. "rate", "min_left"
+# and "h_left" are format strings, see YDIProgressEstimator.describe(),
+# so is "full_in", see YDIQuotaForecast.describe()
+SNAPSHOT_LABELS = [
+	"start", "stop", "status",
+	"total", "used", "available", "maxfile", "trash",
+	"rate", "min_left", "h_left", "full_in"
+]
+
+# Everything the indicator shows about the yandex-disk status.
+# Field names are the keys YDIndicator uses to apply changes
+class YDISnapshot(NamedTuple):
+	icon: str
+	start_stop: str
+	sync_status: str
+	path: str
+	total: str
+	used: str
+	available: str
+	maxfile: str
+	trash: str
+	forecast: str
+	rfiles: tuple
+	rdirs: tuple
+
+class YDISnapshotter:
+	# Localized labels keyed as described at SNAPSHOT_LABELS
+	__labels:dict = None
+
+	# Icon, start/stop label and status label for each sync core
+	# state so that none of these are worked out on every update
+	__states:dict = None
+	__not_running:tuple = None
+
+	def __init__(self, labels:dict):
+		self.__labels = labels
+		self.__states = {}
+		for (state, (icon, running)) in SYNC_STATES.items():
+			self.__states[state] = (
+				icon,
+				labels["stop"] if running else labels["start"],
+				labels["status"] + labels[state]
+			)
+		self.__not_running = (
+			NOT_RUNNING_ICON,
+			labels["start"],
+			labels["status"] + labels[NOT_RUNNING]
+		)
+
+	def take(self, disk:YandexDisk, progress:YDIProgressEstimator=None, 
+	         forecast=None):
+		# Safe to call off the main thread, nothing here touches Gtk.
+		# The sync rate and time left are shown if `progress` is given,
+		# when the quota runs out and the warning icon if `forecast`,
+		# a YDIQuotaForecast, is. Everything comes from one status 
+		# record, the disk may get a new one meanwhile
+		labels = self.__labels
+		status = disk.get_status()
+		(icon, start_stop, sync_status) = self.__states.get(
+			status.sync_status,
+			self.__not_running
+			)
+		full_in = ""
+		if forecast is not None:
+			full_in = forecast.describe(labels)
+			if (forecast.get_warning() is not None and 
+			    ICON_SEVERITY.index(icon) < ICON_SEVERITY.index(QUOTA_WARNING_ICON)):
+				icon = QUOTA_WARNING_ICON
+		if status.sync_prog != "":
+			sync_status += "\n" + status.sync_prog
+			if progress is not None:
+				rate = progress.describe(labels)
+				if rate != "":
+					sync_status += "\n" + rate
+		return YDISnapshot(
+			icon,
+			start_stop,
+			sync_status,
+			status.path,
+			labels["total"] + status.total,
+			labels["used"] + status.used,
+			labels["available"] + status.available,
+			labels["maxfile"] + status.maxfile,
+			labels["trash"] + status.trash,
+			full_in,
+			tuple(status.lastfiles),
+			tuple(status.lastdirs)
+		)
+
+def diff_snapshots(old:YDISnapshot, new:YDISnapshot):
+	# Returns a dict of the fields that differ in `new` with their
+	# new values, all of them if there is no `old` snapshot
+	if old == new:
+		return {}
+	if old is None:
+		return new._asdict()
+	return {
+		field: value
+		for (field, was, value) in zip(new._fields, old, new)
+		if was != value
+	}
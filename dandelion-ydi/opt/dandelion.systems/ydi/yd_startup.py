@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+
+"""
+	This file is part of Yandex Disk indicator and control (YDI).
+
+	Copyright 2025 Dandelion Systems <dandelion.systems@gmail.com>
+
+	YDI is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	YDI is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. 
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+"""
+
+from time import perf_counter
+import builtins
+import sys
+import threading
+
+# Imports taking less than this many milliseconds are left out
+# of the report unless they are top level
+STARTUP_MIN_IMPORT_MS = 1.0
+
+class YDIStartupProfiler:
+	# Times start up phases and the imports made during them for
+	# `ydi --profile-startup`. Phases are marked as they end, each
+	# takes the time since the previous mark
+
+	__started = 0.0
+	__last = 0.0
+
+	# (phase, milliseconds)
+	__phases:list = None
+
+	# (nesting depth, module, milliseconds) in the order the
+	# imports have started
+	__imports:list = None
+	__depth = 0
+
+	__original_import = None
+
+	def __init__(self):
+		self.__started = perf_counter()
+		self.__last = self.__started
+		self.__phases = []
+		self.__imports = []
+
+	def watch_imports(self):
+		# Time every import of a module not loaded yet until
+		# unwatch_imports() is called
+		if self.__original_import is not None:
+			return
+		self.__original_import = builtins.__import__
+		original = self.__original_import
+
+		def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+			# Only the main thread is on the start up path
+			if level != 0 or threading.current_thread() is not threading.main_thread():
+				return original(name, globals, locals, fromlist, level)
+			# `from gi.repository import Gtk` loads Gtk although
+			# gi.repository is there already
+			loaded = name in sys.modules
+			candidates = [
+				f for f in (fromlist or ())
+				if f != "*" and name + "." + f not in sys.modules
+				]
+			if loaded and candidates == []:
+				return original(name, globals, locals, fromlist, level)
+
+			entry = [self.__depth, name, 0.0]
+			self.__imports.append(entry)
+			self.__depth += 1
+			t = perf_counter()
+			try:
+				return original(name, globals, locals, fromlist, level)
+			finally:
+				entry[2] = (perf_counter() - t) * 1000
+				self.__depth -= 1
+				new = [f for f in candidates if name + "." + f in sys.modules]
+				if new != []:
+					entry[1] = name + "." + ",".join(new)
+				elif loaded:
+					# Names from the module rather than submodules
+					self.__imports.remove(entry)
+
+		builtins.__import__ = timed_import
+
+	def unwatch_imports(self):
+		if self.__original_import is not None:
+			builtins.__import__ = self.__original_import
+			self.__original_import = None
+
+	def mark(self, phase:str):
+		now = perf_counter()
+		self.__phases.append((phase, (now - self.__last) * 1000))
+		self.__last = now
+
+	def report(self):
+		lines = ["Start up phases, ms:"]
+		for (phase, ms) in self.__phases:
+			lines.append("  %-28s %8.1f" % (phase, ms))
+		lines.append("  %-28s %8.1f" % ("total", (self.__last - self.__started) * 1000))
+		lines.append("Imports, ms including nested imports:")
+		for (depth, module, ms) in self.__imports:
+			if depth == 0 or ms >= STARTUP_MIN_IMPORT_MS:
+				lines.append("  %-28s %8.1f" % ("  " * depth + module, ms))
+		return "\n".join(lines)
@@ -16,17 +16,78 @@
 	SPDX-License-Identifier: MIT
 """
 
-from sys import exc_info
+from sys import exc_info, argv, stderr, exit
 
-from yd_appind import YDIndicator
-from yd_cli import YandexDisk		
+USAGE = """Usage: ydi [--profile-startup]
+       ydi --start | --stop | --open-menu [--account N]
+       ydi --status [--json] [--account N]
+
+Without options ydi shows the Yandex Disk indicator. The others are
+handed to the ydi running already: start or stop yandex-disk, print
+its status, or open the indicator menu. Accounts are numbered from 0
+in the order of the "accounts" setting, all of them by default."""
+
+def forward_command(instance, request:dict):
+	# Hand `request` over to the YDI running already, see yd_instance.
+	# Returns the exit status
+	from yd_instance import forward
+
+	if request is None:
+		print("ydi: already running", file=stderr)
+		return 1
+	try:
+		reply = forward(request, instance.get_socket_path())
+	except (OSError, ValueError) as e:
+		# Starting or quitting right now
+		print("ydi: no answer from the running ydi: %s" % e, file=stderr)
+		return 1
+	if reply.get("output", "") != "":
+		print(reply["output"])
+	return reply.get("status", 0)
 
 def main():
+	# Nothing but the standard library is loaded for this
+	if "--help" in argv[1:] or "-h" in argv[1:]:
+		print(USAGE)
+		exit(0)
+
+	# `ydi --profile-startup` prints how long each start up phase
+	# and each import takes, and quits once the first status is shown
+	profiler = None
+	if "--profile-startup" in argv[1:]:
+		from yd_startup import YDIStartupProfiler
+		profiler = YDIStartupProfiler()
+		profiler.watch_imports()
+
+	# `ydi --start`, `--stop`, `--status [--json]` and `--open-menu`,
+	# optionally with `--account N`, are forwarded to the YDI running
+	# already, which is the only one of the user
+	from yd_instance import YDIInstance, parse_command
+	try:
+		request = parse_command(argv[1:])
+	except ValueError as e:
+		print("ydi: %s" % e, file=stderr)
+		exit(2)
+	instance = YDIInstance()
+	if not instance.acquire():
+		exit(forward_command(instance, request))
+	if request is not None:
+		print("ydi: not running", file=stderr)
+		exit(1)
+
+	# Imported here rather than at the top for the profiler to see
+	from yd_appind import YDIndicator
+	from yd_cli import YandexDisk
+	if profiler is not None:
+		profiler.mark("imports")
+
 	theDisk = YandexDisk()
-	theIndicator = YDIndicator(theDisk)
+	theIndicator = YDIndicator(theDisk, profiler, instance)
 
 if __name__ == "__main__":
 	try:
 		main()
+	except SystemExit:
+		raise
 	except:
 		print(exc_info())
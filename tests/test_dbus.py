@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+
+"""
+	This file is part of Yandex Disk indicator and control (YDI).
+
+	Copyright 2025 Dandelion Systems <dandelion.systems@gmail.com>
+
+	YDI is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	YDI is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. 
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+"""
+
+# YDIDBusService against a private dbus-daemon started for the test,
+# so the session bus of the desktop is left alone. Skipped if there
+# is no dbus-daemon or no PyGObject
+#
+#	python3 -m unittest discover tests
+
+from shutil import which
+from subprocess import Popen, PIPE
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+	from gi.repository import Gio
+	from gi.repository import GLib
+except ImportError:
+	Gio = None
+
+from yd_cli import YDStatus
+
+# Seconds to wait for the bus to answer
+TIMEOUT = 5
+
+class FakeDisk:
+	# What YDIDBusService uses of a YandexDisk: the status and the
+	# commands, which answer right away here
+	def __init__(self):
+		self.status = YDStatus().with_sync_status("idle")
+		self.commands = []
+
+	def get_status(self):
+		return self.status
+
+	def command_async(self, cmd:str, args:list=[], priority:int=0, callback=None):
+		self.commands.append(cmd)
+		if callback is not None:
+			callback("%s done" % cmd)
+
+@unittest.skipIf(Gio is None, "PyGObject is not installed")
+@unittest.skipIf(which("dbus-daemon") is None, "dbus-daemon is not installed")
+class TestDBusService(unittest.TestCase):
+
+	def setUp(self):
+		from yd_dbus import YDIDBusService, DBUS_PATH, DBUS_NAME, DBUS_INTERFACE
+		self.path = DBUS_PATH
+		self.name = DBUS_NAME
+		self.interface = DBUS_INTERFACE
+
+		self.daemon = Popen(
+			["dbus-daemon", "--session", "--nofork", "--print-address"],
+			stdout=PIPE, text=True
+			)
+		self.address = self.daemon.stdout.readline().strip()
+
+		self.disk = FakeDisk()
+		self.done = []
+		self.service = YDIDBusService(self.disk, self.done.append, address=self.address)
+		self.client = Gio.DBusConnection.new_for_address_sync(
+			self.address,
+			Gio.DBusConnectionFlags.AUTHENTICATION_CLIENT |
+			Gio.DBusConnectionFlags.MESSAGE_BUS_CONNECTION,
+			None, None
+			)
+		# The name is owned asynchronously
+		self.wait_for(lambda: self.call(
+			"org.freedesktop.DBus", "/org/freedesktop/DBus", "org.freedesktop.DBus",
+			"NameHasOwner", GLib.Variant("(s)", (self.name,))
+			)[0])
+
+	def tearDown(self):
+		self.service.close()
+		self.client.close_sync(None)
+		self.daemon.terminate()
+		self.daemon.wait()
+		self.daemon.stdout.close()
+
+	def wait_for(self, predicate):
+		# Run the main loop till `predicate` is true
+		context = GLib.MainContext.default()
+		deadline = GLib.get_monotonic_time() + TIMEOUT * 1000000
+		while not predicate():
+			if GLib.get_monotonic_time() > deadline:
+				self.fail("Timed out")
+			context.iteration(False)
+
+	def call(self, name:str, path:str, interface:str, method:str, parameters=None):
+		# The service replies on this very main loop, so the call
+		# must not block it
+		replies = []
+		self.client.call(
+			name, path, interface, method, parameters, None,
+			Gio.DBusCallFlags.NONE, TIMEOUT * 1000, None,
+			lambda client, result: replies.append(client.call_finish(result))
+			)
+		self.wait_for(lambda: replies != [])
+		return replies[0].unpack()
+
+	def get_property(self, property_name:str):
+		return self.call(
+			self.name, self.path, "org.freedesktop.DBus.Properties", "Get",
+			GLib.Variant("(ss)", (self.interface, property_name))
+			)[0]
+
+	def test_properties(self):
+		self.assertEqual(self.get_property("SyncStatus"), "idle")
+		# Sizes unknown to yandex-disk are -1
+		self.assertEqual(self.get_property("UsedBytes"), -1)
+		self.assertEqual(self.get_property("LastFiles"), [])
+
+	def test_methods(self):
+		for (method, cmd) in [("Start", "start"), ("Stop", "stop"), ("Sync", "sync")]:
+			(output,) = self.call(self.name, self.path, self.interface, method)
+			self.assertEqual(output, "%s done" % cmd)
+		self.assertEqual(self.disk.commands, ["start", "stop", "sync"])
+		# `on_command` is told once the reply has gone
+		self.wait_for(lambda: len(self.done) == 3)
+		self.assertEqual(self.done, ["start", "stop", "sync"])
+
+	def test_properties_changed(self):
+		signals = []
+		self.client.signal_subscribe(
+			None, "org.freedesktop.DBus.Properties", "PropertiesChanged",
+			self.path, None, Gio.DBusSignalFlags.NONE,
+			lambda *args: signals.append(args[5].unpack())
+			)
+		# Let the match rule reach the bus before the signal is sent
+		self.call(
+			"org.freedesktop.DBus", "/org/freedesktop/DBus", "org.freedesktop.DBus",
+			"GetId"
+			)
+
+		self.disk.status = self.disk.status.with_sync_status("busy")
+		self.service.update(self.disk.status)
+		self.wait_for(lambda: signals != [])
+
+		(interface, changed, invalidated) = signals[0]
+		self.assertEqual(interface, self.interface)
+		# Only what has changed is signalled
+		self.assertEqual(changed, {"SyncStatus": "busy"})
+		self.assertEqual(invalidated, [])
+		self.assertEqual(self.get_property("SyncStatus"), "busy")
+
+		# Nothing is signalled if nothing has changed
+		self.service.update(self.disk.status)
+		self.call(
+			"org.freedesktop.DBus", "/org/freedesktop/DBus", "org.freedesktop.DBus",
+			"GetId"
+			)
+		self.assertEqual(len(signals), 1)
+
+	def test_properties_changed_off_snapshot(self):
+		# Error and the byte counts are not in the menu, they are
+		# signalled all the same
+		signals = []
+		self.client.signal_subscribe(
+			None, "org.freedesktop.DBus.Properties", "PropertiesChanged",
+			self.path, None, Gio.DBusSignalFlags.NONE,
+			lambda *args: signals.append(args[5].unpack())
+			)
+		self.call(
+			"org.freedesktop.DBus", "/org/freedesktop/DBus", "org.freedesktop.DBus",
+			"GetId"
+			)
+
+		status = self.disk.status.with_sync_status("idle")
+		status.error = "access denied"
+		status.used_bytes = 1 << 30
+		self.service.update(status)
+		self.wait_for(lambda: signals != [])
+
+		(interface, changed, invalidated) = signals[0]
+		self.assertEqual(changed, {"Error": "access denied", "UsedBytes": 1 << 30})
+		self.assertEqual(self.get_property("Error"), "access denied")
+
+if __name__ == "__main__":
+	unittest.main()
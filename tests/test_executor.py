@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+
+"""
+	This file is part of Yandex Disk indicator and control (YDI).
+
+	Copyright 2025 Dandelion Systems <dandelion.systems@gmail.com>
+
+	YDI is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	YDI is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. 
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+"""
+
+# YDICommandExecutor with a made up command runner
+#
+#	python3 -m unittest discover tests
+
+from threading import Event, Lock
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from yd_executor import (
+	YDICommandExecutor, PRIORITY_USER, PRIORITY_WATCHDOG, PRIORITY_POLL
+	)
+
+WAIT = 5
+
+class FakeRunner:
+	# Records the commands run. The first one, "hold", waits for
+	# release() so that the rest pile up behind it
+	def __init__(self):
+		self.ran = []
+		self.held = Event()
+		self.lock = Lock()
+		self.go = Event()
+
+	def release(self):
+		self.go.set()
+
+	def __call__(self, cmd:str, args:list):
+		if cmd == "hold":
+			self.held.set()
+			self.go.wait(WAIT)
+		if cmd == "fail":
+			raise RuntimeError("failed")
+		with self.lock:
+			self.ran.append((cmd,) + tuple(args))
+		return cmd.upper()
+
+class TestExecutor(unittest.TestCase):
+
+	def setUp(self):
+		self.runner = FakeRunner()
+		self.executor = YDICommandExecutor(self.runner)
+
+	def hold(self):
+		hold = self.executor.submit("hold")
+		self.assertTrue(self.runner.held.wait(WAIT))
+		return hold
+
+	def finish(self, *requests):
+		self.runner.release()
+		for request in requests:
+			self.assertTrue(request.done.wait(WAIT))
+
+	def test_call(self):
+		self.assertEqual(self.executor.call("status"), "STATUS")
+		self.assertEqual(self.runner.ran, [("status",)])
+
+	def test_priority_order(self):
+		self.hold()
+		poll = self.executor.submit("status", priority=PRIORITY_POLL)
+		watchdog = self.executor.submit("start", priority=PRIORITY_WATCHDOG)
+		user = self.executor.submit("publish", ["a"], priority=PRIORITY_USER)
+		later = self.executor.submit("publish", ["b"], priority=PRIORITY_USER)
+		self.finish(poll, watchdog, user, later)
+		self.assertEqual(
+			self.runner.ran,
+			[("hold",), ("publish", "a"), ("publish", "b"), ("start",), ("status",)]
+			)
+
+	def test_priority_raise(self):
+		self.hold()
+		poll = self.executor.submit("status", priority=PRIORITY_POLL)
+		publish = self.executor.submit("publish", ["a"], priority=PRIORITY_WATCHDOG)
+		# The same command asked for again shares the waiting request,
+		# which now goes ahead at the higher priority
+		again = self.executor.submit("status", priority=PRIORITY_USER)
+		self.assertIs(again, poll)
+		self.assertEqual(poll.priority, PRIORITY_USER)
+		self.finish(poll, publish)
+		self.assertEqual(self.runner.ran, [("hold",), ("status",), ("publish", "a")])
+
+	def test_priority_not_lowered(self):
+		self.hold()
+		user = self.executor.submit("status", priority=PRIORITY_USER)
+		self.executor.submit("status", priority=PRIORITY_POLL)
+		self.assertEqual(user.priority, PRIORITY_USER)
+		self.finish(user)
+		self.assertEqual(self.runner.ran, [("hold",), ("status",)])
+
+	def test_other_args_not_merged(self):
+		self.hold()
+		a = self.executor.submit("publish", ["a"])
+		b = self.executor.submit("publish", ["b"])
+		self.assertIsNot(a, b)
+		self.finish(a, b)
+		self.assertEqual(len(self.runner.ran), 3)
+
+	def test_start_stop_merge(self):
+		self.hold()
+		start = self.executor.submit("start", priority=PRIORITY_WATCHDOG)
+		stop = self.executor.submit("stop", priority=PRIORITY_USER)
+		# The latest of the two is what runs, once
+		self.assertIs(stop, start)
+		self.finish(stop)
+		self.assertEqual(self.runner.ran, [("hold",), ("stop",)])
+		self.assertEqual(stop.result(), "STOP")
+
+	def test_new_request_once_running(self):
+		hold = self.hold()
+		again = self.executor.submit("hold")
+		# The running one is not waiting any more
+		self.assertIsNot(again, hold)
+		self.finish(hold, again)
+
+	def test_callbacks(self):
+		self.hold()
+		outputs = []
+		request = self.executor.submit("status", callback=outputs.append)
+		self.executor.submit("status", callback=outputs.append)
+		self.finish(request)
+		self.assertEqual(outputs, ["STATUS", "STATUS"])
+
+	def test_error(self):
+		outputs = []
+		request = self.executor.submit("fail", callback=outputs.append)
+		with self.assertRaises(RuntimeError):
+			request.result()
+		self.assertEqual(outputs, [None])
+		# The executor goes on
+		self.assertEqual(self.executor.call("status"), "STATUS")
+
+	def test_failing_callback(self):
+		def fail(output):
+			raise RuntimeError("callback")
+		outputs = []
+		self.hold()
+		request = self.executor.submit("status", callback=fail)
+		self.executor.submit("status", callback=outputs.append)
+		self.finish(request)
+		self.assertEqual(request.result(), "STATUS")
+		self.assertEqual(outputs, ["STATUS"])
+
+	def test_call_from_callback(self):
+		# Runs right away rather than wait for itself
+		outputs = []
+		def then(output):
+			outputs.append(self.executor.call("status"))
+		self.executor.submit("start", callback=then).result()
+		done = self.executor.submit("publish", ["a"])
+		self.assertEqual(done.result(), "PUBLISH")
+		self.assertEqual(outputs, ["STATUS"])
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+
+"""
+	This file is part of Yandex Disk indicator and control (YDI).
+
+	Copyright 2025 Dandelion Systems <dandelion.systems@gmail.com>
+
+	YDI is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	YDI is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. 
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+"""
+
+# YDIQuotaForecast on made up quota samples
+#
+#	python3 -m unittest discover tests
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from yd_cli import YDStatus, SyncState
+from yd_history import YDIHistoryRecord
+from yd_forecast import YDIQuotaForecast, theil_sen
+
+HOUR = 3600
+DAY = 86400
+GB = 1 << 30
+
+LABELS = {"full_in": "Full in about %d days"}
+
+def quota(used:int, total:int=100 * GB):
+	status = YDStatus()
+	status.used_bytes = used
+	status.total_bytes = total
+	return status
+
+class FakeHistory:
+	# Hands out the records given, as YDIHistory.query() would
+	def __init__(self, records:list):
+		self.records = records
+
+	def query(self, since:float=None, until:float=None):
+		return [r for r in self.records if since is None or r.time >= since]
+
+class TestTheilSen(unittest.TestCase):
+
+	def test_line(self):
+		self.assertEqual(theil_sen([(0, 1), (1, 3), (2, 5)]), (2, 1))
+
+	def test_outlier(self):
+		# One odd point does not sway the line
+		(slope, intercept) = theil_sen([(0, 0), (1, 1), (2, 50), (3, 3), (4, 4)])
+		self.assertEqual((slope, intercept), (1, 0))
+
+	def test_no_slope(self):
+		self.assertIsNone(theil_sen([(1, 1), (1, 2)]))
+
+class TestQuotaForecast(unittest.TestCase):
+
+	def grow(self, forecast, start:float, days:int, per_day:int, used:int=10 * GB):
+		# Daily samples of quota used growing by `per_day`
+		for day in range(days):
+			forecast.update(quota(used + day * per_day), now=start + day * DAY)
+		return start + (days - 1) * DAY
+
+	def test_not_enough_samples(self):
+		forecast = YDIQuotaForecast()
+		forecast.update(quota(10 * GB), now=0)
+		forecast.update(quota(11 * GB), now=60)
+		forecast.update(quota(12 * GB), now=120)
+		# Three samples but within a minute
+		self.assertIsNone(forecast.get_eta(120))
+		self.assertEqual(forecast.describe(LABELS, 120), "")
+
+	def test_eta(self):
+		forecast = YDIQuotaForecast()
+		now = self.grow(forecast, 0, 5, GB)
+		# 14 GB used, 86 GB to go at 1 GB a day
+		self.assertAlmostEqual(forecast.get_eta(now), 86 * DAY)
+		self.assertEqual(forecast.describe(LABELS, now), "Full in about 86 days")
+
+	def test_eta_ages(self):
+		forecast = YDIQuotaForecast()
+		now = self.grow(forecast, 0, 5, GB)
+		# No new sample, the forecast counts down
+		self.assertAlmostEqual(forecast.get_eta(now + 10 * DAY), 76 * DAY)
+		self.assertEqual(forecast.get_eta(now + 100 * DAY), 0)
+
+	def test_not_running_out(self):
+		forecast = YDIQuotaForecast()
+		now = self.grow(forecast, 0, 5, -GB, used=50 * GB)
+		self.assertIsNone(forecast.get_eta(now))
+		self.assertIsNone(forecast.get_warning())
+
+	def test_beyond_horizon(self):
+		forecast = YDIQuotaForecast()
+		now = self.grow(forecast, 0, 5, GB // 10)
+		self.assertGreater(forecast.get_eta(now), 365 * DAY)
+		self.assertEqual(forecast.describe(LABELS, now), "")
+
+	def test_days_warning(self):
+		forecast = YDIQuotaForecast({"days": 14})
+		# 10 GB a day leaves 5 days once at 50 GB
+		self.assertFalse(forecast.update(quota(30 * GB), now=0))
+		self.assertFalse(forecast.update(quota(40 * GB), now=DAY))
+		self.assertTrue(forecast.update(quota(50 * GB), now=2 * DAY))
+		self.assertEqual(forecast.get_warning(), "days")
+
+	def test_percent_warning_once(self):
+		forecast = YDIQuotaForecast({"percent": 90})
+		self.assertTrue(forecast.update(quota(95 * GB), now=0))
+		self.assertEqual(forecast.get_warning(), "percent")
+		# Not again while the warning stays
+		self.assertFalse(forecast.update(quota(96 * GB), now=HOUR))
+		# Nor when it comes back within notify_hours
+		self.assertFalse(forecast.update(quota(10 * GB, 1000 * GB), now=2 * HOUR))
+		self.assertIsNone(forecast.get_warning())
+		self.assertFalse(forecast.update(quota(97 * GB), now=3 * HOUR))
+		self.assertEqual(forecast.get_warning(), "percent")
+		# But it does once they have passed
+		forecast.update(quota(10 * GB, 1000 * GB), now=30 * HOUR)
+		self.assertTrue(forecast.update(quota(98 * GB), now=31 * HOUR))
+
+	def test_disabled(self):
+		forecast = YDIQuotaForecast({"enabled": False})
+		self.assertFalse(forecast.update(quota(99 * GB), now=0))
+		self.assertIsNone(forecast.get_warning())
+
+	def test_unknown_quota(self):
+		forecast = YDIQuotaForecast()
+		self.assertFalse(forecast.update(YDStatus(), now=0))
+		self.assertIsNone(forecast.get_eta(0))
+
+	def test_history_seed(self):
+		# Samples from before YDI started make a forecast right away
+		records = [
+			YDIHistoryRecord(day * DAY, SyncState.IDLE, None, None,
+			                 (10 + day) * GB, None, 100 * GB)
+			for day in range(4)
+			]
+		forecast = YDIQuotaForecast(history=FakeHistory(records))
+		forecast.update(quota(14 * GB), now=4 * DAY)
+		self.assertAlmostEqual(forecast.get_eta(4 * DAY), 86 * DAY)
+
+	def test_window(self):
+		forecast = YDIQuotaForecast({"window_days": 3})
+		# Shrinking long ago, growing lately: only the window counts
+		now = self.grow(forecast, 0, 5, -GB, used=50 * GB)
+		now = self.grow(forecast, now + DAY, 4, GB, used=50 * GB)
+		self.assertAlmostEqual(forecast.get_eta(now), 47 * DAY)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+
+"""
+	This file is part of Yandex Disk indicator and control (YDI).
+
+	Copyright 2025 Dandelion Systems <dandelion.systems@gmail.com>
+
+	YDI is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	YDI is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. 
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+"""
+
+# YDIHistory ring buffer in a temporary file
+#
+#	python3 -m unittest discover tests
+
+from tempfile import TemporaryDirectory
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from yd_cli import YDStatus, SyncState
+from yd_history import YDIHistory
+
+def status(state:SyncState, done:int=None, used:int=None):
+	s = YDStatus()
+	s.sync_state = state
+	s.sync_done = done
+	s.sync_total = None if done is None else 1000
+	s.used_bytes = used
+	return s
+
+class TestHistory(unittest.TestCase):
+
+	def setUp(self):
+		self.dir = TemporaryDirectory()
+		self.path = os.path.join(self.dir.name, "history.bin")
+		self.history = YDIHistory(self.path, capacity=4)
+
+	def tearDown(self):
+		self.history.close()
+		self.dir.cleanup()
+
+	def test_record(self):
+		self.assertTrue(self.history.record(status(SyncState.BUSY, 100, 5), now=10))
+		# Nothing new, nothing added
+		self.assertFalse(self.history.record(status(SyncState.BUSY, 100, 5), now=11))
+		records = self.history.query()
+		self.assertEqual(len(records), 1)
+		self.assertEqual(records[0].time, 10)
+		self.assertEqual(records[0].sync_state, SyncState.BUSY)
+		self.assertEqual((records[0].sync_done, records[0].sync_total), (100, 1000))
+		self.assertEqual(records[0].used, 5)
+		# Unknown sizes come back unknown
+		self.assertIsNone(records[0].available)
+
+	def test_wraparound(self):
+		for i in range(7):
+			self.history.record(status(SyncState.BUSY, i * 10), now=100 + i)
+		records = self.history.query()
+		self.assertEqual(len(self.history), 4)
+		# The oldest have gone, the times of the rest are kept
+		self.assertEqual([r.time for r in records], [103, 104, 105, 106])
+		self.assertEqual([r.sync_done for r in records], [30, 40, 50, 60])
+
+	def test_reopen_after_wraparound(self):
+		for i in range(6):
+			self.history.record(status(SyncState.BUSY, i * 10), now=100 + i)
+		self.history.close()
+		self.history = YDIHistory(self.path, capacity=4)
+		self.assertEqual([r.time for r in self.history.query()], [102, 103, 104, 105])
+		# The newest record is remembered, so a repeat is not added
+		self.assertFalse(self.history.record(status(SyncState.BUSY, 50), now=106))
+		self.history.record(status(SyncState.IDLE), now=107)
+		self.assertEqual([r.time for r in self.history.query()], [103, 104, 105, 107])
+
+	def test_idle_squeezed(self):
+		self.history.record(status(SyncState.BUSY, 10, 1), now=1)
+		for i in range(5):
+			self.history.record(status(SyncState.IDLE, used=2 + i), now=2 + i)
+		records = self.history.query()
+		# The first and the latest record of the idle stretch
+		self.assertEqual([r.time for r in records], [1, 2, 6])
+		self.assertEqual([r.used for r in records], [1, 2, 6])
+
+	def test_query_range(self):
+		for i in range(4):
+			self.history.record(status(SyncState.BUSY, i), now=10 * i)
+		self.assertEqual([r.time for r in self.history.query(10, 30)], [10, 20])
+		self.assertEqual([r.time for r in self.history.query(since=15)], [20, 30])
+		self.assertEqual([r.time for r in self.history.query(until=10)], [0])
+
+	def test_other_capacity(self):
+		self.history.record(status(SyncState.BUSY, 1), now=1)
+		self.history.close()
+		# A file of another capacity cannot be read and starts over
+		self.history = YDIHistory(self.path, capacity=8)
+		self.assertEqual(len(self.history), 0)
+
+if __name__ == "__main__":
+	unittest.main()
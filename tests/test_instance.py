@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+
+"""
+	This file is part of Yandex Disk indicator and control (YDI).
+
+	Copyright 2025 Dandelion Systems <dandelion.systems@gmail.com>
+
+	YDI is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	YDI is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. 
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+"""
+
+# Single YDI instance: the lock, the command socket and forwarding
+# to it, in a temporary folder
+#
+#	python3 -m unittest discover tests
+
+from tempfile import TemporaryDirectory
+import socket
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from yd_cli import parse_status
+from yd_instance import YDIInstance, parse_command, status_record, forward
+
+class TestParseCommand(unittest.TestCase):
+
+	def test_none(self):
+		self.assertIsNone(parse_command([]))
+		self.assertIsNone(parse_command(["--debug"]))
+
+	def test_commands(self):
+		self.assertEqual(
+			parse_command(["--stop"]),
+			{"command": "stop", "json": False, "account": None}
+			)
+		self.assertEqual(
+			parse_command(["--status", "--json", "--account", "2"]),
+			{"command": "status", "json": True, "account": 2}
+			)
+		self.assertEqual(parse_command(["--open-menu"])["command"], "open_menu")
+
+	def test_invalid(self):
+		for args in [
+			["--start", "--stop"],
+			["--start", "--account"],
+			["--start", "--account", "two"],
+			["--json"],
+			["--account", "1"]
+		]:
+			with self.assertRaises(ValueError, msg=args):
+				parse_command(args)
+
+class TestStatusRecord(unittest.TestCase):
+
+	def test_record(self):
+		record = status_record(parse_status(
+			"Synchronization core status: idle\n"
+			"\tTotal: 10 GB\n"
+			"\tfile: 'a.txt'\n"
+			))
+		self.assertEqual(record["sync_state"], "idle")
+		self.assertEqual(record["total_bytes"], 10 << 30)
+		self.assertEqual(record["lastfiles"], ["a.txt"])
+		# Plain values all the way down
+		json.dumps(record)
+
+	def test_stopped(self):
+		self.assertEqual(status_record(parse_status(""))["sync_state"], "stopped")
+
+class TestInstance(unittest.TestCase):
+
+	def setUp(self):
+		self.dir = TemporaryDirectory()
+		self.instance = YDIInstance(self.dir.name)
+		self.requests = []
+
+	def tearDown(self):
+		self.instance.close()
+		self.dir.cleanup()
+
+	def on_command(self, request:dict):
+		self.requests.append(request)
+		if request["command"] == "stop":
+			raise RuntimeError("no daemon")
+		return {"output": "%s done" % request["command"], "status": 0}
+
+	def serve(self):
+		self.assertTrue(self.instance.acquire())
+		self.instance.serve(self.on_command)
+
+	def forward(self, request:dict):
+		return forward(request, self.instance.get_socket_path(), timeout=5)
+
+	def test_one_instance(self):
+		self.assertTrue(self.instance.acquire())
+		# Still ours when asked again
+		self.assertTrue(self.instance.acquire())
+		other = YDIInstance(self.dir.name)
+		self.assertFalse(other.acquire())
+		self.instance.close()
+		self.assertTrue(other.acquire())
+		other.close()
+
+	def test_forward(self):
+		self.serve()
+		request = parse_command(["--start", "--account", "1"])
+		self.assertEqual(self.forward(request), {"output": "start done", "status": 0})
+		self.assertEqual(self.requests, [request])
+
+	def test_unknown_command(self):
+		self.serve()
+		self.assertEqual(self.forward({"command": "rm"})["status"], 2)
+		self.assertEqual(self.requests, [])
+
+	def test_failing_command(self):
+		self.serve()
+		reply = self.forward(parse_command(["--stop"]))
+		self.assertEqual(reply, {"output": "Failed: no daemon", "status": 2})
+		# Still listening
+		self.assertEqual(self.forward(parse_command(["--status"]))["status"], 0)
+
+	def test_junk(self):
+		self.serve()
+		with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+			s.settimeout(5)
+			s.connect(self.instance.get_socket_path())
+			s.sendall(b"not json\n")
+			# Hung up on without a reply
+			self.assertEqual(s.recv(1024), b"")
+		self.assertEqual(self.forward(parse_command(["--status"]))["status"], 0)
+
+	def test_stale_socket(self):
+		# Left by a YDI that has crashed
+		open(self.instance.get_socket_path(), "w").close()
+		self.serve()
+		self.assertEqual(self.forward(parse_command(["--status"]))["status"], 0)
+
+	def test_nobody_listening(self):
+		with self.assertRaises(OSError):
+			self.forward(parse_command(["--status"]))
+		self.instance.acquire()
+		self.instance.serve(self.on_command)
+		self.instance.close()
+		with self.assertRaises(OSError):
+			self.forward(parse_command(["--status"]))
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+
+"""
+	This file is part of Yandex Disk indicator and control (YDI).
+
+	Copyright 2025 Dandelion Systems <dandelion.systems@gmail.com>
+
+	YDI is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	YDI is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. 
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+"""
+
+# YDIMonitor and YDIScheduler, no Gtk and no yandex-disk needed
+#
+#	python3 -m unittest discover tests
+
+from threading import Event
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from yd_cli import YDStatus
+from yd_monitor import YDIMonitor, YDIScheduler, SCHEDULER_PROFILES
+from yd_snapshot import SYNC_STATES, NOT_RUNNING, SNAPSHOT_LABELS
+
+# Seconds to wait for the updater thread
+TIMEOUT = 5
+
+class FakeDisk:
+	# What YDIMonitor and YDStatusWatcher use of a YandexDisk. There
+	# is no Yandex Disk folder, so every update runs `status`, which
+	# moves on to the next of `statuses` and stays at the last one
+	def __init__(self, statuses:list):
+		self.statuses = statuses
+		self.status = YDStatus()
+
+	def command(self, cmd:str, args:list=[], priority:int=0):
+		if cmd == "status":
+			self.status = self.statuses.pop(0) if len(self.statuses) > 1 else self.statuses[0]
+		return ""
+
+	def get_status(self):
+		return self.status
+
+	def get_sync_status(self):
+		return self.status.sync_status
+
+	def get_options(self):
+		return []
+
+	def get_yd_path(self):
+		return ""
+
+	def get_status_calls(self):
+		return (0, 0.0)
+
+def labels():
+	return {key: key for key in list(SYNC_STATES) + [NOT_RUNNING] + SNAPSHOT_LABELS}
+
+class TestMonitor(unittest.TestCase):
+
+	def test_status_off_snapshot(self):
+		# A change the menu does not show still reaches on_status
+		idle = YDStatus().with_sync_status("idle")
+		failed = idle.with_sync_status("idle")
+		failed.error = "access denied"
+		disk = FakeDisk([idle, failed])
+
+		changes = []
+		statuses = []
+		seen = Event()
+		def on_status(n:int, status:YDStatus):
+			statuses.append(status)
+			if status.error != "":
+				seen.set()
+
+		monitor = YDIMonitor(
+			[disk], SCHEDULER_PROFILES["high"], labels(), 
+			lambda n, c: changes.append(c), on_status=on_status
+			)
+		monitor.monitor()
+		try:
+			self.assertTrue(seen.wait(TIMEOUT))
+		finally:
+			monitor.close()
+
+		self.assertIs(statuses[0], idle)
+		self.assertIn(failed, statuses)
+		# The menu only got the first snapshot
+		self.assertEqual(len(changes), 1)
+
+class TestScheduler(unittest.TestCase):
+
+	def setUp(self):
+		self.profile = SCHEDULER_PROFILES["medium"]
+		self.scheduler = YDIScheduler(self.profile)
+
+	def test_backoff(self):
+		self.assertEqual(self.scheduler.next_interval("idle", True), self.profile["idle"])
+		interval = self.profile["idle"]
+		for i in range(10):
+			interval = min(interval * self.profile["backoff"], self.profile["ceiling"])
+			self.assertEqual(self.scheduler.next_interval("idle", False), interval)
+		self.assertEqual(interval, self.profile["ceiling"])
+
+	def test_change_drops_backoff(self):
+		for i in range(5):
+			self.scheduler.next_interval("idle", False)
+		self.assertEqual(self.scheduler.next_interval("idle", True), self.profile["idle"])
+		for i in range(5):
+			self.scheduler.next_interval("idle", False)
+		self.assertEqual(self.scheduler.next_interval("paused", False), self.profile["paused"])
+
+	def test_active_states_stay_tight(self):
+		for state in ["busy", "index"]:
+			for i in range(5):
+				self.assertEqual(self.scheduler.next_interval(state, False), self.profile[state])
+
+	def test_polling_does_not_back_off(self):
+		for i in range(10):
+			interval = self.scheduler.next_interval("idle", False, polling=True)
+		self.assertEqual(interval, min(self.profile["idle"], self.profile["poll"]))
+
+	def test_reset(self):
+		for i in range(5):
+			self.scheduler.next_interval("idle", False)
+		self.scheduler.reset()
+		self.assertEqual(self.scheduler.get_interval(), self.profile["idle"])
+
+	def test_most_active(self):
+		self.assertEqual(self.scheduler.most_active(["idle", "busy", ""]), "busy")
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+
+"""
+	This file is part of Yandex Disk indicator and control (YDI).
+
+	Copyright 2025 Dandelion Systems <dandelion.systems@gmail.com>
+
+	YDI is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	YDI is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. 
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+"""
+
+# parse_status() and YDStatus records, and YandexDisk.load_status()
+# with the fake yandex-disk of bench/ on the PATH
+#
+#	python3 -m unittest discover tests
+
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from yd_cli import (
+	YandexDisk, YDStatus, SyncState, parse_status, parse_size, parse_publish
+	)
+
+FAKE_YD = os.path.join(ROOT, "bench", "fake_yd")
+
+REPORT = """Synchronization core status: busy
+Sync progress: 1.50 MB/ 15.75 MB (9 %)
+Path to Yandex.Disk directory: '/home/user/Yandex.Disk'
+	Total: 10 GB
+	Used: 2.5 GB
+	Available: 7.5 GB
+	Max file size: 50 GB
+	Trash size: 0 B
+
+Last synchronized items:
+	file: 'Documents/a: b.txt'
+	file: 'Documents/c.txt'
+	directory: 'Documents'
+"""
+
+class TestParseStatus(unittest.TestCase):
+
+	def test_report(self):
+		status = parse_status(REPORT)
+		self.assertEqual(status.sync_status, "busy")
+		self.assertEqual(status.sync_state, SyncState.BUSY)
+		self.assertEqual(status.path, "/home/user/Yandex.Disk")
+		self.assertEqual(status.total, "10 GB")
+		self.assertEqual(status.total_bytes, 10 << 30)
+		self.assertEqual(status.used_bytes, int(2.5 * (1 << 30)))
+		self.assertEqual(status.available_bytes, int(7.5 * (1 << 30)))
+		self.assertEqual(status.maxfile_bytes, 50 << 30)
+		self.assertEqual(status.trash_bytes, 0)
+		# Only the first colon splits, names may have more
+		self.assertEqual(status.lastfiles, ("Documents/a: b.txt", "Documents/c.txt"))
+		self.assertEqual(status.lastdirs, ("Documents",))
+		self.assertEqual(status.error, "")
+
+	def test_progress(self):
+		status = parse_status(REPORT)
+		self.assertEqual(status.sync_prog, "1.50 MB/ 15.75 MB (9 %)")
+		self.assertEqual(status.sync_done, int(1.5 * (1 << 20)))
+		self.assertEqual(status.sync_total, int(15.75 * (1 << 20)))
+		self.assertEqual(status.sync_percent, 9)
+		# The per cent is not always there
+		status = parse_status("Synchronization core status: busy\nSync progress: 1 KB/ 2 KB\n")
+		self.assertEqual((status.sync_done, status.sync_total), (1 << 10, 2 << 10))
+		self.assertIsNone(status.sync_percent)
+
+	def test_states(self):
+		for (text, state) in [
+			("idle", SyncState.IDLE),
+			("index", SyncState.INDEX),
+			("paused", SyncState.PAUSED),
+			("error", SyncState.ERROR),
+			("no internet access", SyncState.OTHER)
+		]:
+			status = parse_status("Synchronization core status: %s\n" % text)
+			self.assertEqual(status.sync_state, state, text)
+			self.assertEqual(status.sync_status, text)
+
+	def test_stopped(self):
+		status = parse_status("Error: daemon not started\n")
+		self.assertEqual(status.sync_state, SyncState.STOPPED)
+		self.assertEqual(status.error, "daemon not started")
+		self.assertEqual(status.lastfiles, ())
+		self.assertIsNone(status.total_bytes)
+		self.assertIsNone(status.sync_done)
+
+	def test_unknown_sizes(self):
+		status = parse_status("Synchronization core status: idle\n\tTotal: lots\n\tUsed: 3 PB\n")
+		self.assertEqual(status.total, "lots")
+		self.assertIsNone(status.total_bytes)
+		self.assertIsNone(status.used_bytes)
+
+	def test_parse_size(self):
+		self.assertEqual(parse_size("12 B"), 12)
+		self.assertEqual(parse_size("1.5 KB"), 1536)
+		self.assertEqual(parse_size("2 TB"), 2 << 40)
+		self.assertIsNone(parse_size("GB"))
+		self.assertIsNone(parse_size(""))
+
+	def test_with_sync_status(self):
+		status = parse_status(REPORT)
+		idle = status.with_sync_status("idle")
+		self.assertEqual(idle.sync_state, SyncState.IDLE)
+		self.assertEqual(idle.total_bytes, status.total_bytes)
+		self.assertEqual(idle.lastfiles, status.lastfiles)
+		# Records are never changed, a new one is made
+		self.assertEqual(status.sync_state, SyncState.BUSY)
+		self.assertEqual(YDStatus().with_sync_status("offline").sync_state, SyncState.OTHER)
+
+class TestParsePublish(unittest.TestCase):
+
+	def test_link(self):
+		result = parse_publish("a.txt", "https://yadi.sk/i/abc\n")
+		self.assertEqual((result.link, result.error), ("https://yadi.sk/i/abc", ""))
+
+	def test_error(self):
+		result = parse_publish("a.txt", "Error: file not found\n")
+		self.assertEqual((result.link, result.error), ("", "Error: file not found"))
+
+	def test_unpublish(self):
+		self.assertEqual(parse_publish("a.txt", "", unpublish=True).error, "")
+
+class TestLoadStatus(unittest.TestCase):
+
+	def setUp(self):
+		self.path = os.environ.get("PATH", "")
+		os.environ["PATH"] = FAKE_YD + os.pathsep + self.path
+		self.disk = YandexDisk()
+
+	def tearDown(self):
+		os.environ["PATH"] = self.path
+
+	def test_full_report(self):
+		self.assertTrue(self.disk.load_status(REPORT))
+		self.assertEqual(self.disk.get_status().sync_state, SyncState.BUSY)
+		self.assertEqual(self.disk.get_yd_lastdirs(), ("Documents",))
+
+	def test_state_only(self):
+		self.disk.load_status(REPORT)
+		before = self.disk.get_status()
+		self.assertFalse(self.disk.load_status("idle\n"))
+		status = self.disk.get_status()
+		self.assertIsNot(status, before)
+		self.assertEqual(status.sync_state, SyncState.IDLE)
+		# The rest of the report stays, the progress does not
+		self.assertEqual(status.used_bytes, before.used_bytes)
+		self.assertEqual(status.sync_prog, "")
+		self.assertIsNone(status.sync_done)
+
+	def test_same_state(self):
+		self.disk.load_status(REPORT)
+		before = self.disk.get_status()
+		# Nothing new, no new record
+		self.disk.load_status("busy\n")
+		self.assertIs(self.disk.get_status(), before)
+
+	def test_state_of_several_words(self):
+		self.disk.load_status("no internet access\n")
+		self.assertEqual(self.disk.get_sync_status(), "no internet access")
+		self.assertEqual(self.disk.get_status().sync_state, SyncState.OTHER)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+"""
+	This file is part of Yandex Disk indicator and control (YDI).
+
+	Copyright 2025 Dandelion Systems <dandelion.systems@gmail.com>
+
+	YDI is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	YDI is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. 
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+"""
+
+# YDISyncedIndex
+#
+#	python3 -m unittest discover tests
+
+from tempfile import TemporaryDirectory
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from yd_synced import YDISyncedIndex, SYNCED_FILE_KIND, SYNCED_DIR_KIND
+
+class TestSyncedIndex(unittest.TestCase):
+
+	def setUp(self):
+		self.dir = TemporaryDirectory()
+		self.path = os.path.join(self.dir.name, "synced.json")
+		self.index = YDISyncedIndex(self.path, capacity=5)
+
+	def tearDown(self):
+		self.dir.cleanup()
+
+	def paths(self, query:str):
+		return [item.path for item in self.index.search(query)]
+
+	def test_names_first(self):
+		self.index.record(["Docs/report.txt", "Work/old-report.txt"], [], now=1)
+		self.index.record(["Reports/plan.txt"], [], now=2)
+		# Names starting with the query, then paths with it anywhere
+		self.assertEqual(
+			self.paths("rep"), 
+			["Docs/report.txt", "Reports/plan.txt", "Work/old-report.txt"]
+			)
+
+	def test_case_insensitive(self):
+		self.index.record(["Photos/Summer.JPG"], [], now=1)
+		self.assertEqual(self.paths("summer.jpg"), ["Photos/Summer.JPG"])
+
+	def test_name_beyond_bmp(self):
+		# A name going on with a character outside the Basic
+		# Multilingual Plane still counts as starting with the query
+		self.index.record(["doc\U0001F600.txt"], [], now=1)
+		self.index.record(["x/mydoc.txt"], [], now=2)
+		self.assertEqual(self.paths("doc"), ["doc\U0001F600.txt", "x/mydoc.txt"])
+
+	def test_most_recent_first(self):
+		self.index.record(["a.txt", "b.txt"], [], now=1)
+		self.index.record(["b.txt", "c.txt"], [], now=2)
+		items = {item.path: item for item in self.index.search("")}
+		self.assertEqual(list(items), ["b.txt", "c.txt", "a.txt"])
+		self.assertEqual((items["b.txt"].first_seen, items["b.txt"].last_seen), (1, 2))
+
+	def test_capacity(self):
+		self.index.record(["%d.txt" % i for i in range(8)], [], now=1)
+		self.assertEqual(len(self.index), 5)
+		# The list comes newest first, so the oldest have gone
+		self.assertEqual(sorted(self.paths(".txt")), ["%d.txt" % i for i in range(5)])
+
+	def test_kinds(self):
+		self.index.record(["Music/song.mp3"], ["Music"], now=1)
+		kinds = {item.path: item.kind for item in self.index.search("music")}
+		self.assertEqual(kinds, {"Music/song.mp3": SYNCED_FILE_KIND, "Music": SYNCED_DIR_KIND})
+
+	def test_close_saves(self):
+		# record() saves only now and then, close() saves the rest
+		self.index.record(["a.txt"], [], now=1)
+		self.index.close()
+		self.assertEqual([item.path for item in YDISyncedIndex(self.path).search("")], ["a.txt"])
+
+	def test_flush(self):
+		self.index.record(["a.txt"], [], now=1)
+		self.index.flush()
+		self.index.record(["b.txt"], [], now=2)
+		self.assertEqual([item.path for item in YDISyncedIndex(self.path).search("")], ["a.txt"])
+		self.index.flush()
+		self.assertEqual(len(YDISyncedIndex(self.path)), 2)
+
+if __name__ == "__main__":
+	unittest.main()
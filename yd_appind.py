@@ -20,6 +20,7 @@ from gi import require_version
 
 require_version("Gtk", "3.0")
 from gi.repository import Gtk
+from gi.repository import Gdk
 from gi.repository import GLib
 
 try:
@@ -29,17 +30,27 @@ except Exception:
 	require_version("AyatanaAppIndicator3", "0.1")
 	from gi.repository import AyatanaAppIndicator3 as AppIndicator
 
-from subprocess import run
-from threading import Thread
-from time import sleep
-from shutil import which
-from subprocess import check_output, getoutput, CalledProcessError
 import os
 import json
+import copy
+from sys import stderr
 import locale
 import gettext
+from threading import Thread, Event
+from time import strftime, localtime, monotonic
 
-from yd_cli import YandexDisk, NoYDCLI
+from yd_cli import YandexDisk, AsyncYandexDisk, YDStatus, NoYDCLI
+from yd_cli import Inotify, IN_CLOSE_WRITE, IN_MOVED_TO
+from yd_monitor import YDIMonitor, SCHEDULER_PROFILES
+from yd_snapshot import worst_icon, ICON_SEVERITY
+from yd_metrics import metrics
+from yd_events import events, EVENT_LEVELS, EVENT_OFF, EVENT_INFO, EVENT_WARNING, EVENT_ERROR
+from yd_events import EVENTS_FILE_MAX_BYTES, EVENTS_FILE_BACKUPS
+
+# The watchdog, the quota forecast and explorer, the synced items
+# index, the history, D-Bus, the exporter, the single instance and
+# the file manager launcher are imported where they are first used,
+# to keep them off the way of the icon showing up
 
 
 # Translation -----------------------------------------------
@@ -61,60 +72,16 @@ _ = lang.gettext # This is not necessary as lang.install() gets `_` defined,
                  # but vscode complains much too much w/o this line :-)
 
 
-# Debug helper logger ---------------------------------------
-#
-def log(msg:str, do:bool=False):
-	if do:
-		from datetime import datetime
-		now = datetime.now()
-		print(now.strftime("%H:%M:%S"), ": ", msg)
-
-
-# PID file management ---------------------------------------
+# Single instance -------------------------------------------
 #
 APPINDICATOR_ID = "com.dandelion-systems.yandexdisk"
-PID_PATH = "/tmp/" + APPINDICATOR_ID
-PID_FILE = PID_PATH + "/ydi.pid"
 
-def create_pid_file():	
-	open_flags = (os.O_CREAT | os.O_EXCL | os.O_WRONLY)
-	open_mode = 0o644
-	pidfile_fd = os.open(PID_FILE, open_flags, open_mode)
-	pidfile = os.fdopen(pidfile_fd, "w")
-	pidfile.write("%s\n" % os.getpid())
-	pidfile.close()
+# Where `kill -USR1` on YDI writes the timings collected, in the 
+# folder of the instance lock, see yd_instance
+DIAGNOSTICS_FILE = "ydi-diagnostics.txt"
 
-def remove_pid_file():
-	os.remove(PID_FILE)
-
-def is_unique():
-	try:
-		# No directory
-		if not os.path.exists(PID_PATH):
-			os.mkdir(PID_PATH)
-			
-		# No PID file
-		if not os.path.exists(PID_FILE):
-			create_pid_file()
-		
-		# PID file exists, check if the process is still alive
-		else:
-			try:
-				check_output(["pgrep", "-F", PID_FILE])
-				# Exception has not occured, zero pgrep return code, 
-				# that is, another ydi process is alive
-				return False
-			except CalledProcessError: 
-				# Non-zero return code means this is a stale PID file,
-				# recreate it with our PID
-				remove_pid_file()
-				create_pid_file()
-
-		# Sure we are the unique ydi instance
-		return True
-	
-	except: # OSError and others
-		return False
+# Latest events shown by Diagnostics > Show events
+EVENTS_SHOWN = 40
 
 # This exception is thrown if we try and launch a second
 # instance of ydi
@@ -131,22 +98,69 @@ class YDINotUnique(Exception):
 class YDInvalidSettings(Exception):
 	pass
 
+# Settings file format version. Newer versions only add entries, 
+# so older files are read as they are, entries unknown to this 
+# version are kept as they are as well
+SETTINGS_VERSION = 2
+
+# Changes are written this many milliseconds after the last one
+SETTINGS_SAVE_DELAY = 500
+
+# Timeouts in seconds, "command" for any yandex-disk command
+# and "publish" for publishing one file or folder
+TIMEOUT_DEFAULTS = {
+	"command": 300,
+	"publish": 60
+}
+
 class YDISettings:
 
 	__sfile = ""
 
+	# Defaults, every instance gets its own copy
 	__settings = {
+		"version": SETTINGS_VERSION,
 		"icon_theme": "themed",
-		"frequency": "power_saver"
+		"frequency": "power_saver",
+		"profiles": {},
+		"watchdog": {},
+		"accounts": [],
+		"timeouts": {},
+		"diagnostics": False,
+		"exporter": {},
+		"events": {},
+		"quota_alert": {}
 	}
 
 	__valid_icon_theme = ["themed", "white", "black"]
 
-	__valid_frequency = ["power_saver", "medium", "high"]
+	__valid_frequency = list(SCHEDULER_PROFILES)
+
+	# GLib source of the pending write, 0 if there is none
+	__save_source = 0
 
-	def __init__(self, sfile:str):
+	# (inode, mtime, size) of the file as we have last written it,
+	# to tell our own writes from those of others
+	__written = None
+
+	# Watches the settings file for changes made by others
+	__inotify = None
+	__watch_source = 0
+	__on_changed = None
+
+	# True while the file holds settings we could not take. It is 
+	# left for the user to fix rather than written over
+	__invalid = False
+
+	def __init__(self, sfile:str, read:bool=True):
+		# With `read` False the defaults are taken and the file is 
+		# not written until it reads back valid, see watch()
 		self.__sfile = sfile
-		self.read_settings()
+		self.__settings = copy.deepcopy(self.__settings)
+		if read:
+			self.read_settings()
+		else:
+			self.__invalid = True
 
 	def get_settings(self):
 		return self.__settings
@@ -156,60 +170,345 @@ class YDISettings:
 	
 	def get_frequency(self):
 		return self.__settings["frequency"]
+
+	def get_scheduler_profile(self):
+		# The profile selected by the "frequency" setting with 
+		# user overrides applied
+		frequency = self.__settings["frequency"]
+		profile = dict(SCHEDULER_PROFILES[frequency])
+		profile.update(self.__settings["profiles"].get(frequency, {}))
+		return profile
+
+	def get_watchdog_config(self):
+		from yd_watchdog import WATCHDOG_DEFAULTS
+		config = dict(WATCHDOG_DEFAULTS)
+		config.update(self.__settings["watchdog"])
+		return config
+
+	def get_accounts(self):
+		# yandex-disk instances to monitor, each a dict with a "name"
+		# and optional "config" and "dir" yandex-disk options. Empty
+		# for the default instance only
+		return self.__settings["accounts"]
+
+	def get_timeout(self, what:str):
+		# One of TIMEOUT_DEFAULTS in seconds
+		return self.__settings["timeouts"].get(what, TIMEOUT_DEFAULTS[what])
 	
+	def get_exporter_config(self):
+		# Optional "textfile" path and localhost HTTP "port" to
+		# export the status to monitoring systems, see yd_exporter
+		return self.__settings["exporter"]
+
+	def get_events_config(self):
+		# Event log "level", one of EVENT_LEVELS, and an optional 
+		# "file" with its "max_bytes" and "backups", see yd_events
+		return self.__settings["events"]
+
+	def get_diagnostics(self):
+		# Whether to collect timings, see yd_metrics
+		return self.__settings["diagnostics"]
+
+	def get_quota_alert_config(self):
+		from yd_forecast import QUOTA_ALERT_DEFAULTS
+		config = dict(QUOTA_ALERT_DEFAULTS)
+		config.update(self.__settings["quota_alert"])
+		return config
+
 	def set_icon_theme(self, icon_theme:str):
+		# Returns True if the setting has changed. It is saved a 
+		# moment later together with whatever else changes by then
 		if icon_theme not in self.__valid_icon_theme:
 			raise YDInvalidSettings
+		if icon_theme == self.__settings["icon_theme"]:
+			return False
 		self.__settings["icon_theme"] = icon_theme
-		self.save_settings()
+		self.__save_later()
+		return True
 	
 	def set_frequency(self, frequency:str):
 		if frequency not in self.__valid_frequency:
 			raise YDInvalidSettings
+		if frequency == self.__settings["frequency"]:
+			return False
 		self.__settings["frequency"] = frequency
-		self.save_settings()
+		self.__save_later()
+		return True
+
+	def set_diagnostics(self, diagnostics:bool):
+		if diagnostics == self.__settings["diagnostics"]:
+			return False
+		self.__settings["diagnostics"] = diagnostics
+		self.__save_later()
+		return True
 
 	def read_settings(self):
 		# If the settings file cannot be read we sasify ourselves
 		# with the defaults in self.__settings. This is the case 
-		# of fresh installation for instance
+		# of fresh installation for instance. Nothing changes if
+		# the file turns out to be invalid
 		try:
 			with open(self.__sfile, "r") as s:
 				settings = json.load(s)
 		except OSError:
 			return
+		except ValueError:
+			raise YDInvalidSettings
 
 		if type(settings) is not dict:
 			raise YDInvalidSettings
+
+		# Entries of newer versions are kept for them, so are
+		# the defaults for entries of this version missing there
+		new_settings = copy.deepcopy(self.__settings)
+		new_settings.update(settings)
+		version = settings.get("version", 1)
+		if type(version) is not int:
+			raise YDInvalidSettings
+		new_settings["version"] = max(version, SETTINGS_VERSION)
 		
 		if "icon_theme" not in settings or "frequency" not in settings:
 			raise YDInvalidSettings
 		
 		if settings["icon_theme"] in self.__valid_icon_theme:
-			self.__settings["icon_theme"] = settings["icon_theme"]
+			new_settings["icon_theme"] = settings["icon_theme"]
 		else:
 			raise YDInvalidSettings
 		
 		if settings["frequency"] in self.__valid_frequency:
-			self.__settings["frequency"] = settings["frequency"]
+			new_settings["frequency"] = settings["frequency"]
 		else:
 			raise YDInvalidSettings
+
+		# Profile overrides are optional for the sake of older 
+		# settings files
+		profiles = settings.get("profiles", {})
+		if type(profiles) is not dict:
+			raise YDInvalidSettings
+		for (name, overrides) in profiles.items():
+			if name not in SCHEDULER_PROFILES or type(overrides) is not dict:
+				raise YDInvalidSettings
+			for (key, value) in overrides.items():
+				if key not in SCHEDULER_PROFILES[name]:
+					raise YDInvalidSettings
+				if type(value) not in [int, float] or value <= 0:
+					raise YDInvalidSettings
+				if key == "backoff" and value < 1:
+					raise YDInvalidSettings
+		new_settings["profiles"] = profiles
+
+		# So are the watchdog tunables
+		watchdog = settings.get("watchdog", {})
+		if type(watchdog) is not dict:
+			raise YDInvalidSettings
+		if watchdog != {}:
+			from yd_watchdog import WATCHDOG_DEFAULTS
+		for (key, value) in watchdog.items():
+			if key not in WATCHDOG_DEFAULTS:
+				raise YDInvalidSettings
+			if key == "enabled":
+				if type(value) is not bool:
+					raise YDInvalidSettings
+			elif type(value) not in [int, float] or value <= 0:
+				raise YDInvalidSettings
+		new_settings["watchdog"] = watchdog
+
+		# And so are the accounts
+		accounts = settings.get("accounts", [])
+		if type(accounts) is not list:
+			raise YDInvalidSettings
+		for account in accounts:
+			if type(account) is not dict or type(account.get("name")) is not str:
+				raise YDInvalidSettings
+			for (key, value) in account.items():
+				if key not in ["name", "config", "dir"] or type(value) is not str:
+					raise YDInvalidSettings
+		new_settings["accounts"] = accounts
+
+		# And so are the timeouts
+		timeouts = settings.get("timeouts", {})
+		if type(timeouts) is not dict:
+			raise YDInvalidSettings
+		for (key, value) in timeouts.items():
+			if key not in TIMEOUT_DEFAULTS:
+				raise YDInvalidSettings
+			if type(value) not in [int, float] or value <= 0:
+				raise YDInvalidSettings
+		new_settings["timeouts"] = timeouts
+
+		# And so is collecting timings
+		diagnostics = settings.get("diagnostics", False)
+		if type(diagnostics) is not bool:
+			raise YDInvalidSettings
+		new_settings["diagnostics"] = diagnostics
+
+		# And so is the exporter
+		exporter = settings.get("exporter", {})
+		if type(exporter) is not dict:
+			raise YDInvalidSettings
+		for (key, value) in exporter.items():
+			match key:
+				case "textfile":
+					if type(value) is not str or value == "":
+						raise YDInvalidSettings
+				case "port":
+					if type(value) is not int or not 0 < value < 65536:
+						raise YDInvalidSettings
+				case _:
+					raise YDInvalidSettings
+		new_settings["exporter"] = exporter
+
+		# And so is the event log
+		events_config = settings.get("events", {})
+		if type(events_config) is not dict:
+			raise YDInvalidSettings
+		for (key, value) in events_config.items():
+			match key:
+				case "level":
+					if value not in EVENT_LEVELS:
+						raise YDInvalidSettings
+				case "file":
+					if type(value) is not str or value == "":
+						raise YDInvalidSettings
+				case ("max_bytes" | "backups"):
+					if type(value) is not int or value < 0:
+						raise YDInvalidSettings
+				case _:
+					raise YDInvalidSettings
+		new_settings["events"] = events_config
+
+		# And so are the quota alert tunables
+		quota_alert = settings.get("quota_alert", {})
+		if type(quota_alert) is not dict:
+			raise YDInvalidSettings
+		if quota_alert != {}:
+			from yd_forecast import QUOTA_ALERT_DEFAULTS
+		for (key, value) in quota_alert.items():
+			if key not in QUOTA_ALERT_DEFAULTS:
+				raise YDInvalidSettings
+			if key == "enabled":
+				if type(value) is not bool:
+					raise YDInvalidSettings
+			elif type(value) not in [int, float] or value <= 0:
+				raise YDInvalidSettings
+		new_settings["quota_alert"] = quota_alert
+
+		self.__settings = new_settings
 		
 	def save_settings(self):
-		# If settings cannot be saved (corrupt directory tree?),
-		# it is not a big deal, so just return silently
+		# Write the settings right away. They go to a temporary file 
+		# first, which then takes the place of the old one, so that
+		# the file is never seen half written. If settings cannot be 
+		# saved (corrupt directory tree?), it is not a big deal, so 
+		# just return silently
+		if self.__save_source != 0:
+			GLib.source_remove(self.__save_source)
+			self.__save_source = 0
+		if self.__invalid:
+			return
+
+		tmp = self.__sfile + ".tmp"
 		try:
-			with open(self.__sfile, "w") as s:
-				settings = json.dump(self.__settings, s)
+			with open(tmp, "w") as s:
+				json.dump(self.__settings, s)
+				s.flush()
+				os.fsync(s.fileno())
+			os.replace(tmp, self.__sfile)
+			st = os.stat(self.__sfile)
+			self.__written = (st.st_ino, st.st_mtime_ns, st.st_size)
 		except OSError:
 			return
 
+	def flush(self):
+		# Write now if there are changes waiting to be written
+		if self.__save_source != 0:
+			self.save_settings()
+
+	def __save_later(self):
+		# Changes made in quick succession make one write
+		if self.__save_source != 0:
+			GLib.source_remove(self.__save_source)
+		self.__save_source = GLib.timeout_add(SETTINGS_SAVE_DELAY, self.__on_save_due)
+
+	def __on_save_due(self):
+		self.__save_source = 0
+		self.save_settings()
+		return False
+
+	def watch(self, on_changed):
+		# Read the settings again whenever someone else changes the 
+		# file and call `on_changed` if they are valid. Works on the
+		# main loop, so does `on_changed`
+		try:
+			self.__inotify = Inotify()
+			self.__inotify.add_watch(
+				os.path.dirname(self.__sfile), 
+				IN_CLOSE_WRITE | IN_MOVED_TO
+				)
+		except OSError:
+			# No live reload then
+			self.unwatch()
+			return
+		self.__on_changed = on_changed
+		self.__watch_source = GLib.io_add_watch(
+			self.__inotify.fileno(), 
+			GLib.PRIORITY_DEFAULT, 
+			GLib.IO_IN, 
+			self.__on_file_event
+			)
+
+	def unwatch(self):
+		if self.__watch_source != 0:
+			GLib.source_remove(self.__watch_source)
+			self.__watch_source = 0
+		if self.__inotify is not None:
+			self.__inotify.close()
+			self.__inotify = None
+
+	def __on_file_event(self, fd, condition):
+		name = os.path.basename(self.__sfile)
+		if not any(event_name == name for (_, _, event_name) in self.__inotify.read(0)):
+			return True
+		try:
+			st = os.stat(self.__sfile)
+		except OSError:
+			return True
+		if (st.st_ino, st.st_mtime_ns, st.st_size) == self.__written:
+			return True
+		try:
+			self.read_settings()
+		except YDInvalidSettings:
+			# Maybe it is still being written, keep what we have
+			return True
+		self.__invalid = False
+		self.__written = (st.st_ino, st.st_mtime_ns, st.st_size)
+		self.__on_changed()
+		return True
+
 
 
 # Application menu ------------------------------------------
 #
-class YDIMenu(Gtk.Menu):
-	__settings:YDISettings = None
+
+# Tags of recently synced files and folders menu items. These are
+# followed by a file or folder path relative to the Yandex Disk folder
+RSYNCED_FILES = "@f"
+RSYNCED_DIRS = "@d"
+
+# The label of the menu item publishing recently synced files
+# and folders when it is not busy doing that
+PUBLISH_LABEL = _("Publish and copy links")
+
+def make_mi_label(s:str, l:int=37):
+	if len(s) > l:
+		s = "  " + s[0:int((l-7)/2)] + " ... " + s[-int((l-7)/2):]
+	else:
+		s = "  " + s
+	return s
+
+class YDIAccountMenu:
+	# Status, quota, recently synced and start/stop menu items of 
+	# one yandex-disk account
 
 	__ydm_sync_status = None
 	
@@ -219,26 +518,43 @@ class YDIMenu(Gtk.Menu):
 	__ydm_quota_sub_available = None
 	__ydm_quota_sub_maxfile = None
 	__ydm_quota_sub_trash = None
+	__ydm_quota_sub_forecast = None
 	
+	# Largest folders submenu, its total line and folder items
+	__ydm_largest_sub = None
+	__ydm_largest_sub_total = None
+	__largest_items:list = None
+	__largest_activate = None
+
 	__ydm_rsynced_sub_files = None
 	__ydm_rsynced_sub_dirs = None
 	__ydm_rsynced_sub = None
 
+	# Recently synced files and folders keyed by RSYNCED_FILES and 
+	# RSYNCED_DIRS: paths as last reported, paths in the order they
+	# are currently on the submenu and their menu items keyed by path.
+	# The submenu is brought in line with the reported paths only when
+	# it is about to be shown
+	__rsynced_paths:dict = None
+	__rsynced_shown:dict = None
+	__rsynced_items:dict = None
+	__rsynced_activate:dict = None
+
+	__ydm_rsynced_publish = None
+
 	__ydm_start_stop = None
 
-	def __init__(self, ydisettings:YDISettings, menu_actions:dict):
-		super().__init__()
-		self.__settings = ydisettings
-		self.__make_menu(menu_actions)
+	def __init__(self, menu:Gtk.Menu, account_actions:dict):
+		self.__make_menu(menu, account_actions)
 
-	def __make_menu(self, ma:dict):
+	def __make_menu(self, menu:Gtk.Menu, ma:dict):
 		self.__ydm_sync_status = Gtk.MenuItem(label="")
-		self.append(self.__ydm_sync_status)
+		menu.append(self.__ydm_sync_status)
 
-		self.append(Gtk.SeparatorMenuItem.new())
+		menu.append(Gtk.SeparatorMenuItem.new())
 
 		quota = Gtk.MenuItem(label=_("Quota"))
-		self.append(quota)
+		menu.append(quota)
 		quota_sub = Gtk.Menu()
 		quota.set_submenu(quota_sub)
 
@@ -267,19 +583,63 @@ class YDIMenu(Gtk.Menu):
 		self.__ydm_quota_sub_trash = Gtk.MenuItem(label="")
 		self.__ydm_quota_sub_trash.set_sensitive(False)
 		quota_sub.append(self.__ydm_quota_sub_trash)
+		# Only shown while the quota is running out
+		self.__ydm_quota_sub_forecast = Gtk.MenuItem(label="")
+		self.__ydm_quota_sub_forecast.set_sensitive(False)
+		self.__ydm_quota_sub_forecast.set_no_show_all(True)
+		quota_sub.append(self.__ydm_quota_sub_forecast)
+
+		quota_sub.append(Gtk.SeparatorMenuItem.new())
+
+		largest = Gtk.MenuItem(label=_("Largest folders"))
+		quota_sub.append(largest)
+		self.__ydm_largest_sub = Gtk.Menu()
+		largest.set_submenu(self.__ydm_largest_sub)
+		# The folders are only looked through once asked for
+		largest.connect("activate", ma["on_largest"])
+		self.__ydm_largest_sub.connect("show", ma["on_largest"])
+
+		self.__ydm_largest_sub_total = Gtk.MenuItem(label=_("Scanning..."))
+		self.__ydm_largest_sub_total.set_sensitive(False)
+		self.__ydm_largest_sub.append(self.__ydm_largest_sub_total)
+
+		self.__ydm_largest_sub.append(Gtk.SeparatorMenuItem.new())
+
+		mi = Gtk.MenuItem(label=_("Rescan"))
+		mi.connect("activate", ma["on_rescan"])
+		self.__ydm_largest_sub.append(mi)
+
+		mi = Gtk.MenuItem(label=_("Export to JSON..."))
+		mi.connect("activate", ma["on_export_quota"])
+		self.__ydm_largest_sub.append(mi)
+		self.__largest_items = []
+		self.__largest_activate = ma["on_largest_folder"]
 
 		rsynced = Gtk.MenuItem(label=_("Recently synced"))
-		self.append(rsynced)
+		menu.append(rsynced)
 		self.__ydm_rsynced_sub = Gtk.Menu()
 		rsynced.set_submenu(self.__ydm_rsynced_sub)
 
+		# AppIndicator passes `about-to-show` for a submenu as `activate` 
+		# of its menu item, a plain Gtk.Menu emits `show` 
+		rsynced.connect("activate", self.__on_rsynced_show)
+		self.__ydm_rsynced_sub.connect("show", self.__on_rsynced_show)
+
+		self.__rsynced_paths = {RSYNCED_FILES: [], RSYNCED_DIRS: []}
+		self.__rsynced_shown = {RSYNCED_FILES: [], RSYNCED_DIRS: []}
+		self.__rsynced_items = {RSYNCED_FILES: {}, RSYNCED_DIRS: {}}
+		self.__rsynced_activate = {
+			RSYNCED_FILES: ma["on_rcfile"], 
+			RSYNCED_DIRS: ma["on_rcfolder"]
+		}
+
 		mi = Gtk.MenuItem(label=_("Recently synced files:"))
 		mi.tag = "@m_recent_files"
 		self.__ydm_rsynced_sub.append(mi)
 		mi.set_sensitive(False)
 
 		self.__ydm_rsynced_sub_files = Gtk.MenuItem(label=_("  (none)"))
-		self.__ydm_rsynced_sub_files.tag = "@f"
+		self.__ydm_rsynced_sub_files.tag = RSYNCED_FILES
 		self.__ydm_rsynced_sub_files.set_sensitive(False)
 		self.__ydm_rsynced_sub.append(self.__ydm_rsynced_sub_files)
 
@@ -289,15 +649,190 @@ class YDIMenu(Gtk.Menu):
 		mi.set_sensitive(False)
 
 		self.__ydm_rsynced_sub_dirs = Gtk.MenuItem(label=_("  (none)"))
-		self.__ydm_rsynced_sub_dirs.tag = "@d"
+		self.__ydm_rsynced_sub_dirs.tag = RSYNCED_DIRS
 		self.__ydm_rsynced_sub_dirs.set_sensitive(False)
 		self.__ydm_rsynced_sub.append(self.__ydm_rsynced_sub_dirs)
 
-		self.append(Gtk.SeparatorMenuItem.new())
+		self.__ydm_rsynced_sub.append(Gtk.SeparatorMenuItem.new())
+
+		self.__ydm_rsynced_publish = Gtk.MenuItem(label=PUBLISH_LABEL)
+		self.__ydm_rsynced_publish.connect("activate", ma["on_publish"])
+		self.__ydm_rsynced_sub.append(self.__ydm_rsynced_publish)
+
+		mi = Gtk.MenuItem(label=_("Search synced items…"))
+		mi.connect("activate", ma["on_search"])
+		self.__ydm_rsynced_sub.append(mi)
+
+		menu.append(Gtk.SeparatorMenuItem.new())
 
 		self.__ydm_start_stop = Gtk.MenuItem(label=_("Start/Stop"))
 		self.__ydm_start_stop.connect("activate", ma["on_start_stop"])
-		self.append(self.__ydm_start_stop)
+		menu.append(self.__ydm_start_stop)
+
+	def get_label(self, item:str):
+		match item:
+			case "start_stop":
+				return self.__ydm_start_stop.get_label()
+			case "publish":
+				return self.__ydm_rsynced_publish.get_label()
+			case "largest":
+				return self.__ydm_largest_sub_total.get_label()
+			case "sync_status":
+				return self.__ydm_sync_status.get_label()
+			case "path":
+				return self.__ydm_quota_sub_path.get_label()
+			case "total":
+				return self.__ydm_quota_sub_total.get_label()
+			case "used":
+				return self.__ydm_quota_sub_used.get_label()
+			case "available":
+				return self.__ydm_quota_sub_available.get_label()
+			case "maxfile":
+				return self.__ydm_quota_sub_maxfile.get_label()
+			case "trash":
+				return self.__ydm_quota_sub_trash.get_label()
+			case "forecast":
+				return self.__ydm_quota_sub_forecast.get_label()
+
+	def set_label(self, item:str, label:str):
+		match item:
+			case "start_stop":
+				self.__ydm_start_stop.set_label(label)
+			case "publish":
+				self.__ydm_rsynced_publish.set_label(label)
+				# Nothing to click while publishing
+				self.__ydm_rsynced_publish.set_sensitive(label == PUBLISH_LABEL)
+			case "largest":
+				self.__ydm_largest_sub_total.set_label(label)
+			case "sync_status":
+				self.__ydm_sync_status.set_label(label)
+			case "path":
+				self.__ydm_quota_sub_path.set_label(label)
+			case "total":
+				self.__ydm_quota_sub_total.set_label(label)
+			case "used":
+				self.__ydm_quota_sub_used.set_label(label)
+			case "available":
+				self.__ydm_quota_sub_available.set_label(label)
+			case "maxfile":
+				self.__ydm_quota_sub_maxfile.set_label(label)
+			case "trash":
+				self.__ydm_quota_sub_trash.set_label(label)
+			case "forecast":
+				self.__ydm_quota_sub_forecast.set_label(label)
+				self.__ydm_quota_sub_forecast.set_visible(label != "")
+
+	def set_largest(self, folders:list):
+		# (path, size label) of the largest folders, largest first.
+		# They go right below the total line
+		for mi in self.__largest_items:
+			mi.destroy()
+		self.__largest_items = []
+		for (i, (path, size)) in enumerate(folders):
+			mi = Gtk.MenuItem(label=make_mi_label(size + "  " + path))
+			mi.tag = path
+			mi.connect("activate", self.__largest_activate)
+			mi.show()
+			self.__ydm_largest_sub.insert(mi, 1 + i)
+			self.__largest_items.append(mi)
+
+	def get_rsynced(self, kind:str):
+		# The list of recently synced files or folders 
+		# depending on `kind`, RSYNCED_FILES or RSYNCED_DIRS
+		return self.__rsynced_paths[kind]
+
+	def set_rsynced(self, kind:str, paths:list):
+		self.__rsynced_paths[kind] = list(paths)
+		if self.__ydm_rsynced_sub.get_mapped():
+			self.__sync_rsynced()
+
+	def __on_rsynced_show(self, source):
+		self.__sync_rsynced()
+
+	def __sync_rsynced(self):
+		# Files go first, folders follow them. Each list is preceded 
+		# by its `Recently synced ...:` header and `(none)` item
+		self.__sync_rsynced_kind(RSYNCED_FILES, 2)
+		self.__sync_rsynced_kind(
+			RSYNCED_DIRS, 
+			4 + len(self.__rsynced_shown[RSYNCED_FILES])
+			)
+
+	def __sync_rsynced_kind(self, kind:str, first_pos:int):
+		paths = self.__rsynced_paths[kind]
+		shown = self.__rsynced_shown[kind]
+		if paths == shown:
+			return
+		items = self.__rsynced_items[kind]
+
+		# Remove the items no longer listed
+		listed = set(paths)
+		for path in [p for p in shown if p not in listed]:
+			shown.remove(path)
+			items.pop(path).destroy()
+
+		# Insert the new ones and move the rest into place 
+		for (i, path) in enumerate(paths):
+			if i < len(shown) and shown[i] == path:
+				continue
+			mi = items.get(path)
+			if mi is None:
+				mi = Gtk.MenuItem(label=make_mi_label(path))
+				mi.tag = kind + path
+				mi.connect("activate", self.__rsynced_activate[kind])
+				mi.show()
+				items[path] = mi
+				self.__ydm_rsynced_sub.insert(mi, first_pos + i)
+			else:
+				shown.remove(path)
+				self.__ydm_rsynced_sub.reorder_child(mi, first_pos + i)
+			shown.insert(i, path)
+
+		# `  (none)` is there only for an empty list
+		placeholder = {
+			RSYNCED_FILES: self.__ydm_rsynced_sub_files,
+			RSYNCED_DIRS: self.__ydm_rsynced_sub_dirs
+		}[kind]
+		placeholder.set_visible(len(paths) == 0)
+
+class YDIMenu(Gtk.Menu):
+	__settings:YDISettings = None
+
+	# YDIAccountMenu of every account
+	__accounts:list = None
+
+	# Preferences radio items keyed by the setting value
+	__frequency_items:dict = None
+	__icon_theme_items:dict = None
+
+	# Diagnostics on/off item
+	__diagnostics_item:Gtk.CheckMenuItem = None
+
+	# (item, handler id) of the items above, blocked while they are 
+	# brought in line with the settings
+	__handlers:list = None
+
+	def __init__(self, ydisettings:YDISettings, menu_actions:dict, account_names:list):
+		super().__init__()
+		self.__settings = ydisettings
+		self.__accounts = []
+		self.__handlers = []
+		self.__make_menu(menu_actions, account_names)
+
+	def __make_menu(self, ma:dict, account_names:list):
+		# A single account is laid out right in this menu,
+		# several accounts get a submenu each. Menu actions
+		# for accounts are in ma["accounts"] in the same order
+		if len(account_names) == 1:
+			self.__accounts.append(YDIAccountMenu(self, ma["accounts"][0]))
+		else:
+			for (n, name) in enumerate(account_names):
+				mi = Gtk.MenuItem(label=name)
+				self.append(mi)
+				account_sub = Gtk.Menu()
+				mi.set_submenu(account_sub)
+				self.__accounts.append(YDIAccountMenu(account_sub, ma["accounts"][n]))
+			self.append(Gtk.SeparatorMenuItem.new())
 
 		preferences = Gtk.MenuItem(label=_("Preferences"))
 		self.append(preferences)
@@ -311,26 +846,24 @@ class YDIMenu(Gtk.Menu):
 		preferences_sub_power = Gtk.RadioMenuItem.new_with_label(group=None, label=_("Power saver"))
 		preferences_sub.append(preferences_sub_power)
 		preferences_sub_power.set_draw_as_radio(False)
-		preferences_sub_power.connect("activate", ma["on_power_saver"])
+		self.__handlers.append((preferences_sub_power, preferences_sub_power.connect("activate", ma["on_power_saver"])))
 		group = preferences_sub_power.get_group()
 
 		preferences_sub_medium = Gtk.RadioMenuItem.new_with_label(group=group, label=_("Medium"))
 		preferences_sub.append(preferences_sub_medium)
 		preferences_sub_medium.set_draw_as_radio(False)
-		preferences_sub_medium.connect("activate", ma["on_medium"])
+		self.__handlers.append((preferences_sub_medium, preferences_sub_medium.connect("activate", ma["on_medium"])))
 
 		preferences_sub_high = Gtk.RadioMenuItem.new_with_label(group=group, label=_("High"))
 		preferences_sub.append(preferences_sub_high)
 		preferences_sub_high.set_draw_as_radio(False)
-		preferences_sub_high.connect("activate", ma["on_high"])
+		self.__handlers.append((preferences_sub_high, preferences_sub_high.connect("activate", ma["on_high"])))
 
-		match self.__settings.get_frequency():
-			case "power_saver":
-				preferences_sub_power.set_active(True)
-			case "medium":
-				preferences_sub_medium.set_active(True)
-			case "high":
-				preferences_sub_high.set_active(True)
+		self.__frequency_items = {
+			"power_saver": preferences_sub_power,
+			"medium": preferences_sub_medium,
+			"high": preferences_sub_high
+		}
 
 		mi = Gtk.MenuItem(label=_("Icon theme:"))
 		preferences_sub.append(mi)
@@ -339,26 +872,49 @@ class YDIMenu(Gtk.Menu):
 		preferences_sub_themed = Gtk.RadioMenuItem.new_with_label(group=None, label=_("Follow desktop theme"))
 		preferences_sub.append(preferences_sub_themed)
 		preferences_sub_themed.set_draw_as_radio(False)
-		preferences_sub_themed.connect("activate", ma["on_themed"])
+		self.__handlers.append((preferences_sub_themed, preferences_sub_themed.connect("activate", ma["on_themed"])))
 		group = preferences_sub_themed.get_group()
 
 		preferences_sub_white = Gtk.RadioMenuItem.new_with_label(group=group, label=_("Always white"))
 		preferences_sub.append(preferences_sub_white)
 		preferences_sub_white.set_draw_as_radio(False)
-		preferences_sub_white.connect("activate", ma["on_white"])
+		self.__handlers.append((preferences_sub_white, preferences_sub_white.connect("activate", ma["on_white"])))
 
 		preferences_sub_black = Gtk.RadioMenuItem.new_with_label(group=group, label=_("Always black"))
 		preferences_sub.append(preferences_sub_black)
 		preferences_sub_black.set_draw_as_radio(False)
-		preferences_sub_black.connect("activate", ma["on_black"])
+		self.__handlers.append((preferences_sub_black, preferences_sub_black.connect("activate", ma["on_black"])))
 
-		match self.__settings.get_icon_theme():
-			case "themed":
-				preferences_sub_themed.set_active(True)
-			case "white":
-				preferences_sub_white.set_active(True)
-			case "black":
-				preferences_sub_black.set_active(True)
+		self.__icon_theme_items = {
+			"themed": preferences_sub_themed,
+			"white": preferences_sub_white,
+			"black": preferences_sub_black
+		}
+		diagnostics = Gtk.MenuItem(label=_("Diagnostics"))
+		self.append(diagnostics)
+		diagnostics_sub = Gtk.Menu()
+		diagnostics.set_submenu(diagnostics_sub)
+
+		self.__diagnostics_item = Gtk.CheckMenuItem(label=_("Collect timings"))
+		diagnostics_sub.append(self.__diagnostics_item)
+		self.__handlers.append((
+			self.__diagnostics_item, 
+			self.__diagnostics_item.connect("toggled", ma["on_diagnostics"])
+			))
+
+		mi = Gtk.MenuItem(label=_("Show timings"))
+		diagnostics_sub.append(mi)
+		mi.connect("activate", ma["on_show_diagnostics"])
+
+		mi = Gtk.MenuItem(label=_("Show events"))
+		diagnostics_sub.append(mi)
+		mi.connect("activate", ma["on_show_events"])
+
+		mi = Gtk.MenuItem(label=_("Show daemon restarts"))
+		diagnostics_sub.append(mi)
+		mi.connect("activate", ma["on_show_restarts"])
+
+		self.show_settings()
 
 		self.append(Gtk.SeparatorMenuItem.new())
 
@@ -370,56 +926,164 @@ class YDIMenu(Gtk.Menu):
 		mi.connect("activate", ma["on_quit"])
 		self.append(mi)
 
-	def get_label(self, item:str):
-		match item:
-			case "start_stop":
-				return self.__ydm_start_stop.get_label()
-			case "sync_status":
-				return self.__ydm_sync_status.get_label()
-			case "path":
-				return self.__ydm_quota_sub_path.get_label()
-			case "total":
-				return self.__ydm_quota_sub_total.get_label()
-			case "used":
-				return self.__ydm_quota_sub_used.get_label()
-			case "available":
-				return self.__ydm_quota_sub_available.get_label()
-			case "maxfile":
-				return self.__ydm_quota_sub_maxfile.get_label()
-			case "trash":
-				return self.__ydm_quota_sub_trash.get_label()
+	def get_account(self, n:int):
+		return self.__accounts[n]
+
+	def show_settings(self):
+		# Check the preferences items as the settings are. Their 
+		# handlers are not to run, they would set the settings again
+		# and the items unchecked would even change them back
+		items = [
+			(self.__frequency_items[self.__settings.get_frequency()], True),
+			(self.__icon_theme_items[self.__settings.get_icon_theme()], True),
+			(self.__diagnostics_item, self.__settings.get_diagnostics())
+		]
+		for (item, handler) in self.__handlers:
+			item.handler_block(handler)
+		try:
+			for (item, active) in items:
+				if item.get_active() != active:
+					item.set_active(active)
+		finally:
+			for (item, handler) in self.__handlers:
+				item.handler_unblock(handler)
+
+class YDISearchDialog(Gtk.Dialog):
+	# Looks up files and folders synced so far in a YDISyncedIndex as
+	# the user types. `on_open` is called with the YDISyncedItem of 
+	# the row activated
+
+	__index = None
+	__on_open = None
+
+	__entry:Gtk.SearchEntry = None
+
+	# Path, when last seen and the YDISyncedItem of every row
+	__store:Gtk.ListStore = None
+
+	def __init__(self, title:str, index, on_open):
+		super().__init__(title=title)
+		self.__index = index
+		self.__on_open = on_open
+		self.set_default_size(560, 420)
+		self.add_button(_("Close"), Gtk.ResponseType.CLOSE)
+		self.connect("response", lambda dialog, response: dialog.destroy())
+
+		box = self.get_content_area()
+		self.__entry = Gtk.SearchEntry()
+		self.__entry.connect("search-changed", self.__on_search_changed)
+		box.pack_start(self.__entry, False, False, 0)
+
+		self.__store = Gtk.ListStore(str, str, object)
+		view = Gtk.TreeView(model=self.__store)
+		view.append_column(Gtk.TreeViewColumn(_("Synced item"), Gtk.CellRendererText(), text=0))
+		view.append_column(Gtk.TreeViewColumn(_("Last seen"), Gtk.CellRendererText(), text=1))
+		view.get_column(0).set_expand(True)
+		view.connect("row-activated", self.__on_row_activated)
+		scrolled = Gtk.ScrolledWindow()
+		scrolled.add(view)
+		box.pack_start(scrolled, True, True, 0)
+
+		self.__on_search_changed(self.__entry)
+		self.show_all()
+
+	def __on_search_changed(self, entry):
+		from yd_synced import SYNCED_DIR_KIND
+		self.__store.clear()
+		for item in self.__index.search(entry.get_text()):
+			self.__store.append([
+				item.path + ("/" if item.kind == SYNCED_DIR_KIND else ""),
+				strftime("%Y-%m-%d %H:%M", localtime(item.last_seen)),
+				item
+				])
+
+	def __on_row_activated(self, view, path, column):
+		self.__on_open(self.__store[path][2])
+
+
+
+# Status icons ----------------------------------------------
+#
 
-	def set_label(self, item:str, label:str):
-		match item:
-			case "start_stop":
-				self.__ydm_start_stop.set_label(label)
-			case "sync_status":
-				self.__ydm_sync_status.set_label(label)
-			case "path":
-				self.__ydm_quota_sub_path.set_label(label)
-			case "total":
-				self.__ydm_quota_sub_total.set_label(label)
-			case "used":
-				self.__ydm_quota_sub_used.set_label(label)
-			case "available":
-				self.__ydm_quota_sub_available.set_label(label)
-			case "maxfile":
-				self.__ydm_quota_sub_maxfile.set_label(label)
-			case "trash":
-				self.__ydm_quota_sub_trash.set_label(label)
+# Icon themes, each a folder under Icons with every status icon
+ICON_THEMES = ["Light_Theme", "Dark_Theme"]
 
-	def get_rsynced_submenu(self):
-		return self.__ydm_rsynced_sub
-	
-	def get_rsynced(self, tag_to_search:str):
-		tagged_items = []
-		for mi in self.__ydm_rsynced_sub.get_children():
-			l = len(mi.tag)
-			if mi.tag.find(tag_to_search) == 0 and l > 2: # All MenuItems here MUST have a tag
-				tagged_items.append(mi.tag[2:l])
-		return tagged_items
+# A packager installing the icons elsewhere can put their folder
+# path into this file next to yd_appind.py
+ICON_MANIFEST = "icons.path"
+
+def find_icon_dir():
+	# The Icons folder, looked up once at start up
+	here = os.path.dirname(os.path.abspath(__file__))
+	try:
+		with open(os.path.join(here, ICON_MANIFEST), "r") as manifest:
+			icon_dir = manifest.read().strip()
+		if os.path.isdir(icon_dir):
+			return icon_dir
+	except OSError:
+		pass
+	return os.path.join(here, "Icons") # /opt/dandelion.systems/ydi/Icons in the package
+
+class YDIIcons:
+	# Absolute paths to every status icon of every icon theme, so
+	# that neither switching themes nor changing icons makes anyone
+	# search for files
+
+	# {theme: {icon: path}}
+	__paths:dict = None
+
+	def __init__(self, icon_dir:str=None):
+		if icon_dir is None:
+			icon_dir = find_icon_dir()
+		self.__paths = {}
+		for theme in ICON_THEMES:
+			self.__paths[theme] = {}
+			for icon in ICON_SEVERITY:
+				path = os.path.join(icon_dir, theme, icon)
+				# A missing icon is left to AppIndicator to find by name
+				self.__paths[theme][icon] = path if os.path.isfile(path) else icon
+
+	def get_path(self, theme:str, icon:str):
+		return self.__paths[theme][icon]
+
+
+
+# Desktop notifications -------------------------------------
+#
+
+NOTIFY_TIMEOUT_MS = 10000
 
+def notify(summary:str, body:str):
+	# Show a desktop notification through the freedesktop.org
+	# notification service without waiting for it. Nothing is shown
+	# if there is no service, it is just logged
+	from gi.repository import Gio
 
+	def on_done(bus, result):
+		try:
+			bus.call_finish(result)
+		except GLib.Error as e:
+			events.log(EVENT_WARNING, "no_notification", error=str(e))
+
+	try:
+		bus = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+	except GLib.Error as e:
+		events.log(EVENT_WARNING, "no_notification", error=str(e))
+		return
+	bus.call(
+		"org.freedesktop.Notifications",
+		"/org/freedesktop/Notifications",
+		"org.freedesktop.Notifications",
+		"Notify",
+		GLib.Variant("(susssasa{sv}i)", (
+			APPINDICATOR_ID, 0, "dialog-warning", summary, body, [], {}, NOTIFY_TIMEOUT_MS
+			)),
+		None,
+		Gio.DBusCallFlags.NONE,
+		-1,
+		None,
+		on_done
+		)
 
 # Main application ------------------------------------------
 #
@@ -428,77 +1092,205 @@ class YDIMenu(Gtk.Menu):
 START_LABEL = _("Start ⏵")
 STOP_LABEL = _("Stop ⏹")
 
-# yandex-disk status monitor update interval in seconds
-UPDATE_INTERVAL_PS = 5
-UPDATE_INTERVAL_MD = 2
-UPDATE_INTERVAL_HG = 1
+# Localized labels for status snapshots, see yd_snapshot
+SNAPSHOT_LABELS = {
+	"idle": _("idle"),
+	"busy": _("busy"),
+	"index": _("index"),
+	"paused": _("paused"),
+	"error": _("error"),
+	"not running": _("not running"),
+	"start": START_LABEL,
+	"stop": STOP_LABEL,
+	"status": _("Status: "),
+	"total": _("Total: "),
+	"used": _("Used: "),
+	"available": _("Available: "),
+	"maxfile": _("Max file: "),
+	"trash": _("Trash: "),
+	"rate": _("%s/s"),
+	"min_left": _("~%d min left"),
+	"h_left": _("~%d h left"),
+	"full_in": _("Full in about %d days")
+}
 
 class YDIndicator:
-	# yandex-disk CLI interface
-	__disk:YandexDisk = None
+	# yandex-disk CLI interface of every account
+	__disks:list = None
+
+	# Account names as shown in the menu
+	__names:list = None
+
+	# (config, dir) yandex-disk options of every account, 
+	# None for the defaults
+	__locations:list = None
 	
 	# AppIndicator instance
 	__indicator:AppIndicator = None
 
+	# Status icon of every account, the worst of them is shown
+	__icons:list = None
+
+	# Icon files and the theme, one of ICON_THEMES, they are taken from
+	__icon_files:YDIIcons = None
+	__icon_theme = ICON_THEMES[0]
+
 	# Gtk AppIndicator menu. Menu items below will change content 
 	# dynamically to reflect the status of syncing
 	__menu:YDIMenu = None
 
-	# Status updater thread
-	__updater = None
+	# Status updater
+	__monitor:YDIMonitor = None
+
+	# Keep the daemons alive, one per account
+	__watchdogs:list = None
+
+	# Status history of every account, None where it cannot be kept
+	__histories:list = None
+
+	# Status and control on the session bus, one per account. 
+	# Empty if there is no bus
+	__dbus:list = None
 
-	# Status updater run flag (simple semaphore)
-	__monitoring = False
+	# Status for monitoring systems, None if not configured
+	__exporter = None
+
+	# Every item synced so far of every account, see yd_synced
+	__synced:list = None
+
+	# When the quota of every account runs out, see yd_forecast
+	__forecasts:list = None
+
+	# What uses the space of every account, see yd_explorer. None
+	# entries until asked for. Accounts being scanned right now
+	__explorers:list = None
+	__scanning:set = None
 
 	# Settings
 	__settings:YDISettings = None
 
+	# Times start up for `ydi --profile-startup`, None otherwise
+	__profiler = None
+
+	# Keeps this the only YDI of the user and takes commands from 
+	# later launches, a YDIInstance
+	__instance = None
+
+	# Opens folders in the file manager, a YDILauncher once the
+	# first one is opened
+	__launcher = None
+
+
+	def __init__(self, disk:YandexDisk=None, profiler=None, instance=None):
+		# With a YDIStartupProfiler passed in as `profiler`, YDI 
+		# prints how long it has taken to start and quits as soon
+		# as the first status is shown. `instance` is the 
+		# YDIInstance already acquired, if any
 
-	def __init__(self, disk:YandexDisk=None):
 		# Enable multithreading in Gtk
 		GLib.threads_init()
 
 		# Check if we are running already
-		if not is_unique():
+		if instance is None:
+			from yd_instance import YDIInstance
+			instance = YDIInstance()
+		if not instance.acquire():
 			raise YDINotUnique
+		self.__instance = instance
 		
 		# Connect yandex-disk CLI
 		if disk is None:
 			raise NoYDCLI
-		self.__disk = disk
 
 		# Read the settings
-		# In case they are corrupt, we silently revert to defaults
+		# In case they are corrupt, we revert to defaults and leave 
+		# the file as it is for the user to fix
+		cfg_file = os.path.expanduser("~") + "/.config/yandex-disk/ydi.cfg"
+		settings_invalid = False
 		try:
-			cfg_file = os.path.expanduser("~") + "/.config/yandex-disk/ydi.cfg"
 			self.__settings = YDISettings(cfg_file)
 		except YDInvalidSettings:
-			pass
+			settings_invalid = True
+			self.__settings = YDISettings(cfg_file, read=False)
+
+		# `disk` is the only account unless more are configured
+		accounts = self.__settings.get_accounts()
+		if accounts == []:
+			self.__disks = [disk]
+			self.__names = [_("Yandex Disk")]
+			self.__locations = [(None, None)]
+		else:
+			self.__disks = [
+				YandexDisk(account.get("config"), account.get("dir")) 
+				for account in accounts
+				]
+			self.__names = [account["name"] for account in accounts]
+			self.__locations = [
+				(account.get("config"), account.get("dir")) 
+				for account in accounts
+				]
+		for d in self.__disks:
+			d.set_timeout(self.__settings.get_timeout("command"))
+		metrics.set_enabled(self.__settings.get_diagnostics())
+		self.__apply_events_config()
+		if settings_invalid:
+			print("ydi: %s is not valid, using the defaults" % cfg_file, file=stderr)
+			events.log(EVENT_ERROR, "invalid_settings", file=cfg_file)
+		self.__icons = ["YDNormal.png"] * len(self.__disks)
+		self.__histories = []
+		self.__synced = []
+		self.__explorers = [None] * len(self.__disks)
+		self.__scanning = set()
+		self.__dbus = []
+		self.__profiler = profiler
+		if profiler is not None:
+			profiler.mark("settings")
 
 		# YD status indicator and control
+		self.__icon_files = YDIIcons()
+		self.__icon_theme = self.__pick_icon_theme(Gtk.Settings.get_default())
 		self.__indicator = AppIndicator.Indicator.new(
-			APPINDICATOR_ID, "YDNormal.png", 
+			APPINDICATOR_ID, 
+			self.__icon_files.get_path(self.__icon_theme, worst_icon(self.__icons)), 
 			AppIndicator.IndicatorCategory.SYSTEM_SERVICES
 			)
 		self.__indicator.set_status(AppIndicator.IndicatorStatus.ACTIVE)
 
 		# YD control menu
 		menu_actions = {
-			"on_ydpath": self.on_ydpath,
-			"on_start_stop": self.on_start_stop,
+			"accounts": [
+				{
+					"on_ydpath": lambda source, n=n: self.on_ydpath(source, n),
+					"on_start_stop": lambda source, n=n: self.on_start_stop(source, n),
+					"on_rcfile": lambda source, n=n: self.on_rcfile(source, n),
+					"on_rcfolder": lambda source, n=n: self.on_rcfolder(source, n),
+					"on_publish": lambda source, n=n: self.on_publish(source, n),
+					"on_search": lambda source, n=n: self.on_search(source, n),
+					"on_largest": lambda source, n=n: self.on_largest(source, n),
+					"on_largest_folder": lambda source, n=n: self.on_largest_folder(source, n),
+					"on_rescan": lambda source, n=n: self.on_rescan(source, n),
+					"on_export_quota": lambda source, n=n: self.on_export_quota(source, n)
+				}
+				for n in range(len(self.__disks))
+			],
 			"on_power_saver": self.on_power_saver,
 			"on_medium": self.on_medium,
 			"on_high": self.on_high,
 			"on_themed": self.on_themed,
 			"on_white": self.on_white,
 			"on_black": self.on_black,
+			"on_diagnostics": self.on_diagnostics,
+			"on_show_diagnostics": self.on_show_diagnostics,
+			"on_show_events": self.on_show_events,
+			"on_show_restarts": self.on_show_restarts,
 			"on_about": self.on_about,
 			"on_quit": self.on_quit
 		}
 
 		self.__menu = YDIMenu(
 			ydisettings=self.__settings, 
-			menu_actions=menu_actions
+			menu_actions=menu_actions,
+			account_names=self.__names
 			)
 		self.__indicator.set_menu(self.__menu)
 		self.__menu.show_all()
@@ -508,91 +1300,360 @@ class YDIndicator:
 			"notify::gtk-theme-name", 
 			self.on_theme_name_changed
 			)
-		self.on_theme_name_changed(Gtk.Settings.get_default(), None)
+
+		if profiler is not None:
+			profiler.mark("indicator and menu")
+
+		# The icon and the menu show up as soon as the main loop 
+		# runs, the rest is done after that
+		GLib.idle_add(self.__start_up)
+
+		Gtk.main()	
+
+	def __start_up(self):
+		if self.__profiler is not None:
+			self.__profiler.mark("main loop")
+
+		# Imported here to keep them off the way of the icon
+		from yd_dbus import YDIDBusService, DBUS_PATH
+		from yd_history import YDIHistory, history_file
+		from yd_watchdog import YDIWatchdog
+		from yd_synced import YDISyncedIndex, synced_file
+		from yd_forecast import YDIQuotaForecast
+
+		self.__watchdogs = [
+			YDIWatchdog(d, self.__settings.get_watchdog_config())
+			for d in self.__disks
+			]
+		for n in range(len(self.__disks)):
+			try:
+				self.__histories.append(YDIHistory(history_file(n)))
+			except (OSError, ValueError) as e:
+				# No history is no reason not to run
+				events.log(EVENT_WARNING, "no_history", account=n, error=str(e))
+				self.__histories.append(None)
+
+		# The files are only read when the first status comes
+		self.__synced = [YDISyncedIndex(synced_file(n)) for n in range(len(self.__disks))]
+
+		# Seeded from the history, if there is one, on the first status
+		self.__forecasts = [
+			YDIQuotaForecast(self.__settings.get_quota_alert_config(), history)
+			for history in self.__histories
+			]
+
+		# Takes effect at start up, like the accounts
+		exporter = self.__settings.get_exporter_config()
+		if exporter != {}:
+			from yd_exporter import YDIExporter
+			try:
+				self.__exporter = YDIExporter(
+					self.__names, 
+					exporter.get("textfile"), 
+					exporter.get("port")
+					)
+			except OSError as e:
+				# The port is taken, the file can still be written
+				events.log(EVENT_WARNING, "no_exporter_port", error=str(e))
+				self.__exporter = YDIExporter(self.__names, exporter.get("textfile"))
+		self.__monitor = YDIMonitor(
+			self.__disks,
+			self.__settings.get_scheduler_profile(),
+			SNAPSHOT_LABELS,
+			self.__post_updates,
+			self.__watchdogs,
+			self.__histories,
+			self.__exporter,
+			self.__synced,
+			self.__forecasts,
+			self.__post_status
+			)
+
+		# Share the status with other programs over D-Bus. The first
+		# account is at DBUS_PATH, the others below it.
+		# YDI works on without it if there is no session bus
+		try:
+			for (n, d) in enumerate(self.__disks):
+				self.__dbus.append(YDIDBusService(
+					d, 
+					lambda cmd, n=n: self.on_dbus_command(cmd, n),
+					path=DBUS_PATH if n == 0 else DBUS_PATH + "/account%d" % n
+					))
+		except GLib.Error as e:
+			events.log(EVENT_WARNING, "no_dbus", error=str(e))
+			for service in self.__dbus:
+				service.close()
+			self.__dbus = []
+
+		# Take commands from later `ydi` launches
+		try:
+			self.__instance.serve(self.on_instance_command)
+		except OSError as e:
+			events.log(EVENT_WARNING, "no_instance_socket", error=str(e))
+
+		# Pick up changes to the settings file made while we run
+		self.__settings.watch(self.on_settings_changed)
+
+		# `kill -USR1` writes the timings to DIAGNOSTICS_FILE
+		import signal
+		GLib.unix_signal_add(GLib.PRIORITY_DEFAULT, signal.SIGUSR1, self.__dump_diagnostics)
+
+		# The session ending or Ctrl+C quits as the menu does, so
+		# that the history and synced items are saved
+		for signum in [signal.SIGTERM, signal.SIGINT, signal.SIGHUP]:
+			GLib.unix_signal_add(GLib.PRIORITY_DEFAULT, signum, self.__on_quit_signal)
 
 		# Start getting regular status updates
 		self.monitor()
 
-		Gtk.main()	
+		if self.__profiler is not None:
+			self.__profiler.mark("monitor and D-Bus")
+		return False
 	
 	def on_power_saver(self, source):
-		self.__settings.set_frequency("power_saver")
-		self.__settings.save_settings()
-		if self.__monitoring:
-			self.desist()
-			self.monitor()
+		if self.__settings.set_frequency("power_saver"):
+			self.__change_profile()
 
 	def on_medium(self, source):
-		self.__settings.set_frequency("medium")
-		self.__settings.save_settings()
-		if self.__monitoring:
-			self.desist()
-			self.monitor()
+		if self.__settings.set_frequency("medium"):
+			self.__change_profile()
 	
 	def on_high(self, source):
-		self.__settings.set_frequency("high")
-		self.__settings.save_settings()
-		if self.__monitoring:
-			self.desist()
-			self.monitor()
+		if self.__settings.set_frequency("high"):
+			self.__change_profile()
 	
-	def on_themed(self, source):
-		self.__settings.set_icon_theme("themed")
-		self.__settings.save_settings()
+	def __change_profile(self):
+		self.__monitor.set_profile(self.__settings.get_scheduler_profile())
+
+	def on_settings_changed(self):
+		# ydi.cfg has been changed by someone else. Accounts are 
+		# only read at start up
+		self.__menu.show_settings()
+		self.__change_profile()
 		self.on_theme_name_changed(Gtk.Settings.get_default(), None)
+		for watchdog in self.__watchdogs:
+			watchdog.set_config(self.__settings.get_watchdog_config())
+		for disk in self.__disks:
+			disk.set_timeout(self.__settings.get_timeout("command"))
+		for forecast in self.__forecasts:
+			forecast.set_config(self.__settings.get_quota_alert_config())
+		metrics.set_enabled(self.__settings.get_diagnostics())
+		self.__apply_events_config()
+		events.log(EVENT_INFO, "settings_reloaded")
+
+	def on_themed(self, source):
+		if self.__settings.set_icon_theme("themed"):
+			self.on_theme_name_changed(Gtk.Settings.get_default(), None)
 	
 	def on_white(self, source):
-		self.__settings.set_icon_theme("white")
-		self.__settings.save_settings()
-		self.on_theme_name_changed(Gtk.Settings.get_default(), None)
+		if self.__settings.set_icon_theme("white"):
+			self.on_theme_name_changed(Gtk.Settings.get_default(), None)
 	
 	def on_black(self, source):
-		self.__settings.set_icon_theme("black")
-		self.__settings.save_settings()
-		self.on_theme_name_changed(Gtk.Settings.get_default(), None)
+		if self.__settings.set_icon_theme("black"):
+			self.on_theme_name_changed(Gtk.Settings.get_default(), None)
+
+	def on_diagnostics(self, source):
+		if self.__settings.set_diagnostics(source.get_active()):
+			metrics.set_enabled(source.get_active())
+
+	def on_show_diagnostics(self, source):
+		dialog = Gtk.MessageDialog(
+			flags=0,
+			message_type=Gtk.MessageType.INFO,
+			buttons=Gtk.ButtonsType.OK,
+			text=_("Diagnostics"),
+			)
+		dialog.format_secondary_markup(
+			"<tt>" + GLib.markup_escape_text(metrics.report()) + "</tt>"
+			)
+		dialog.run()
+		dialog.destroy()
+
+	def on_show_events(self, source):
+		if events.get_level() == EVENT_OFF:
+			report = _("The event log is off")
+		else:
+			# The latest ones are what a dialog has room for
+			report = "\n".join(str(e) for e in events.get_events()[-EVENTS_SHOWN:])
+		dialog = Gtk.MessageDialog(
+			flags=0,
+			message_type=Gtk.MessageType.INFO,
+			buttons=Gtk.ButtonsType.OK,
+			text=_("Diagnostics"),
+			)
+		dialog.format_secondary_markup(
+			"<tt>" + GLib.markup_escape_text(report) + "</tt>"
+			)
+		dialog.run()
+		dialog.destroy()
+
+	def on_show_restarts(self, source):
+		# Restarts the watchdogs have made, the latest of every account
+		lines = []
+		for (name, watchdog) in zip(self.__names, self.__watchdogs or []):
+			lines.append("%s: %d" % (name, watchdog.get_restart_count()))
+			if watchdog.is_flapping():
+				lines.append("  " + _("Restarting too often, left alone"))
+			for (when, reason) in watchdog.get_restarts()[-EVENTS_SHOWN:]:
+				lines.append("  %s %s" % (strftime("%Y-%m-%d %H:%M:%S", localtime(when)), reason))
+		dialog = Gtk.MessageDialog(
+			flags=0,
+			message_type=Gtk.MessageType.INFO,
+			buttons=Gtk.ButtonsType.OK,
+			text=_("Daemon restarts"),
+			)
+		dialog.format_secondary_markup(
+			"<tt>" + GLib.markup_escape_text("\n".join(lines)) + "</tt>"
+			)
+		dialog.run()
+		dialog.destroy()
+
+	def __apply_events_config(self):
+		config = self.__settings.get_events_config()
+		events.set_level(EVENT_LEVELS[config.get("level", "off")])
+		events.set_file(
+			config.get("file"),
+			config.get("max_bytes", EVENTS_FILE_MAX_BYTES),
+			config.get("backups", EVENTS_FILE_BACKUPS)
+			)
+
+	def __dump_diagnostics(self):
+		try:
+			metrics.dump(os.path.join(self.__instance.get_dir(), DIAGNOSTICS_FILE))
+		except OSError:
+			pass
+		return True
 
 	def on_theme_name_changed(self, settings, gparam):
-		iconpath = self.get_icon_path()
+		theme = self.__pick_icon_theme(settings)
+		if theme != self.__icon_theme:
+			self.__icon_theme = theme
+			self.__show_icon()
+
+	def __pick_icon_theme(self, settings):
 		match self.__settings.get_icon_theme():
 			case "themed":
 				theme = settings.get_property("gtk-theme-name")
 				if theme.find("dark") < 0 and theme.find("Dark") < 0:
 					# Light theme
-					iconpath = os.path.join(iconpath, "Light_Theme")
-					
+					return "Light_Theme"
 				else:
 					# Dark theme
-					iconpath = os.path.join(iconpath, "Dark_Theme")
-					
+					return "Dark_Theme"
 			case "white":
 				# `Always white` icons theme
-				iconpath = os.path.join(iconpath, "Dark_Theme")
-				
+				return "Dark_Theme"
 			case "black":
 				# `Always black` icons theme
-				iconpath = os.path.join(iconpath, "Light_Theme")
-				
+				return "Light_Theme"
 			case _:
-				return
+				return self.__icon_theme
 
-		GLib.idle_add(
-			self.__indicator.set_icon_theme_path,
-			iconpath
-		)
+	def __show_icon(self):
+		self.__indicator.set_icon(
+			self.__icon_files.get_path(self.__icon_theme, worst_icon(self.__icons))
+			)
 	
-	def on_ydpath(self, source):
-		self.__open_fm(self.__disk.get_yd_path())
+	def on_ydpath(self, source, n:int=0):
+		self.__open_fm(self.__disks[n].get_yd_path())
 	
-	def on_start_stop(self, source):
-		self.desist()
-		if self.__menu.get_label("start_stop") == START_LABEL:
-			self.__disk.command("start")
+	def on_start_stop(self, source, n:int=0):
+		# The command runs off the main loop, the status is updated 
+		# as soon as it is done
+		if self.__menu.get_account(n).get_label("start_stop") == START_LABEL:
+			cmd = "start"
 		else: # STOP_LABEL
-			self.__disk.command("stop")
-		self.monitor()
+			cmd = "stop"
+		self.__watchdogs[n].set_wanted(cmd == "start")
+		self.__disks[n].command_async(
+			cmd, 
+			callback=lambda output: GLib.idle_add(self.__on_command_done)
+			)
+
+	def __on_command_done(self):
+		self.__monitor.refresh()
+		return False
+
+	def on_dbus_command(self, cmd:str, n:int=0):
+		# Start, stop or sync requested over D-Bus has been done
+		match cmd:
+			case "start":
+				self.__watchdogs[n].set_wanted(True)
+			case "stop":
+				self.__watchdogs[n].set_wanted(False)
+		self.__monitor.refresh()
+
+	def on_instance_command(self, request:dict):
+		# A command forwarded by a later `ydi` launch, see yd_instance.
+		# Called on the socket thread, so only yandex-disk commands 
+		# run here and the rest is left to the main loop
+		from yd_instance import INSTANCE_COMMAND_WAIT, status_record
+		n = request.get("account")
+		if n is None:
+			accounts = range(len(self.__disks))
+		elif type(n) is int and 0 <= n < len(self.__disks):
+			# Not a bool either, the request may not be from parse_command()
+			accounts = [n]
+		else:
+			return {"output": _("No account %s") % n, "status": 2}
+		events.log(EVENT_INFO, "forwarded_command", command=request["command"], account=n)
+
+		output = ""
+		match request["command"]:
+			case "status":
+				if request.get("json"):
+					records = []
+					for n in accounts:
+						record = {"account": self.__names[n]}
+						record.update(status_record(self.__disks[n].get_status()))
+						records.append(record)
+					output = json.dumps(records, ensure_ascii=False, indent=1)
+				else:
+					output = "\n".join(
+						"%s: %s" % (
+							self.__names[n], 
+							self.__disks[n].get_sync_status() or SNAPSHOT_LABELS["not running"]
+							)
+						for n in accounts
+						)
+			case ("start" | "stop"):
+				# Queued, yandex-disk may take longer than the launch
+				# waits for the reply. It is told about the ones still
+				# running and they go on regardless
+				cmd = request["command"]
+				outputs = [""] * len(accounts)
+				finished = [Event() for n in accounts]
+				for (i, n) in enumerate(accounts):
+					def on_done(output:str, i=i):
+						outputs[i] = (output or "").strip()
+						finished[i].set()
+						GLib.idle_add(self.__on_command_done)
+					self.__watchdogs[n].set_wanted(cmd == "start")
+					self.__disks[n].command_async(cmd, callback=on_done)
+				deadline = monotonic() + INSTANCE_COMMAND_WAIT
+				lines = []
+				for (i, n) in enumerate(accounts):
+					if not finished[i].wait(max(deadline - monotonic(), 0)):
+						lines.append(_("%s: still running") % self.__names[n])
+					elif outputs[i] != "":
+						lines.append(outputs[i])
+				output = "\n".join(lines)
+			case "open_menu":
+				GLib.idle_add(self.__open_menu)
+		return {"output": output, "status": 0}
+
+	def __open_menu(self):
+		self.__menu.popup_at_pointer(None)
+		return False
 
 	def on_about(self, source):
-		yd_version = self.__disk.command("-v")
+		self.__disks[0].command_async(
+			"-v", 
+			callback=lambda output: GLib.idle_add(self.__show_about, output)
+			)
+
+	def __show_about(self, yd_version:str):
 		dialog = Gtk.MessageDialog(
 			flags=0,
 			message_type=Gtk.MessageType.INFO,
@@ -604,258 +1665,284 @@ class YDIndicator:
 			)
 		dialog.run()
 		dialog.destroy()
+		return False
+
+	def __on_quit_signal(self):
+		self.on_quit(None)
+		return False
 
 	def on_quit(self, source):
-		self.desist()
-		remove_pid_file()
+		self.__settings.unwatch()
+		self.__settings.flush()
+		if self.__monitor is not None:
+			self.__monitor.close()
+		for history in self.__histories:
+			if history is not None:
+				history.close()
+		for service in self.__dbus:
+			service.close()
+		for synced in self.__synced:
+			synced.close()
+		if self.__exporter is not None:
+			self.__exporter.close()
+		events.log(EVENT_INFO, "quit")
+		events.close()
+		self.__instance.close()
 		Gtk.main_quit()
 
-	def get_icon_path(self):
-		loclist = getoutput("dpkg -L dandelion-ydi | grep Icons")
-		try:
-			(iconpath,_) = loclist.splitlines()[0].split(sep="Icons") + "Icons" # /
-		except:
-			iconpath = os.path.join(os.getcwd(), "Icons") # the default is "/opt/dandelion.systems/ydi/Icons/"
-		return iconpath
-
 	def monitor(self):
-		match self.__settings.get_frequency():
-			case "power_saver":
-				interval = UPDATE_INTERVAL_PS
-			case "medium":
-				interval = UPDATE_INTERVAL_MD
-			case "high":
-				interval = UPDATE_INTERVAL_HG
-			case _: # just a precaution
-				interval = UPDATE_INTERVAL_MD
-
-		# Start updating yandex-disk status at regular intervals (in seconds).
-		# Use desist() to stop
-		if not self.__monitoring:
-			self.__monitoring = True
-			self.__updater = Thread(
-				target=self.__update_worker, 
-				args=(interval,)
-			)
-			self.__updater.start()
+		# Start updating yandex-disk status. Use desist() to stop
+		self.__monitor.monitor()
 
 	def desist(self):
 		# Stop updating yandex-disk status
-		self.__monitoring = False
-		self.__updater.join()
+		self.__monitor.desist()
 
-	def on_rcfile(self, source):
-		yd_path = self.__disk.get_yd_path()
+	def on_rcfile(self, source, n:int=0):
+		yd_path = self.__disks[n].get_yd_path()
 		file_folder = os.path.dirname(source.tag[2:len(source.tag)])
 		self.__open_fm(os.path.join(yd_path, file_folder))
 
-	def on_rcfolder(self, source):
-		yd_path = self.__disk.get_yd_path()
+	def on_rcfolder(self, source, n:int=0):
+		yd_path = self.__disks[n].get_yd_path()
 		self.__open_fm(
 			os.path.join(yd_path, source.tag[2:len(source.tag)])
 		)
 
-	def __open_fm(self, dir_path:str):
-		fm = which("nautilus")
-		if fm is None:
-			fm = which("thunar")
-		if fm is None:
-			fm = which("pcmanfm")
-		if fm is not None:
-			run([fm, dir_path])
-		else:
+	def on_publish(self, source, n:int=0):
+		# Publish recently synced files and folders and copy their 
+		# links to the clipboard, one per line
+		disk = self.__disks[n]
+		yd_path = disk.get_yd_path()
+		paths = [
+			os.path.join(yd_path, p) 
+			for p in list(disk.get_yd_lastfiles()) + list(disk.get_yd_lastdirs())
+			]
+		if paths == []:
+			return
+		self.__menu.get_account(n).set_label("publish", _("Publishing..."))
+		Thread(target=self.__publish, args=(n, paths), daemon=True).start()
+
+	def on_search(self, source, n:int=0):
+		if self.__synced == []:
+			# Not started yet
+			return
+		YDISearchDialog(
+			self.__names[n] + ": " + _("Search synced items…"),
+			self.__synced[n],
+			lambda item, n=n: self.__open_synced(n, item)
+			)
+
+	def __open_synced(self, n:int, item):
+		# The folder itself or the one the file is in
+		from yd_synced import SYNCED_DIR_KIND
+		path = os.path.join(self.__disks[n].get_yd_path(), item.path)
+		if item.kind != SYNCED_DIR_KIND:
+			path = os.path.dirname(path)
+		self.__open_fm(path)
+
+	def on_largest(self, source, n:int=0):
+		# Scan when the submenu is first shown
+		if self.__explorers[n] is None:
+			self.on_rescan(source, n)
+
+	def on_rescan(self, source, n:int=0):
+		yd_path = self.__disks[n].get_yd_path()
+		if n in self.__scanning or yd_path == "":
+			return
+		if self.__explorers[n] is None:
+			from yd_explorer import YDIQuotaExplorer, quota_file
+			self.__explorers[n] = YDIQuotaExplorer(yd_path, quota_file(n))
+		self.__scanning.add(n)
+		self.__menu.get_account(n).set_label("largest", _("Scanning..."))
+		Thread(target=self.__scan_quota, args=(n, yd_path), daemon=True).start()
+
+	def __scan_quota(self, n:int, yd_path:str):
+		# Off the main loop
+		report = self.__explorers[n].scan(yd_path)
+		GLib.idle_add(self.__scan_quota_done, n, report)
+
+	def __scan_quota_done(self, n:int, report):
+		from yd_progress import format_size
+		self.__scanning.discard(n)
+		if report is None:
+			return False
+		account = self.__menu.get_account(n)
+		account.set_label(
+			"largest", 
+			_("%s in %d files") % (format_size(report.get_total()), report.files)
+			)
+		account.set_largest([(path, format_size(size)) for (path, size) in report.largest()])
+		events.log(EVENT_INFO, "quota_scanned", account=n, seconds=round(report.seconds, 2), listed=report.listed)
+		return False
+
+	def on_largest_folder(self, source, n:int=0):
+		self.__open_fm(os.path.join(self.__disks[n].get_yd_path(), source.tag))
+
+	def on_export_quota(self, source, n:int=0):
+		from yd_explorer import quota_file
+		explorer = self.__explorers[n]
+		if explorer is None or explorer.get_report() is None:
+			return
+		dialog = Gtk.FileChooserDialog(
+			title=_("Export to JSON..."), 
+			action=Gtk.FileChooserAction.SAVE
+			)
+		dialog.add_buttons(
+			_("Cancel"), Gtk.ResponseType.CANCEL, 
+			_("Save"), Gtk.ResponseType.OK
+			)
+		dialog.set_do_overwrite_confirmation(True)
+		dialog.set_current_name(os.path.basename(quota_file(n)))
+		if dialog.run() == Gtk.ResponseType.OK:
+			try:
+				explorer.export(dialog.get_filename())
+			except OSError as e:
+				events.log(EVENT_WARNING, "quota_export_failed", account=n, error=str(e))
+				failed = Gtk.MessageDialog(
+					flags=0,
+					message_type=Gtk.MessageType.WARNING,
+					buttons=Gtk.ButtonsType.OK,
+					text=_("The folder sizes have not been exported"),
+					)
+				failed.format_secondary_text(str(e))
+				failed.run()
+				failed.destroy()
+		dialog.destroy()
+
+	def __publish(self, n:int, paths:list):
+		# Off the main loop, results are shown as they come
+		import asyncio
+
+		disk = AsyncYandexDisk(*self.__locations[n])
+		timeout = self.__settings.get_timeout("publish")
+		results = []
+
+		async def publish_all():
+			async for result in disk.publish_many(paths, timeout=timeout):
+				results.append(result)
+				GLib.idle_add(
+					self.__menu.get_account(n).set_label, "publish", 
+					_("Publishing %d/%d...") % (len(results), len(paths))
+					)
+
+		asyncio.run(publish_all())
+		GLib.idle_add(self.__publish_done, n, results)
+
+	def __publish_done(self, n:int, results:list):
+		self.__menu.get_account(n).set_label("publish", PUBLISH_LABEL)
+		links = [r.link for r in results if r.link != ""]
+		if links != []:
+			clipboard = Gtk.Clipboard.get(Gdk.SELECTION_CLIPBOARD)
+			clipboard.set_text("\n".join(links), -1)
+
+		failed = [r for r in results if r.link == ""]
+		for r in failed:
+			events.log(EVENT_WARNING, "publish_failed", account=n, path=r.path, error=r.error)
+		if failed != []:
 			dialog = Gtk.MessageDialog(
 				flags=0,
 				message_type=Gtk.MessageType.WARNING,
 				buttons=Gtk.ButtonsType.OK,
-				text=_("File Manager not found"),
+				text=_("Some items have not been published"),
 				)
 			dialog.format_secondary_text(
-				_("Nautilus, Thunar and PCManFM file managers are suported, none found")
+				"\n".join("%s: %s" % (os.path.basename(r.path), r.error) for r in failed)
 				)
 			dialog.run()
 			dialog.destroy()
+		return False
 
-	def __do_updates(self, updates:dict):
-		def make_mi_label(s:str, l:int=37):
-			if len(s) > l:
-				s = "  " + s[0:int((l-7)/2)] + " ... " + s[-int((l-7)/2):]
-			else:
-				s = "  " + s
-			return s
-		
+	def __open_fm(self, dir_path:str):
+		# Returns as soon as the file manager is on its way
+		if self.__launcher is None:
+			from yd_launcher import YDILauncher
+			self.__launcher = YDILauncher()
+		self.__launcher.open_folder(
+			dir_path, 
+			self.__open_fm_failed,
+			Gdk.Display.get_default().get_app_launch_context()
+			)
+
+	def __open_fm_failed(self, reason:str):
+		# `reason` is None if there is no file manager. Not run() as
+		# the menu is not to wait for the user
+		if reason is None:
+			text = _("File Manager not found")
+			reason = _("Set a default file manager or install Nautilus, Thunar or PCManFM")
+		else:
+			text = _("File Manager failed to start")
+		dialog = Gtk.MessageDialog(
+			flags=0,
+			message_type=Gtk.MessageType.WARNING,
+			buttons=Gtk.ButtonsType.OK,
+			text=text,
+			)
+		dialog.format_secondary_text(reason)
+		dialog.connect("response", lambda dialog, response: dialog.destroy())
+		dialog.show()
+
+	def __do_updates(self, n:int, updates:dict, posted=None):
+		# `posted` is when __post_updates() has queued the updates,
+		# see yd_metrics
+		metrics.stop("ui.queued", posted)
+		t = metrics.start()
+		account = self.__menu.get_account(n)
 		for what in updates:
 			match what:
 				case "icon":
-					self.__indicator.set_icon(updates[what])
+					self.__icons[n] = updates[what]
+					self.__show_icon()
 
 				case ("sync_status" | "path" | "total" | "used" |
-				      "available" | "maxfile" | "trash" | "start_stop"):
-					self.__menu.set_label(what, updates[what])
-
-				case ("rfiles" | "rdirs"):
-					# Sanity check
-					value = updates[what]
-					if not isinstance(value, list):
-						raise ValueError
-					
-					# Are we updating the list of files or folders?
-					tag_to_search = (
-						lambda x: {True:"@f", False:"@d"}[x=="rfiles"]
-						)(what)
-
-					# The submenu to update
-					rsynced_submenu = self.__menu.get_rsynced_submenu()
-					
-					# Destroy all the recent files or folders listed on the menu
-					# These ones will have a tag starting with `@f` or `@d` followed 
-					# by a file or folder path relative to the Yandex Disk folder
-					for mi in rsynced_submenu.get_children():
-						if mi.tag.find(tag_to_search) == 0:
-							mi.destroy()
-
-					# Determine the staring position where 
-					# the new list will be inserted to	
-					pos = 0
-					rfiles_start_pos = 0
-					rdirs_start_pos = 0
-					for mi in rsynced_submenu.get_children():
-						if mi.tag == "@m_recent_files":
-							rfiles_start_pos = pos + 1
-						elif mi.tag == "@m_recent_folders":
-							rdirs_start_pos = pos + 1
-						pos = pos + 1
-
-					# We will insert/update the menu items with recent 
-					# files or folders staring from `pos` as position pos-1 is 
-					# occupied by `Recently synced files/folders:` menu item
-					pos = (
-						lambda x: {True:rfiles_start_pos, False:rdirs_start_pos}[x=="rfiles"]
-						)(what)
-					starting_pos = pos
-
-					# This will be the function triggered at menuitem activation 
-					activation_funct = (
-						lambda x: {True:self.on_rcfile, False:self.on_rcfolder}[x=="rfiles"]
-						)(what)
-
-					# Update menu items
-					for name_on_list in value:
-						mi = Gtk.MenuItem(label=make_mi_label(name_on_list))
-						mi.tag = tag_to_search + name_on_list
-						mi.connect("activate", activation_funct)
-						rsynced_submenu.insert(mi, pos)
-						pos = pos + 1
-
-					# Finally: if pos is still at `starting_pos`, 
-					# the `value` list was empty and we need 
-					# to create a `  (none)` item
-					if pos == starting_pos:
-						none_item = Gtk.MenuItem(label=_("  (none)"))
-						none_item.tag = tag_to_search
-						none_item.set_sensitive(False)
-						rsynced_submenu.insert(none_item, starting_pos)
-		
-					# Update the visual representation of the menu
-					rsynced_submenu.show_all()
+				      "available" | "maxfile" | "trash" | "forecast" | 
+				      "start_stop"):
+					account.set_label(what, updates[what])
 
-		return False
+				case "alert":
+					self.__alert_quota(n, updates[what])
 
-	def __update_worker(self, interval:float):
-		while self.__monitoring:
-			update_actions = {}
-			
-			old_icon        = self.__indicator.get_icon()
-			old_start_stop  = self.__menu.get_label("start_stop")
-			old_sync_status = self.__menu.get_label("sync_status")
-			old_path        = self.__menu.get_label("path")
-			old_total       = self.__menu.get_label("total")
-			old_used        = self.__menu.get_label("used")
-			old_available   = self.__menu.get_label("available")
-			old_maxfile     = self.__menu.get_label("maxfile")
-			old_trash       = self.__menu.get_label("trash")
-			old_files       = self.__menu.get_rsynced("@f")
-			old_dirs        = self.__menu.get_rsynced("@d")
-
-			self.__disk.command("status")
-			new_sync_status = self.__disk.get_sync_status()
-			
-			match new_sync_status:
-				case "idle": 
-					new_icon = "YDNormal.png"
-					new_start_stop  = STOP_LABEL
-					new_sync_status = _("idle")
-				case "busy": 
-					new_icon = "YDSync.png"
-					new_start_stop  = STOP_LABEL
-					new_sync_status = _("busy")
-				case "index": 
-					new_icon = "YDSync.png"
-					new_start_stop  = STOP_LABEL
-					new_sync_status = _("index")
-				case "paused": 
-					new_icon = "YDPaused.png"
-					new_start_stop  = STOP_LABEL
-					new_sync_status = _("paused")
-				case "error": 
-					new_icon = "YDError.png"
-					new_start_stop  = STOP_LABEL
-					new_sync_status = _("error")
-				case _: # either stopped or in `no internet access` state
-					new_icon = "YDDisconnect.png"
-					new_start_stop = START_LABEL
-					new_sync_status = _("not running")
-			
-			if old_icon != new_icon:
-				update_actions["icon"] = new_icon
-				
-			if old_start_stop != new_start_stop:
-				update_actions["start_stop"] = new_start_stop
-
-			l = self.__disk.get_sync_prog()
-			if l != "":
-				new_sync_status += "\n" + l
-			new_sync_status = _("Status: ") + new_sync_status
-			if new_sync_status != old_sync_status:
-				update_actions["sync_status"] = new_sync_status
-
-			l = self.__disk.get_yd_path()
-			if l != old_path:
-				update_actions["path"] = l
-
-			l = _("Total: ") + self.__disk.get_yd_total()
-			if l != old_total:
-				update_actions["total"] = l
-				
-			l = _("Used: ") + self.__disk.get_yd_used()
-			if l != old_used:
-				update_actions["used"] = l
-				
-			l = _("Available: ") + self.__disk.get_yd_available()
-			if l != old_available:
-				update_actions["available"] = l
-				
-			l = _("Max file: ") + self.__disk.get_yd_maxfile()
-			if l != old_maxfile:
-				update_actions["maxfile"] = l
-				
-			l = _("Trash: ") + self.__disk.get_yd_trash()
-			if l != old_trash:
-				update_actions["trash"] = l
-
-			new_files = self.__disk.get_yd_lastfiles()
-			if new_files != old_files:
-				update_actions["rfiles"] = new_files
-
-			new_dirs = self.__disk.get_yd_lastdirs()
-			if new_dirs != old_dirs:
-				update_actions["rdirs"] = new_dirs
-
-			if update_actions != {}:
-				GLib.idle_add(
-					self.__do_updates,
-					update_actions,
-					priority=GLib.PRIORITY_HIGH
-				)
+				case "rfiles":
+					account.set_rsynced(RSYNCED_FILES, updates[what])
+
+				case "rdirs":
+					account.set_rsynced(RSYNCED_DIRS, updates[what])
+
+		metrics.stop("ui.updates", t)
+
+		if self.__profiler is not None:
+			self.__profiler.mark("first status")
+			print(self.__profiler.report())
+			self.__profiler = None
+			self.on_quit(None)
 
-			sleep(interval)
+		return False
+
+	def __alert_quota(self, n:int, warning:str):
+		# Tell the user once the quota is running out, `warning` is 
+		# what YDIQuotaForecast.get_warning() says
+		events.log(EVENT_WARNING, "quota_alert", account=n, reason=warning)
+		if warning == "percent":
+			body = _("%s is almost full.") % self.__names[n]
+		else:
+			body = _("%s is going to be full soon.") % self.__names[n]
+		forecast = self.__menu.get_account(n).get_label("forecast")
+		if forecast != "":
+			body += " " + forecast + "."
+		notify(_("Yandex Disk is running out of space"), body)
+
+	def __post_status(self, n:int, status:YDStatus):
+		# Called by the status updater off the main thread with every
+		# new status, D-Bus has more of it than the menu shows
+		if self.__dbus != []:
+			GLib.idle_add(self.__dbus[n].update, status, priority=GLib.PRIORITY_HIGH)
+
+	def __post_updates(self, n:int, updates:dict):
+		# Called by the status updater off the main thread
+		GLib.idle_add(
+			self.__do_updates,
+			n,
+			updates,
+			metrics.start(),
+			priority=GLib.PRIORITY_HIGH
+		)
@@ -17,8 +17,20 @@
 """
 
 from shutil import which
-from subprocess import check_output, CalledProcessError
+from subprocess import check_output, CalledProcessError, TimeoutExpired, STDOUT
+from typing import NamedTuple
+from select import select
+from enum import Enum
+import os
 from os import environ
+from time import perf_counter, monotonic
+import re
+import ctypes
+import struct
+
+from yd_metrics import metrics
+from yd_events import events, EVENT_DEBUG, EVENT_WARNING
+from yd_executor import YDICommandExecutor, PRIORITY_USER, PRIORITY_POLL
 
 SYNC_PROG = 'Sync progress'
 SYNC_STATUS = 'Synchronization core status'
@@ -31,90 +43,350 @@ YD_TRASH = 'Trash size'
 YD_LASTFILES = 'file'
 YD_LASTDIRS = 'directory'
 
+# The daemon records its sync status in this file relative
+# to the Yandex Disk folder, see `man yandex-disk`
+YD_STATUS_FILE = os.path.join(".sync", "status")
+
+YD_ERROR = 'Error'
+
+# Sizes as yandex-disk prints them, e.g. "12.5 GB"
+SIZE_UNITS = {"B": 1, "KB": 1 << 10, "MB": 1 << 20, "GB": 1 << 30, "TB": 1 << 40}
+
+# Sync progress as yandex-disk prints it, e.g. "1.2 MB/ 15.75 MB (7 %)"
+SYNC_PROG_RE = re.compile(
+	r"([\d.]+)\s*([KMGT]?B)\s*/\s*([\d.]+)\s*([KMGT]?B)(?:\s*\((\d+)\s*%\))?"
+	)
+
+class SyncState(Enum):
+	IDLE = "idle"
+	BUSY = "busy"
+	INDEX = "index"
+	PAUSED = "paused"
+	ERROR = "error"
+	# Any other state the daemon reports, e.g. `no internet access`
+	OTHER = "other"
+	# No sync core status at all, the daemon is not running
+	STOPPED = ""
+
+SYNC_STATE_OF = {state.value: state for state in SyncState}
+
+def parse_size(size:str):
+	# "12.5 GB" to bytes, None if it cannot be understood
+	(number, _, unit) = size.partition(" ")
+	try:
+		return int(float(number) * SIZE_UNITS[unit.strip()])
+	except (ValueError, KeyError):
+		return None
+
+class YDStatus:
+	# yandex-disk status details, e.g. sync core status, 
+	# last synced files, etc. Records are never changed once
+	# parsed, a new status makes a new record. Sizes are kept 
+	# both as printed and in bytes (None if unknown)
+	__slots__ = (
+		"sync_status", "sync_state", 
+		"sync_prog", "sync_done", "sync_total", "sync_percent",
+		"path", "error",
+		"total", "used", "available", "maxfile", "trash",
+		"total_bytes", "used_bytes", "available_bytes", 
+		"maxfile_bytes", "trash_bytes",
+		"lastfiles", "lastdirs"
+	)
+
+	def __init__(self):
+		self.sync_status = ""
+		self.sync_state = SyncState.STOPPED
+		self.sync_prog = ""
+		self.sync_done = None
+		self.sync_total = None
+		self.sync_percent = None
+		self.path = ""
+		self.error = ""
+		self.total = ""
+		self.used = ""
+		self.available = ""
+		self.maxfile = ""
+		self.trash = ""
+		self.total_bytes = None
+		self.used_bytes = None
+		self.available_bytes = None
+		self.maxfile_bytes = None
+		self.trash_bytes = None
+		self.lastfiles = ()
+		self.lastdirs = ()
+
+	def with_sync_status(self, sync_status:str):
+		# A copy of this record with another sync core status
+		status = YDStatus()
+		for slot in self.__slots__:
+			setattr(status, slot, getattr(self, slot))
+		status.sync_status = sync_status
+		status.sync_state = SYNC_STATE_OF.get(sync_status, SyncState.OTHER)
+		return status
+
+# Status keys and YDStatus slots they go to
+STATUS_SLOTS = {
+	SYNC_STATUS: "sync_status",
+	SYNC_PROG: "sync_prog",
+	YD_PATH: "path",
+	YD_ERROR: "error",
+	YD_TOTAL: "total",
+	YD_USED: "used",
+	YD_AVAILABLE: "available",
+	YD_MAXFILE: "maxfile",
+	YD_TRASH: "trash"
+}
+
+def parse_status(raw:str):
+	# Turn `yandex-disk status` output into a YDStatus record
+	# in a single pass over its lines
+	status = YDStatus()
+	lastfiles = []
+	lastdirs = []
+	for l in raw.splitlines():
+		(key, _, value) = l.partition(":")
+		key = key.strip()
+		if key == YD_LASTFILES:
+			lastfiles.append(value.strip().strip("'"))
+		elif key == YD_LASTDIRS:
+			lastdirs.append(value.strip().strip("'"))
+		else:
+			slot = STATUS_SLOTS.get(key)
+			if slot is not None:
+				setattr(status, slot, value.strip().strip("'"))
+
+	status.sync_state = SYNC_STATE_OF.get(status.sync_status, SyncState.OTHER)
+	status.lastfiles = tuple(lastfiles)
+	status.lastdirs = tuple(lastdirs)
+	if status.total != "":
+		status.total_bytes = parse_size(status.total)
+	if status.used != "":
+		status.used_bytes = parse_size(status.used)
+	if status.available != "":
+		status.available_bytes = parse_size(status.available)
+	if status.maxfile != "":
+		status.maxfile_bytes = parse_size(status.maxfile)
+	if status.trash != "":
+		status.trash_bytes = parse_size(status.trash)
+	if status.sync_prog != "":
+		m = SYNC_PROG_RE.search(status.sync_prog)
+		if m is not None:
+			status.sync_done = int(float(m[1]) * SIZE_UNITS[m[2]])
+			status.sync_total = int(float(m[3]) * SIZE_UNITS[m[4]])
+			if m[5] is not None:
+				status.sync_percent = int(m[5])
+	return status
+
+# Public links yandex-disk prints for published files and folders
+YD_LINK_RE = re.compile(r"https?://\S+")
+
+# Files and folders published at once by publish_many()
+PUBLISH_CONCURRENCY = 4
+
+class YDPublishResult(NamedTuple):
+	# A path published or unpublished with its public link, or 
+	# the error yandex-disk has reported. `link` is "" for a
+	# path unpublished successfully
+	path: str
+	link: str
+	error: str
+
+def parse_publish(path:str, output:str, unpublish:bool=False):
+	# Turn `yandex-disk publish` or `unpublish` output into 
+	# a YDPublishResult
+	error = next(
+		(l.strip() for l in output.splitlines() if l.startswith(YD_ERROR)),
+		None
+		)
+	if error is not None:
+		return YDPublishResult(path, "", error)
+	if unpublish:
+		return YDPublishResult(path, "", "")
+	m = YD_LINK_RE.search(output)
+	if m is None:
+		return YDPublishResult(path, "", output.strip())
+	return YDPublishResult(path, m[0], "")
+
+def publish_args(path:str, overwrite:bool=False):
+	# `--overwrite` makes yandex-disk copy a file into the Yandex 
+	# Disk folder even if one with the same name is there already
+	return (["--overwrite"] if overwrite else []) + [path]
+
 class NoYDCLI(Exception):
 	pass
 
 class InvalidYDCmd(Exception):
 	pass
 
+def yd_options(config:str=None, dir:str=None):
+	# yandex-disk command line options to run a daemon with its own
+	# configuration file and Yandex Disk folder, e.g. for a second 
+	# account. None means yandex-disk defaults
+	options = []
+	if config is not None:
+		options.append("--config=" + os.path.expanduser(config))
+	if dir is not None:
+		options.append("--dir=" + os.path.expanduser(dir))
+	return options
+
 class YandexDisk:
 	# yandex-disk CLI instance as returned by 
 	# `which yandex-disk`
 	__cli = None
 
-	# yandex-disk status details, e.g. sync core status, 
-	# last synced files, etc.
+	# Options added to every command, see yd_options()
+	__options:list = None
+
+	# yandex-disk status details as last parsed.
 	# Anything except 'idle', 'busy', 'index', 'paused' 
-	# for SYNC_STATUS indicates an error.
-	__status = {}
+	# for sync core status indicates an error.
+	__status:YDStatus = None
 
-	def __init__(self):
+	# Runs yandex-disk commands one at a time, so that no two of them 
+	# race each other
+	__executor:YDICommandExecutor = None
+
+	# Seconds a command may take before it is killed, None for no limit
+	__timeout = None
+
+	# Number of `status` commands run and the seconds they have taken
+	__status_calls = 0
+	__status_seconds = 0.0
+
+	def __init__(self, config:str=None, dir:str=None):
 		self.__cli = which("yandex-disk")
 		if self.__cli is None:
 			raise NoYDCLI
+		self.__options = yd_options(config, dir)
+		self.__status = YDStatus()
+		self.__executor = YDICommandExecutor(self.__run)
+
+	def get_options(self):
+		return self.__options
+
+	def set_timeout(self, timeout:float):
+		self.__timeout = timeout
+
+	def get_status(self):
+		return self.__status
+
+	def get_status_calls(self):
+		# (number of `status` commands run, seconds they have taken)
+		return (self.__status_calls, self.__status_seconds)
 
 	def get_sync_status(self):
-		if SYNC_STATUS in self.__status:
-			return self.__status[SYNC_STATUS]
-		else:
-			return ""
+		return self.__status.sync_status
 
 	def get_sync_prog(self):
-		if SYNC_PROG in self.__status:
-			return self.__status[SYNC_PROG]
-		else:
-			return ""
+		return self.__status.sync_prog
 
 	def get_yd_path(self):
-		if YD_PATH in self.__status:
-			return self.__status[YD_PATH]
-		else:
-			return ""
+		return self.__status.path
 
 	def get_yd_total(self):
-		if YD_TOTAL in self.__status:
-			return self.__status[YD_TOTAL]
-		else:
-			return ""
+		return self.__status.total
 
 	def get_yd_used(self):
-		if YD_USED in self.__status:
-			return self.__status[YD_USED]
-		else:
-			return ""
+		return self.__status.used
 
 	def get_yd_available(self):
-		if YD_AVAILABLE in self.__status:
-			return self.__status[YD_AVAILABLE]
-		else:
-			return ""
+		return self.__status.available
 
 	def get_yd_maxfile(self):
-		if YD_MAXFILE in self.__status:
-			return self.__status[YD_MAXFILE]
-		else:
-			return ""
+		return self.__status.maxfile
 
 	def get_yd_trash(self):
-		if YD_TRASH in self.__status:
-			return self.__status[YD_TRASH]
-		else:
-			return ""
+		return self.__status.trash
 
 	def get_yd_lastfiles(self):
-		if YD_LASTFILES in self.__status:
-			return self.__status[YD_LASTFILES]
-		else:
-			return []
+		return self.__status.lastfiles
 
 	def get_yd_lastdirs(self):
-		if YD_LASTDIRS in self.__status:
-			return self.__status[YD_LASTDIRS]
-		else:
-			return []
+		return self.__status.lastdirs
 		
-	def command(self, cmd:str, args:list=[]):
-		cli_cmd = [self.__cli, cmd]
+	def load_status(self, raw:str):
+		# Interpret the contents of the daemon's `.sync/status` file.
+		# A full status report replaces the current status as 
+		# `status` command would do. If the file only names the sync
+		# core state, just that state is updated and the rest of the
+		# last report is kept. Returns True in the former case
+		if SYNC_STATUS in raw:
+			self.__interpret_status(raw)
+			return True
+		# The state may be several words, e.g. `no internet access`
+		lines = raw.strip().splitlines()
+		if len(lines) > 0 and lines[0].strip() != self.__status.sync_status:
+			status = self.__status.with_sync_status(lines[0].strip())
+			# Sync progress comes with full reports only and belongs
+			# to the state it was reported in
+			status.sync_prog = ""
+			status.sync_done = None
+			status.sync_total = None
+			status.sync_percent = None
+			self.__status = status
+		return False
+
+	def command(self, cmd:str, args:list=[], priority:int=PRIORITY_USER):
+		# Run a yandex-disk command and return its output. This blocks
+		# until the commands ahead of it in the queue have run as well,
+		# see command_async() for the main loop
+		self.__check(cmd)
+		t = metrics.start()
+		output = self.__executor.call(cmd, args, priority)
+		if t is not None:
+			metrics.stop("command." + cmd, t)
+		return output
+
+	def command_async(self, cmd:str, args:list=[], priority:int=PRIORITY_USER, 
+	                  callback=None):
+		# Queue a yandex-disk command and return at once. `callback` 
+		# is called with the output off the main thread. The same 
+		# command queued twice runs once, start and stop cancel each
+		# other out leaving the later one
+		self.__check(cmd)
+		self.__executor.submit(cmd, args, priority, callback)
+
+	def publish(self, path:str, overwrite:bool=False):
+		# Publish a file or folder and return a YDPublishResult with
+		# its public link. See AsyncYandexDisk.publish_many() to 
+		# publish many of them
+		output = self.command("publish", publish_args(path, overwrite))
+		return parse_publish(path, output)
+
+	def unpublish(self, path:str):
+		return parse_publish(path, self.command("unpublish", [path]), unpublish=True)
+
+	def __check(self, cmd:str):
+		match cmd:
+			case ("setup" | "start" | "stop" | "sync" | "-v" | "status" |
+			      "token" | "publish" | "unpublish"):
+				pass
+			case _:
+				raise InvalidYDCmd
+
+	def __run(self, cmd:str, args:list):
+		# Runs for every status poll, so names and fields for metrics
+		# and events are only put together if they are on
+		t = metrics.start()
+		if t is not None:
+			metrics.count("cli." + cmd)
+		started = perf_counter()
+		try:
+			return self.__run_cli(cmd, args)
+		finally:
+			seconds = perf_counter() - started
+			if t is not None:
+				metrics.stop("cli." + cmd, t)
+			if cmd == "status":
+				self.__status_calls += 1
+				self.__status_seconds += seconds
+			if events.is_logged(EVENT_DEBUG):
+				events.log(EVENT_DEBUG, "command", cmd=cmd, args=args, ms=round(seconds * 1000, 1))
+
+	def __run_cli(self, cmd:str, args:list):
+		cli_cmd = [self.__cli, cmd] + args
+		if cmd != "-v":
+			cli_cmd += self.__options
 
 		# It is essential to set LANG for each call as yandex-disk
 		# starts giving console messages in Russian if the Russian
@@ -127,44 +399,503 @@ class YandexDisk:
 				res = ""
 			case ("start" | "stop" | "sync" | "-v"):
 				try: 
-					res = check_output(cli_cmd, env=env).decode("utf-8")
+					res = check_output(cli_cmd, env=env, timeout=self.__timeout).decode("utf-8")
 				except CalledProcessError as e:
 					res = e.output.decode("utf-8")
+				except TimeoutExpired:
+					events.log(EVENT_WARNING, "command_timeout", cmd=cmd)
+					res = ""
 			case "status":
 				try: 
-					res = check_output(cli_cmd, env=env).decode("utf-8")
+					res = check_output(cli_cmd, env=env, timeout=self.__timeout).decode("utf-8")
 				except CalledProcessError as e:
 					# The result in this case is really unused now.
 					# Being unable to interpret the status, YDIndicator
 					# will fall back to displaying a gray `disconnected`
 					# state icon
 					res = e.output.decode("utf-8")
+				except TimeoutExpired:
+					events.log(EVENT_WARNING, "command_timeout", cmd=cmd)
+					res = ""
 				self.__interpret_status(res)
 			case "token":
+				# Both `setup` and `token` ask the user questions on 
+				# the terminal, there is nobody to answer them here
 				res = ""
-			case "publish":
-				res = ""
-			case "unpublish":
-				res = ""
+			case ("publish" | "unpublish"):
+				# Errors are on stderr, and they are the answer 
+				try: 
+					res = check_output(cli_cmd, env=env, stderr=STDOUT, timeout=self.__timeout).decode("utf-8")
+				except CalledProcessError as e:
+					res = e.output.decode("utf-8")
+				except TimeoutExpired:
+					events.log(EVENT_WARNING, "command_timeout", cmd=cmd)
+					res = ""
 			case _:
 				raise InvalidYDCmd
 		return res
 
 	def __interpret_status(self, raw:str):
-		self.__status = {}
-		for l in raw.splitlines():
-			if l == "":
+		t = metrics.start()
+		self.__status = parse_status(raw)
+		metrics.stop("parse.status", t)
+
+
+
+# asyncio client ---------------------------------------------
+#
+class AsyncYandexDisk:
+	# yandex-disk CLI commands for asyncio programs. Unlike YandexDisk
+	# there is no shared status here: every call returns its own 
+	# result, so any number of calls can be in flight at once. 
+	# Cancelling a call or running out of its `timeout` (in seconds)
+	# kills the yandex-disk process it has started
+
+	# yandex-disk CLI instance as returned by 
+	# `which yandex-disk`
+	__cli = None
+
+	# Options added to every command, see yd_options()
+	__options:list = None
+
+	def __init__(self, config:str=None, dir:str=None):
+		self.__cli = which("yandex-disk")
+		if self.__cli is None:
+			raise NoYDCLI
+		self.__options = yd_options(config, dir)
+
+	async def status(self, timeout:float=None):
+		# Returns yandex-disk status details as a YDStatus record
+		return parse_status(await self.command("status", timeout=timeout))
+
+	async def command(self, cmd:str, args:list=[], timeout:float=None):
+		match cmd:
+			case ("start" | "stop" | "sync" | "-v" | "status" |
+			      "publish" | "unpublish"):
+				pass
+			case ("setup" | "token"):
+				return ""
+			case _:
+				raise InvalidYDCmd
+
+		# See YandexDisk.command() on why LANG is set
+		env = dict(environ)
+		env["LANG"] = "C.UTF-8"
+
+		# asyncio is only imported when it is used, it takes longer
+		# to load than the rest of YDI
+		import asyncio
+
+		options = self.__options if cmd != "-v" else []
+		proc = await asyncio.create_subprocess_exec(
+			self.__cli, cmd, *args, *options,
+			stdout=asyncio.subprocess.PIPE,
+			stderr=asyncio.subprocess.STDOUT if cmd in ["publish", "unpublish"] else None,
+			env=env
+			)
+		try:
+			(out, _) = await asyncio.wait_for(proc.communicate(), timeout)
+		except BaseException: # timeout or cancellation
+			if proc.returncode is None:
+				proc.kill()
+				await asyncio.shield(proc.wait())
+			raise
+		# A non-zero exit code still comes with a message as with
+		# CalledProcessError.output in YandexDisk.command()
+		return out.decode("utf-8")
+
+	async def publish(self, path:str, overwrite:bool=False, timeout:float=None):
+		output = await self.command("publish", publish_args(path, overwrite), timeout)
+		return parse_publish(path, output)
+
+	async def unpublish(self, path:str, timeout:float=None):
+		output = await self.command("unpublish", [path], timeout)
+		return parse_publish(path, output, unpublish=True)
+
+	async def publish_many(self, paths:list, overwrite:bool=False, 
+	                       concurrency:int=PUBLISH_CONCURRENCY, timeout:float=None):
+		# Publish files and folders, at most `concurrency` at a time,
+		# yielding a YDPublishResult for each as soon as it is done.
+		# `timeout` applies to each of them
+		async for result in self.__many(paths, concurrency, 
+		                                lambda path: self.publish(path, overwrite, timeout)):
+			yield result
+
+	async def unpublish_many(self, paths:list, concurrency:int=PUBLISH_CONCURRENCY, 
+	                         timeout:float=None):
+		async for result in self.__many(paths, concurrency, 
+		                                lambda path: self.unpublish(path, timeout)):
+			yield result
+
+	async def __many(self, paths:list, concurrency:int, one):
+		import asyncio
+
+		semaphore = asyncio.Semaphore(concurrency)
+
+		async def run(path):
+			async with semaphore:
+				try:
+					return await one(path)
+				except asyncio.TimeoutError:
+					return YDPublishResult(path, "", "timed out")
+
+		tasks = [asyncio.ensure_future(run(path)) for path in paths]
+		try:
+			for task in asyncio.as_completed(tasks):
+				yield await task
+		finally:
+			# Those not done yet if the caller has stopped early
+			for task in tasks:
+				task.cancel()
+
+
+# inotify(7) interface ---------------------------------------
+#
+# Only the few bits we need are wrapped with ctypes so that 
+# watching files brings in no dependencies
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM  = 0x00000040
+IN_MOVED_TO    = 0x00000080
+IN_DELETE      = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF   = 0x00000800
+IN_IGNORED     = 0x00008000
+
+INOTIFY_EVENT = struct.Struct("iIII")
+
+class Inotify:
+	__libc = None
+
+	# inotify file descriptor
+	__fd = -1
+
+	def __init__(self):
+		# libc is loaded already, so look the calls up in the running
+		# process rather than have ctypes.util.find_library() spawn
+		# ldconfig to find it
+		try:
+			self.__libc = ctypes.CDLL(None, use_errno=True)
+			self.__fd = self.__libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+		except AttributeError: # not Linux
+			raise OSError("inotify is not available")
+		if self.__fd < 0:
+			errno = ctypes.get_errno()
+			raise OSError(errno, os.strerror(errno))
+
+	def fileno(self):
+		return self.__fd
+
+	def add_watch(self, path:str, mask:int):
+		wd = self.__libc.inotify_add_watch(
+			self.__fd, 
+			os.fsencode(path), 
+			ctypes.c_uint32(mask)
+			)
+		if wd < 0:
+			errno = ctypes.get_errno()
+			raise OSError(errno, os.strerror(errno), path)
+		return wd
+
+	def rm_watch(self, wd:int):
+		self.__libc.inotify_rm_watch(self.__fd, wd)
+
+	def read(self, timeout:float):
+		# Wait up to `timeout` seconds for events, return a list 
+		# of (wd, mask, name) tuples, empty if nothing has happened
+		(ready, _, _) = select([self.__fd], [], [], timeout)
+		if not ready:
+			return []
+		try:
+			buf = os.read(self.__fd, 4096)
+		except BlockingIOError:
+			return []
+		events = []
+		pos = 0
+		while pos + INOTIFY_EVENT.size <= len(buf):
+			(wd, mask, _, name_len) = INOTIFY_EVENT.unpack_from(buf, pos)
+			pos += INOTIFY_EVENT.size
+			name = buf[pos:pos + name_len].rstrip(b"\0").decode("utf-8", "replace")
+			pos += name_len
+			events.append((wd, mask, name))
+		return events
+
+	def close(self):
+		if self.__fd >= 0:
+			os.close(self.__fd)
+			self.__fd = -1
+
+
+# Event driven status source ---------------------------------
+#
+# Options telling one yandex-disk daemon from another
+YD_INSTANCE_OPTIONS = ["--config", "-c", "--dir", "-d"]
+
+def find_yd_daemon(pid:int=None, options:list=[]):
+	# Look for a running yandex-disk daemon of the current user in 
+	# /proc without spawning anything. A known `pid` is checked
+	# first, so that the full scan is only done when it is gone.
+	# With several daemons running, the one started with `options`
+	# (see yd_options()) is looked for. Returns the daemon PID or None
+	def is_yd(pid):
+		try:
+			if os.stat("/proc/%d" % pid).st_uid != os.getuid():
+				return False
+			with open("/proc/%d/comm" % pid, "r") as comm:
+				if comm.read().strip() != "yandex-disk":
+					return False
+			with open("/proc/%d/cmdline" % pid, "rb") as cmdline:
+				args = os.fsdecode(cmdline.read()).split("\0")
+		except OSError:
+			return False
+		if options != []:
+			return all(option in args for option in options)
+		# The default daemon is the one without any of these
+		return not any(
+			arg.split("=")[0] in YD_INSTANCE_OPTIONS for arg in args
+			)
+
+	if pid is not None and is_yd(pid):
+		return pid
+	try:
+		for entry in os.listdir("/proc"):
+			if entry.isdigit() and is_yd(int(entry)):
+				return int(entry)
+	except OSError:
+		pass
+	return None
+
+# Sync core states a status file naming just the state is followed
+# by `yandex-disk status` for, to learn the quota, recently synced
+# lists or the error once they change
+CLI_REFRESH_STATES = [SyncState.IDLE, SyncState.ERROR, SyncState.OTHER]
+
+class YDStatusWatcher:
+	# Keeps the status of a YandexDisk instance up to date by watching
+	# the daemon's `.sync/status` file with inotify. The file is 
+	# re-read only when it changes. `yandex-disk status` is run
+	# initially to learn where the Yandex Disk folder is, whenever 
+	# the status file is missing, when the daemon starts or stops and,
+	# if the file does not carry a full report, when the sync core 
+	# state changes to one of CLI_REFRESH_STATES, but not again
+	# within `cli_gap` seconds. In case all of that misses something,
+	# e.g. the daemon process is not found, `yandex-disk status` is
+	# also run every `cli_poll` seconds at the least
+
+	__disk:YandexDisk = None
+
+	# inotify instance, None if inotify is not available
+	__inotify:Inotify = None
+
+	# Watch descriptor of the `.sync` folder
+	__wd = None
+	__sync_dir = ""
+
+	# Whether the status file is there to be read and 
+	# if it holds full status reports
+	__file_present = False
+	__file_full = False
+
+	# PID of the running yandex-disk daemon, None if not running
+	__daemon_pid = None
+
+	# Set to run `yandex-disk status` on the next update
+	__refresh = True
+
+	# Longest time between two `yandex-disk status` runs, None for 
+	# no limit, and when it has last run (monotonic time)
+	__cli_poll = None
+	__cli_polled = 0.0
+
+	# Shortest time between two runs for a sync core state change,
+	# and whether one is due once that time is up
+	__cli_gap = 0
+	__cli_due = False
+
+	# Pipe to interrupt waiting in update()
+	__wakeup_r = -1
+	__wakeup_w = -1
+
+	def __init__(self, disk:YandexDisk, cli_poll:float=None, cli_gap:float=0):
+		self.__disk = disk
+		self.__cli_poll = cli_poll
+		self.__cli_gap = cli_gap
+		try:
+			self.__inotify = Inotify()
+		except OSError:
+			self.__inotify = None
+		(self.__wakeup_r, self.__wakeup_w) = os.pipe2(os.O_NONBLOCK | os.O_CLOEXEC)
+
+	def set_cli_poll(self, cli_poll:float, cli_gap:float=0):
+		self.__cli_poll = cli_poll
+		self.__cli_gap = cli_gap
+
+	def is_watching(self):
+		# Whether the status file is watched, otherwise the CLI is
+		# polled at every update
+		return self.__wd is not None
+
+	def invalidate(self):
+		# Have update() read the status right away, waking it up
+		# if it is waiting
+		self.__refresh = True
+		self.interrupt()
+
+	def interrupt(self):
+		# Make a waiting update() return early
+		try:
+			os.write(self.__wakeup_w, b"\0")
+		except (BlockingIOError, OSError):
+			pass
+
+	def update(self, timeout:float):
+		# Wait up to `timeout` seconds for the daemon status to change
+		# and refresh the disk status. Returns True if it may have 
+		# changed, False if nothing has happened or if interrupted
+		if not self.__refresh:
+			if self.__cli_due:
+				# Wake up for the refresh held back by `cli_gap`
+				timeout = max(0, min(timeout, self.__cli_gap_left()))
+			(interrupted, events) = self.__wait(timeout)
+			if interrupted and not self.__refresh:
+				return False
+
+		if self.__refresh:
+			self.__refresh = False
+			self.__poll_cli()
+			return True
+
+		if self.__wd is None:
+			# Nothing to watch, this is the plain old polling
+			self.__poll_cli()
+			return True
+
+		changed = False
+		for (wd, mask, name) in events:
+			if wd != self.__wd:
 				continue
+			if mask & (IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF):
+				# The `.sync` folder itself is gone
+				self.__unwatch()
+				changed = True
+			elif name == "status":
+				changed = True
+
+		if self.__wd is None:
+			self.__poll_cli()
+			return True
+
+		if changed:
+			self.__read_status_file()
+			return True
+
+		# Nothing was written to the status file. The daemon might 
+		# have died in the meantime though, so check that cheaply
+		pid = find_yd_daemon(self.__daemon_pid, self.__disk.get_options())
+		if (pid is None) != (self.__daemon_pid is None):
+			self.__poll_cli()
+			return True
+		self.__daemon_pid = pid
+
+		if not self.__file_present:
+			self.__poll_cli()
+			return True
+
+		if self.__cli_due and self.__cli_gap_left() <= 0:
+			self.__poll_cli()
+			return True
+
+		if self.__cli_poll is not None and monotonic() - self.__cli_polled >= self.__cli_poll:
+			metrics.count("status.safety_poll")
+			self.__poll_cli()
+			return True
+
+		return False
+
+	def close(self):
+		self.__unwatch()
+		if self.__inotify is not None:
+			self.__inotify.close()
+			self.__inotify = None
+		os.close(self.__wakeup_r)
+		os.close(self.__wakeup_w)
+
+	def __wait(self, timeout:float):
+		# Returns a tuple of the interrupted flag and inotify events
+		fds = [self.__wakeup_r]
+		if self.__wd is not None:
+			fds.append(self.__inotify.fileno())
+		(ready, _, _) = select(fds, [], [], timeout)
+		interrupted = self.__wakeup_r in ready
+		if interrupted:
 			try:
-				(key, value) = l.split(sep=":", maxsplit=1)
-			except:
-				(key, value) = (l, "")
-			key = key.strip("\t").strip()
-			value = value.strip("\t").strip().strip("'")
-			if key in [YD_LASTFILES, YD_LASTDIRS]:
-				if key in self.__status:
-					self.__status[key].append(value)
-				else:
-					self.__status[key] = [value]
-			else:
-				self.__status[key] = value
+				while os.read(self.__wakeup_r, 64):
+					pass
+			except BlockingIOError:
+				pass
+		events = []
+		if self.__wd is not None and self.__inotify.fileno() in ready:
+			events = self.__inotify.read(0)
+		return (interrupted, events)
+
+	def __cli_gap_left(self):
+		return self.__cli_polled + self.__cli_gap - monotonic()
+
+	def __poll_cli(self):
+		self.__cli_polled = monotonic()
+		self.__cli_due = False
+		self.__disk.command("status", priority=PRIORITY_POLL)
+		self.__daemon_pid = find_yd_daemon(
+			self.__daemon_pid, 
+			self.__disk.get_options()
+			)
+		self.__watch(self.__disk.get_yd_path())
+		self.__file_present = os.path.isfile(
+			os.path.join(self.__disk.get_yd_path(), YD_STATUS_FILE)
+			)
+
+	def __read_status_file(self):
+		metrics.count("status.file")
+		try:
+			with open(os.path.join(self.__sync_dir, "status"), "r") as f:
+				raw = f.read()
+		except OSError:
+			# Missing, fall back to the CLI
+			self.__poll_cli()
+			return
+
+		self.__file_present = True
+		old_state = self.__disk.get_sync_status()
+		self.__file_full = self.__disk.load_status(raw)
+		if not self.__file_full:
+			# Only the sync core state is in the file. The rest only
+			# changes when a sync is over, or says what the error is,
+			# and a daemon flipping states is not asked every time
+			state = self.__disk.get_status().sync_state
+			if (self.__disk.get_sync_status() != old_state and 
+			    state in CLI_REFRESH_STATES):
+				self.__cli_due = True
+			if self.__cli_due and self.__cli_gap_left() <= 0:
+				self.__poll_cli()
+
+	def __watch(self, yd_path:str):
+		if self.__inotify is None or yd_path == "":
+			return
+		sync_dir = os.path.dirname(os.path.join(yd_path, YD_STATUS_FILE))
+		if self.__wd is not None and sync_dir == self.__sync_dir:
+			return
+		self.__unwatch()
+		try:
+			self.__wd = self.__inotify.add_watch(
+				sync_dir, 
+				IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE | 
+				IN_DELETE_SELF | IN_MOVE_SELF
+				)
+			self.__sync_dir = sync_dir
+		except OSError:
+			self.__wd = None
+
+	def __unwatch(self):
+		if self.__wd is not None:
+			self.__inotify.rm_watch(self.__wd)
+			self.__wd = None
+			self.__sync_dir = ""
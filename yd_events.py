@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+
+"""
+	This file is part of Yandex Disk indicator and control (YDI).
+
+	Copyright 2025 Dandelion Systems <dandelion.systems@gmail.com>
+
+	YDI is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	YDI is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. 
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+"""
+
+from collections import deque
+from threading import Lock
+from time import time, strftime, localtime
+import json
+import os
+
+# Event levels, an event is kept if its level is at least the
+# level set. EVENT_OFF keeps none
+EVENT_DEBUG = 10
+EVENT_INFO = 20
+EVENT_WARNING = 30
+EVENT_ERROR = 40
+EVENT_OFF = 100
+
+# Level names as in the "events" setting
+EVENT_LEVELS = {
+	"debug": EVENT_DEBUG,
+	"info": EVENT_INFO,
+	"warning": EVENT_WARNING,
+	"error": EVENT_ERROR,
+	"off": EVENT_OFF
+}
+EVENT_LEVEL_NAMES = {level: name for (name, level) in EVENT_LEVELS.items()}
+
+# Events kept in memory
+EVENTS_CAPACITY = 1000
+
+# The file is rotated once it grows over this many bytes, keeping
+# this many older files as <file>.1, <file>.2...
+EVENTS_FILE_MAX_BYTES = 1 << 20
+EVENTS_FILE_BACKUPS = 3
+
+class YDIEvent:
+	__slots__ = ("time", "level", "event", "fields")
+
+	def __init__(self, time:float, level:int, event:str, fields:dict):
+		self.time = time
+		self.level = level
+		self.event = event
+		self.fields = fields
+
+	def to_json(self):
+		record = {
+			"time": round(self.time, 3),
+			"level": EVENT_LEVEL_NAMES.get(self.level, str(self.level)),
+			"event": self.event
+			}
+		record.update(self.fields)
+		return json.dumps(record, ensure_ascii=False, default=str)
+
+	def __str__(self):
+		return "%s %-7s %s %s" % (
+			strftime("%H:%M:%S", localtime(self.time)),
+			EVENT_LEVEL_NAMES.get(self.level, str(self.level)),
+			self.event,
+			" ".join("%s=%s" % item for item in self.fields.items())
+			)
+
+class YDIEventLog:
+	# Recent events, e.g. state changes, commands run and errors, each
+	# a name and a few fields. They are kept in a ring buffer and, if
+	# a file is set, appended to it as JSON lines. With the level at
+	# EVENT_OFF, which is the default, log() returns after a single
+	# comparison:
+	#
+	#	events.log(EVENT_INFO, "state", account=n, state="busy")
+
+	__level = EVENT_OFF
+
+	__ring:deque = None
+
+	# JSON lines file, None for memory only
+	__path = None
+	__file = None
+	__max_bytes = EVENTS_FILE_MAX_BYTES
+	__backups = EVENTS_FILE_BACKUPS
+
+	# Events come from several threads
+	__lock:Lock = None
+
+	def __init__(self, capacity:int=EVENTS_CAPACITY):
+		self.__ring = deque(maxlen=capacity)
+		self.__lock = Lock()
+
+	def get_level(self):
+		return self.__level
+
+	def set_level(self, level:int):
+		self.__level = level
+
+	def set_file(self, path:str, max_bytes:int=EVENTS_FILE_MAX_BYTES,
+	             backups:int=EVENTS_FILE_BACKUPS):
+		# Append events to `path` from now on, None to stop
+		with self.__lock:
+			if path == self.__path:
+				self.__max_bytes = max_bytes
+				self.__backups = backups
+				return
+			self.__close_file()
+			self.__path = path
+			self.__max_bytes = max_bytes
+			self.__backups = backups
+
+	def is_logged(self, level:int):
+		# Whether events of `level` are kept, for callers to skip
+		# working out fields that would be dropped anyway
+		return level >= self.__level
+
+	def log(self, level:int, event:str, **fields):
+		if level < self.__level:
+			return
+		record = YDIEvent(time(), level, event, fields)
+		with self.__lock:
+			self.__ring.append(record)
+			if self.__path is not None:
+				self.__write(record)
+
+	def get_events(self, level:int=EVENT_DEBUG):
+		# Events kept in memory, oldest first
+		with self.__lock:
+			return [e for e in self.__ring if e.level >= level]
+
+	def report(self):
+		return "\n".join(str(e) for e in self.get_events())
+
+	def close(self):
+		with self.__lock:
+			self.__close_file()
+
+	def __write(self, record:YDIEvent):
+		try:
+			if self.__file is None:
+				self.__file = open(self.__path, "a", encoding="utf-8")
+			self.__file.write(record.to_json() + "\n")
+			self.__file.flush()
+			if self.__file.tell() > self.__max_bytes:
+				self.__rotate()
+		except OSError:
+			# The memory keeps them anyway
+			self.__close_file()
+
+	def __rotate(self):
+		self.__close_file()
+		for i in range(self.__backups - 1, 0, -1):
+			older = "%s.%d" % (self.__path, i)
+			if os.path.exists(older):
+				os.replace(older, "%s.%d" % (self.__path, i + 1))
+		if self.__backups > 0:
+			os.replace(self.__path, self.__path + ".1")
+		else:
+			os.remove(self.__path)
+
+	def __close_file(self):
+		if self.__file is not None:
+			try:
+				self.__file.close()
+			except OSError:
+				pass
+			self.__file = None
+
+# Shared by everything that has something to tell
+events = YDIEventLog()
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+
+"""
+	This file is part of Yandex Disk indicator and control (YDI).
+
+	Copyright 2025 Dandelion Systems <dandelion.systems@gmail.com>
+
+	YDI is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	YDI is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. 
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+"""
+
+from threading import Lock
+from time import time
+import json
+import os
+
+# What is using the space in the Yandex Disk folder: the size of
+# every folder with everything in it and of every file extension.
+# Folders are listed by a pool of threads, one level of the tree at
+# a time. What each folder holds itself is cached with its mtime, so
+# that a rescan lists only the folders that have changed since and
+# just stats the rest
+QUOTA_DIR = os.path.join(os.path.expanduser("~"), ".config", "yandex-disk")
+QUOTA_FILE = "ydi-quota.json"
+QUOTA_VERSION = 1
+
+# Threads listing folders at once and folders each of them is
+# handed at a time
+QUOTA_WORKERS = 8
+QUOTA_CHUNK = 64
+
+# Folders of the daemon itself, in the Yandex Disk folder root
+QUOTA_SKIP = [".sync"]
+
+# Folders the Largest folders submenu shows
+QUOTA_LARGEST = 10
+
+def quota_file(n:int=0):
+	# Quota cache file path of account `n`
+	if n == 0:
+		return os.path.join(QUOTA_DIR, QUOTA_FILE)
+	(name, ext) = os.path.splitext(QUOTA_FILE)
+	return os.path.join(QUOTA_DIR, "%s-%d%s" % (name, n, ext))
+
+class YDIQuotaReport:
+	# Result of a scan. Folder paths are relative to the root,
+	# "" for the root itself
+	__slots__ = ("root", "time", "seconds", "dirs", "files", "extensions", "listed")
+
+	def __init__(self, root:str):
+		self.root = root
+		self.time = time()
+		self.seconds = 0.0
+		# Bytes in every folder including its subfolders
+		self.dirs = {}
+		# Number of files
+		self.files = 0
+		# Bytes per lower case extension, "" for none
+		self.extensions = {}
+		# Folders listed rather than taken from the cache
+		self.listed = 0
+
+	def get_total(self):
+		return self.dirs.get("", 0)
+
+	def largest(self, count:int=QUOTA_LARGEST):
+		# (path, bytes) of the largest folders but the root
+		dirs = [(path, size) for (path, size) in self.dirs.items() if path != ""]
+		dirs.sort(key=lambda d: d[1], reverse=True)
+		return dirs[:count]
+
+	def to_json(self):
+		return {
+			"root": self.root,
+			"time": round(self.time),
+			"seconds": round(self.seconds, 3),
+			"total_bytes": self.get_total(),
+			"files": self.files,
+			"extensions": dict(sorted(self.extensions.items(), key=lambda e: e[1], reverse=True)),
+			"dirs": dict(sorted(self.dirs.items(), key=lambda d: d[1], reverse=True))
+		}
+
+class YDIQuotaExplorer:
+	# Scans the Yandex Disk folder at `root`. Only one scan runs at
+	# a time, scan() returns None if one is already running
+
+	__root = ""
+	__cache_path = ""
+	__workers = QUOTA_WORKERS
+
+	# Folder path -> [mtime_ns, bytes of its own files, number of
+	# them, {extension: bytes}, [subfolder names]]. None until loaded
+	__cache:dict = None
+
+	__report:YDIQuotaReport = None
+
+	__running:Lock = None
+
+	def __init__(self, root:str, cache_path:str=None, workers:int=QUOTA_WORKERS):
+		self.__root = root
+		self.__cache_path = quota_file() if cache_path is None else cache_path
+		self.__workers = workers
+		self.__running = Lock()
+
+	def get_report(self):
+		# The latest YDIQuotaReport, None before the first scan
+		return self.__report
+
+	def scan(self, root:str=None):
+		# Scan the tree, `root` if it has moved. Blocks till done
+		if not self.__running.acquire(blocking=False):
+			return None
+		try:
+			if root is not None and root != self.__root:
+				self.__root = root
+				self.__cache = {}
+			return self.__scan()
+		finally:
+			self.__running.release()
+
+	def export(self, path:str):
+		# Write the latest report to `path` as JSON. Raises OSError
+		with open(path, "w", encoding="utf-8") as f:
+			json.dump(self.__report.to_json(), f, ensure_ascii=False, indent=1)
+
+	def __scan(self):
+		# Imported here as it is only needed once the user asks
+		from concurrent.futures import ThreadPoolExecutor
+
+		started = time()
+		if self.__cache is None:
+			self.__load()
+		report = YDIQuotaReport(self.__root)
+		cache = {}
+
+		with ThreadPoolExecutor(max_workers=self.__workers) as pool:
+			level = [""]
+			while level != []:
+				# Handed out in chunks, a level may have thousands
+				chunks = [
+					level[i:i + QUOTA_CHUNK] 
+					for i in range(0, len(level), QUOTA_CHUNK)
+					]
+				next_level = []
+				for results in pool.map(self.__scan_dirs, chunks):
+					for (path, entry, listed) in results:
+						if entry is None:
+							# Gone or unreadable
+							continue
+						cache[path] = entry
+						report.listed += listed
+						for name in entry[4]:
+							next_level.append(os.path.join(path, name))
+				level = next_level
+
+		# Every folder adds up to its parent, the deepest first
+		for (path, entry) in cache.items():
+			report.dirs[path] = entry[1]
+			report.files += entry[2]
+			for (ext, size) in entry[3].items():
+				report.extensions[ext] = report.extensions.get(ext, 0) + size
+		for path in sorted(cache, key=lambda p: p.count(os.sep) + (p != ""), reverse=True):
+			if path != "":
+				parent = os.path.dirname(path)
+				report.dirs[parent] = report.dirs.get(parent, 0) + report.dirs[path]
+
+		self.__cache = cache
+		self.__save()
+		report.seconds = time() - started
+		self.__report = report
+		return report
+
+	def __scan_dirs(self, paths:list):
+		return [(path,) + self.__scan_dir(path) for path in paths]
+
+	def __scan_dir(self, path:str):
+		# Returns the cache entry of the folder at `path`, None if it
+		# cannot be read, and whether it had to be listed
+		full = os.path.join(self.__root, path)
+		try:
+			mtime = os.stat(full).st_mtime_ns
+		except OSError:
+			return (None, False)
+		cached = self.__cache.get(path)
+		if cached is not None and cached[0] == mtime:
+			# Nothing added, removed or renamed in it since
+			return (cached, False)
+
+		own = 0
+		files = 0
+		extensions = {}
+		subdirs = []
+		try:
+			with os.scandir(full) as it:
+				for e in it:
+					try:
+						if e.is_dir(follow_symlinks=False):
+							if path == "" and e.name in QUOTA_SKIP:
+								continue
+							subdirs.append(e.name)
+						elif e.is_file(follow_symlinks=False):
+							size = e.stat(follow_symlinks=False).st_size
+							own += size
+							files += 1
+							ext = os.path.splitext(e.name)[1].lower()
+							extensions[ext] = extensions.get(ext, 0) + size
+					except OSError:
+						# Gone since listed
+						continue
+		except OSError:
+			return (None, False)
+		return ([mtime, own, files, extensions, subdirs], True)
+
+	def __load(self):
+		self.__cache = {}
+		try:
+			with open(self.__cache_path, "r", encoding="utf-8") as f:
+				data = json.load(f)
+		except (OSError, ValueError):
+			return
+		if (type(data) is dict and data.get("version") == QUOTA_VERSION and
+		    data.get("root") == self.__root and type(data.get("dirs")) is dict):
+			self.__cache = data["dirs"]
+
+	def __save(self):
+		data = {"version": QUOTA_VERSION, "root": self.__root, "dirs": self.__cache}
+		tmp = self.__cache_path + ".tmp"
+		try:
+			with open(tmp, "w", encoding="utf-8") as f:
+				json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+			os.replace(tmp, self.__cache_path)
+		except OSError:
+			pass
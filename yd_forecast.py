@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+
+"""
+	This file is part of Yandex Disk indicator and control (YDI).
+
+	Copyright 2025 Dandelion Systems <dandelion.systems@gmail.com>
+
+	YDI is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	YDI is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. 
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+"""
+
+from collections import deque
+from statistics import median
+from math import ceil
+from time import time
+
+from yd_cli import YDStatus
+
+# Quota alert tunables. Any of these can be overridden with the
+# "quota_alert" setting
+QUOTA_ALERT_DEFAULTS = {
+	"enabled": True,
+	# Warn once this much of the quota is used, per cent
+	"percent": 90,
+	# Warn if the quota is going to run out within this many days
+	"days": 14,
+	# Days of quota samples the trend is worked out from
+	"window_days": 14,
+	# Hours between two notifications at the least
+	"notify_hours": 24
+}
+
+# A sample is taken whenever the used space changes, and at least
+# this often in seconds while it does not
+FORECAST_SAMPLE_INTERVAL = 3600
+
+# The trend needs this many samples spanning this many seconds
+FORECAST_MIN_SAMPLES = 3
+FORECAST_MIN_SPAN = 3600
+
+# The trend is fitted to this many samples at most, evenly picked
+FORECAST_MAX_FIT = 100
+
+# Forecasts further out than this many days are not shown
+FORECAST_HORIZON_DAYS = 365
+
+def theil_sen(points:list):
+	# (slope, intercept) of the line through (x, y) `points` that
+	# most of them agree with: the median of the slopes between
+	# every two points. A few odd points, e.g. a big file put in
+	# and deleted soon after, do not sway it as they would a least
+	# squares fit. None if all x are the same
+	slopes = [
+		(y2 - y1) / (x2 - x1)
+		for (i, (x1, y1)) in enumerate(points)
+		for (x2, y2) in points[i + 1:]
+		if x2 != x1
+		]
+	if slopes == []:
+		return None
+	slope = median(slopes)
+	intercept = median(y - slope * x for (x, y) in points)
+	return (slope, intercept)
+
+class YDIQuotaForecast:
+	# Samples the used space of one account, works out when it is
+	# going to run out and says when to warn about it. `history`, a
+	# YDIHistory, gives the samples from before YDI started
+
+	# Tunables, see QUOTA_ALERT_DEFAULTS
+	__config:dict = None
+
+	__history = None
+
+	# (time, bytes used) in the window, oldest first
+	__samples:deque = None
+	__total = None
+
+	# Seconds from `__fitted`, when the trend was last worked out,
+	# till the quota runs out. None if it is not running out
+	__eta = None
+	__fitted = 0.0
+
+	# Why a warning is due, None if it is not
+	__warning = None
+
+	# When the latest notification was due
+	__notified = None
+
+	def __init__(self, config:dict=None, history=None):
+		self.set_config({} if config is None else config)
+		self.__history = history
+		self.__samples = deque()
+
+	def set_config(self, config:dict):
+		self.__config = dict(QUOTA_ALERT_DEFAULTS)
+		self.__config.update(config)
+
+	def get_eta(self, now:float=None):
+		# Seconds from `now` till the quota runs out, None if it is
+		# not running out
+		if self.__eta is None:
+			return None
+		now = time() if now is None else now
+		return max(self.__eta - (now - self.__fitted), 0)
+
+	def get_warning(self):
+		# "percent" or "days" if the user is to be warned, None if not
+		return self.__warning
+
+	def update(self, status:YDStatus, now:float=None):
+		# Take the quota of a status just parsed. Returns True if a
+		# notification is due
+		if status.used_bytes is None or not status.total_bytes:
+			return False
+		now = time() if now is None else now
+		if self.__history is not None:
+			self.__seed(now)
+
+		total_changed = status.total_bytes != self.__total
+		self.__total = status.total_bytes
+		if (not self.__samples or total_changed or
+		    self.__samples[-1][1] != status.used_bytes or
+		    now - self.__samples[-1][0] >= FORECAST_SAMPLE_INTERVAL):
+			self.__samples.append((now, status.used_bytes))
+			window = self.__config["window_days"] * 86400
+			while len(self.__samples) > 1 and now - self.__samples[0][0] > window:
+				self.__samples.popleft()
+			# Only a new sample changes the trend
+			self.__eta = self.__forecast(now)
+			self.__fitted = now
+		return self.__check(now)
+
+	def describe(self, labels:dict, now:float=None):
+		# "Full in about 12 days" with the localized "full_in" label,
+		# "" if it is not running out soon enough to tell
+		eta = self.get_eta(now)
+		if eta is None or eta > FORECAST_HORIZON_DAYS * 86400:
+			return ""
+		return labels["full_in"] % max(ceil(eta / 86400), 1)
+
+	def __seed(self, now:float):
+		# Samples from the history, once
+		since = now - self.__config["window_days"] * 86400
+		for record in self.__history.query(since=since):
+			if record.used is not None:
+				if not self.__samples or self.__samples[-1][1] != record.used:
+					self.__samples.append((record.time, record.used))
+		self.__history = None
+
+	def __forecast(self, now:float):
+		samples = list(self.__samples)
+		if (len(samples) < FORECAST_MIN_SAMPLES or
+		    samples[-1][0] - samples[0][0] < FORECAST_MIN_SPAN):
+			return None
+		if len(samples) > FORECAST_MAX_FIT:
+			step = (len(samples) - 1) / (FORECAST_MAX_FIT - 1)
+			samples = [samples[round(i * step)] for i in range(FORECAST_MAX_FIT)]
+		# Times from the latest sample keep the numbers small
+		fit = theil_sen([(t - now, used) for (t, used) in samples])
+		if fit is None:
+			return None
+		(slope, intercept) = fit
+		if slope <= 0:
+			return None
+		return max((self.__total - intercept) / slope, 0)
+
+	def __check(self, now:float):
+		warning = None
+		if self.__config["enabled"]:
+			used = self.__samples[-1][1]
+			eta = self.get_eta(now)
+			if used * 100 >= self.__config["percent"] * self.__total:
+				warning = "percent"
+			elif eta is not None and eta <= self.__config["days"] * 86400:
+				warning = "days"
+
+		# One notification as the warning comes, none while it stays.
+		# Should it come and go, not more often than `notify_hours`
+		notify = False
+		if warning is not None and self.__warning is None:
+			if (self.__notified is None or
+			    now - self.__notified >= self.__config["notify_hours"] * 3600):
+				self.__notified = now
+				notify = True
+		self.__warning = warning
+		return notify
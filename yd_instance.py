@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+
+"""
+	This file is part of Yandex Disk indicator and control (YDI).
+
+	Copyright 2025 Dandelion Systems <dandelion.systems@gmail.com>
+
+	YDI is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	YDI is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. 
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+"""
+
+from threading import Thread
+from tempfile import gettempdir
+import fcntl
+import socket
+import json
+import os
+
+from yd_cli import YDStatus, SyncState
+
+# One YDI per user. The first one to start holds an flock on
+# INSTANCE_LOCK, which the kernel lets go of however it quits, so
+# there is nothing stale left after a crash. It listens on
+# INSTANCE_SOCKET for the commands later launches forward to it:
+#
+#	ydi --start | --stop | --status [--json] | --open-menu [--account N]
+#
+# Both live in a folder only the user can get into, in
+# $XDG_RUNTIME_DIR if there is one
+INSTANCE_ID = "com.dandelion-systems.yandexdisk"
+INSTANCE_LOCK = "ydi.lock"
+INSTANCE_SOCKET = "ydi.sock"
+
+# Command line options forwarded and the commands they make
+INSTANCE_COMMANDS = {
+	"--start": "start",
+	"--stop": "stop",
+	"--status": "status",
+	"--open-menu": "open_menu"
+}
+
+# Seconds a forwarded command may take, `--start` and `--stop`
+# wait for yandex-disk
+INSTANCE_TIMEOUT = 30
+
+# Seconds the running YDI waits for yandex-disk before it replies
+# without the output, so that the launch gets a reply in time and
+# the next one is not held up for long
+INSTANCE_COMMAND_WAIT = INSTANCE_TIMEOUT - 5
+
+# Longest request read, in bytes
+INSTANCE_MAX_REQUEST = 4096
+
+def instance_dir():
+	# Created if it is not there. Raises OSError if it cannot be,
+	# or if it is someone else's
+	runtime = os.environ.get("XDG_RUNTIME_DIR", "")
+	if runtime != "" and os.path.isdir(runtime):
+		path = os.path.join(runtime, INSTANCE_ID)
+	else:
+		path = os.path.join(gettempdir(), "%s-%d" % (INSTANCE_ID, os.getuid()))
+	os.makedirs(path, mode=0o700, exist_ok=True)
+	if os.stat(path).st_uid != os.getuid():
+		raise PermissionError("%s belongs to another user" % path)
+	return path
+
+def parse_command(args:list):
+	# The request to forward for command line `args`, None if they
+	# have no command in them. Raises ValueError if they make no sense
+	request = None
+	account = None
+	as_json = False
+	i = 0
+	while i < len(args):
+		arg = args[i]
+		if arg in INSTANCE_COMMANDS:
+			if request is not None:
+				raise ValueError("only one command at a time")
+			request = {"command": INSTANCE_COMMANDS[arg]}
+		elif arg == "--json":
+			as_json = True
+		elif arg == "--account":
+			i += 1
+			if i == len(args) or not args[i].isdigit():
+				raise ValueError("--account takes an account number")
+			account = int(args[i])
+		i += 1
+	if request is None:
+		if as_json or account is not None:
+			raise ValueError("nothing to do")
+		return None
+	request["json"] = as_json
+	request["account"] = account
+	return request
+
+def status_record(status:YDStatus):
+	# Status as plain values for `--status --json`
+	record = {slot: getattr(status, slot) for slot in YDStatus.__slots__}
+	record["sync_state"] = (
+		"stopped" if status.sync_state == SyncState.STOPPED
+		else status.sync_state.value
+		)
+	record["lastfiles"] = list(status.lastfiles)
+	record["lastdirs"] = list(status.lastdirs)
+	return record
+
+def forward(request:dict, path:str=None, timeout:float=INSTANCE_TIMEOUT):
+	# Send `request` to the running YDI and return its reply. Raises
+	# OSError if none is listening
+	if path is None:
+		path = os.path.join(instance_dir(), INSTANCE_SOCKET)
+	with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+		s.settimeout(timeout)
+		s.connect(path)
+		s.sendall(json.dumps(request).encode("utf-8") + b"\n")
+		s.shutdown(socket.SHUT_WR)
+		reply = b""
+		while True:
+			data = s.recv(65536)
+			if data == b"":
+				break
+			reply += data
+	return json.loads(reply.decode("utf-8"))
+
+class YDIInstance:
+	# The lock and the command socket of the running YDI
+
+	__dir = ""
+
+	# Lock file descriptor while we hold it, None otherwise
+	__lock_fd = None
+
+	# Listening socket, None until serve()
+	__server:socket.socket = None
+
+	# Called on the socket thread with every request, returns a
+	# dict with the "output" to print and the "status" to exit with
+	__on_command = None
+
+	def __init__(self, path:str=None):
+		# Raises OSError if there is no folder to keep them in
+		self.__dir = instance_dir() if path is None else path
+
+	def get_dir(self):
+		return self.__dir
+
+	def get_socket_path(self):
+		return os.path.join(self.__dir, INSTANCE_SOCKET)
+
+	def acquire(self):
+		# True if there is no other YDI of this user running and
+		# this one is now the one
+		if self.__lock_fd is not None:
+			return True
+		fd = os.open(
+			os.path.join(self.__dir, INSTANCE_LOCK),
+			os.O_RDWR | os.O_CREAT | os.O_CLOEXEC,
+			0o600
+			)
+		try:
+			fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+		except OSError:
+			# BlockingIOError, someone has it
+			os.close(fd)
+			return False
+		# For people looking, the lock is what counts
+		os.ftruncate(fd, 0)
+		os.write(fd, b"%d\n" % os.getpid())
+		self.__lock_fd = fd
+		return True
+
+	def serve(self, on_command):
+		# Take commands from later launches. A socket left by a YDI
+		# that has crashed is replaced, we hold the lock
+		self.__on_command = on_command
+		path = self.get_socket_path()
+		try:
+			os.unlink(path)
+		except FileNotFoundError:
+			pass
+		self.__server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		self.__server.bind(path)
+		os.chmod(path, 0o600)
+		self.__server.listen(4)
+		Thread(target=self.__serve, args=(self.__server,), daemon=True).start()
+
+	def close(self):
+		if self.__server is not None:
+			try:
+				os.unlink(self.get_socket_path())
+			except OSError:
+				pass
+			# Wakes up accept() on the socket thread
+			try:
+				self.__server.shutdown(socket.SHUT_RDWR)
+			except OSError:
+				pass
+			self.__server.close()
+			self.__server = None
+		if self.__lock_fd is not None:
+			os.close(self.__lock_fd)
+			self.__lock_fd = None
+
+	def __serve(self, server:socket.socket):
+		while True:
+			try:
+				(conn, _) = server.accept()
+			except OSError:
+				# Closed
+				return
+			with conn:
+				try:
+					self.__handle(conn)
+				except (OSError, ValueError):
+					# The client is gone or sent junk, nothing to tell
+					pass
+				except Exception as e:
+					# A request the handler choked on must not take the
+					# socket thread down with it, later launches would
+					# find nobody listening
+					self.__reply(conn, {"output": "Failed: %s" % e, "status": 2})
+
+	def __handle(self, conn:socket.socket):
+		conn.settimeout(INSTANCE_TIMEOUT)
+		data = b""
+		while not data.endswith(b"\n"):
+			chunk = conn.recv(INSTANCE_MAX_REQUEST)
+			if chunk == b"":
+				break
+			data += chunk
+			if len(data) > INSTANCE_MAX_REQUEST:
+				raise ValueError("request too long")
+		request = json.loads(data.decode("utf-8"))
+		if type(request) is not dict or request.get("command") not in INSTANCE_COMMANDS.values():
+			reply = {"output": "Unknown command", "status": 2}
+		else:
+			reply = self.__on_command(request)
+		conn.sendall(json.dumps(reply, ensure_ascii=False).encode("utf-8"))
+
+	def __reply(self, conn:socket.socket, reply:dict):
+		# Best effort, the client may be gone already
+		try:
+			conn.sendall(json.dumps(reply, ensure_ascii=False).encode("utf-8"))
+		except OSError:
+			pass
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+"""
+	This file is part of Yandex Disk indicator and control (YDI).
+
+	Copyright 2025 Dandelion Systems <dandelion.systems@gmail.com>
+
+	YDI is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	YDI is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. 
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+"""
+
+from gi.repository import Gio
+from gi.repository import GLib
+
+from shutil import which
+
+from yd_events import events, EVENT_DEBUG, EVENT_WARNING
+
+# Folders open in the default application for this MIME type,
+# as set in the desktop settings
+FOLDER_MIME_TYPE = "inode/directory"
+
+# Tried in this order if there is no default application
+FILE_MANAGERS = ["nautilus", "thunar", "pcmanfm"]
+
+class YDILauncher:
+	# Opens folders in the file manager without waiting for it. The
+	# file manager is looked up on first use and kept, it is looked
+	# up again only if it fails to start. Must be used on the main
+	# loop
+
+	# Gio.AppInfo of the file manager, None until looked up
+	__app:Gio.AppInfo = None
+
+	def get_app(self):
+		# The file manager, None if there is none
+		if self.__app is None:
+			self.__app = self.__find_app()
+		return self.__app
+
+	def open_folder(self, path:str, on_error=None, context:Gio.AppLaunchContext=None):
+		# Returns at once. Should the file manager not be there or
+		# fail to start, `on_error` is called on the main loop with
+		# the reason, None if there is no file manager at all.
+		# `context` is for startup notification, see
+		# Gdk.Display.get_app_launch_context()
+		app = self.get_app()
+		if app is None:
+			if on_error is not None:
+				on_error(None)
+			return
+
+		def on_launched(app, result):
+			try:
+				app.launch_uris_finish(result)
+			except GLib.Error as e:
+				events.log(
+					EVENT_WARNING, "file_manager_failed", 
+					app=app.get_id() or app.get_executable(), error=e.message
+					)
+				# Maybe uninstalled since, look it up again next time
+				self.__app = None
+				if on_error is not None:
+					on_error(e.message)
+
+		uri = Gio.File.new_for_path(path).get_uri()
+		app.launch_uris_async([uri], context, None, on_launched)
+
+	def __find_app(self):
+		app = Gio.AppInfo.get_default_for_type(FOLDER_MIME_TYPE, False)
+		if app is None:
+			for name in FILE_MANAGERS:
+				fm = which(name)
+				if fm is not None:
+					app = Gio.AppInfo.create_from_commandline(
+						fm,
+						name,
+						Gio.AppInfoCreateFlags.SUPPORTS_URIS
+						)
+					break
+		if app is not None:
+			events.log(EVENT_DEBUG, "file_manager", app=app.get_id() or app.get_executable())
+		return app
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+
+"""
+	This file is part of Yandex Disk indicator and control (YDI).
+
+	Copyright 2025 Dandelion Systems <dandelion.systems@gmail.com>
+
+	YDI is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	YDI is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. 
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+"""
+
+from bisect import bisect_left
+from threading import Lock
+from time import perf_counter_ns, time
+import os
+
+# Upper bounds of the latency histogram buckets in milliseconds.
+# Anything slower than the last one goes to an extra bucket
+METRICS_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+class YDIHistogram:
+	# Counts of latencies falling into each of METRICS_BUCKETS_MS
+	__slots__ = ("counts", "count", "total_ms", "max_ms")
+
+	def __init__(self):
+		self.counts = [0] * (len(METRICS_BUCKETS_MS) + 1)
+		self.count = 0
+		self.total_ms = 0.0
+		self.max_ms = 0.0
+
+	def add(self, ms:float):
+		self.counts[bisect_left(METRICS_BUCKETS_MS, ms)] += 1
+		self.count += 1
+		self.total_ms += ms
+		if ms > self.max_ms:
+			self.max_ms = ms
+
+	def percentile(self, p:float):
+		# Upper bound of the bucket the `p`-th percentile falls into,
+		# the largest value seen for the extra bucket
+		if self.count == 0:
+			return 0.0
+		rank = p / 100 * self.count
+		seen = 0
+		for (i, n) in enumerate(self.counts):
+			seen += n
+			if seen >= rank and n > 0:
+				if i < len(METRICS_BUCKETS_MS):
+					return min(METRICS_BUCKETS_MS[i], self.max_ms)
+				return self.max_ms
+		return self.max_ms
+
+class YDIMetrics:
+	# Counters and latency histograms of the status update cycle and
+	# of yandex-disk commands. Disabled, which is the default, every
+	# call returns after a single check:
+	#
+	#	t = metrics.start()
+	#	...
+	#	metrics.stop("cli.status", t)
+
+	__enabled = False
+
+	# When collecting has started, wall clock time
+	__since = 0.0
+
+	__counters:dict = None
+	__histograms:dict = None
+
+	# Stages are timed on several threads
+	__lock:Lock = None
+
+	def __init__(self):
+		self.__lock = Lock()
+		self.reset()
+
+	def is_enabled(self):
+		return self.__enabled
+
+	def set_enabled(self, enabled:bool):
+		if enabled and not self.__enabled:
+			self.reset()
+		self.__enabled = enabled
+
+	def reset(self):
+		with self.__lock:
+			self.__counters = {}
+			self.__histograms = {}
+			self.__since = time()
+
+	def start(self):
+		# Start timing a stage, None when disabled
+		if not self.__enabled:
+			return None
+		return perf_counter_ns()
+
+	def stop(self, name:str, started):
+		# Add the time since start() returned `started` to the
+		# histogram `name`
+		if started is None:
+			return
+		ms = (perf_counter_ns() - started) / 1e6
+		with self.__lock:
+			histogram = self.__histograms.get(name)
+			if histogram is None:
+				histogram = self.__histograms[name] = YDIHistogram()
+			histogram.add(ms)
+
+	def count(self, name:str, n:int=1):
+		if not self.__enabled:
+			return
+		with self.__lock:
+			self.__counters[name] = self.__counters.get(name, 0) + n
+
+	def report(self):
+		# Human readable summary of everything collected so far
+		if not self.__enabled:
+			return "Collecting timings is off"
+		with self.__lock:
+			lines = ["Collected for %.0f s" % (time() - self.__since)]
+			if self.__counters != {}:
+				lines.append("Counters:")
+				for name in sorted(self.__counters):
+					lines.append("  %-24s %10d" % (name, self.__counters[name]))
+			if self.__histograms != {}:
+				lines.append("Timings, ms:")
+				lines.append("  %-24s %8s %8s %8s %8s %8s %8s" %
+				             ("", "count", "mean", "p50", "p90", "p99", "max"))
+				for name in sorted(self.__histograms):
+					h = self.__histograms[name]
+					lines.append("  %-24s %8d %8.1f %8.1f %8.1f %8.1f %8.1f" % (
+						name, h.count, h.total_ms / h.count,
+						h.percentile(50), h.percentile(90),
+						h.percentile(99), h.max_ms
+						))
+				lines.append("Buckets, ms up to:")
+				bounds = [str(b) for b in METRICS_BUCKETS_MS] + ["more"]
+				lines.append("  %-24s " % "" + " ".join("%6s" % b for b in bounds))
+				for name in sorted(self.__histograms):
+					counts = self.__histograms[name].counts
+					lines.append("  %-24s " % name + " ".join("%6d" % c for c in counts))
+		return "\n".join(lines)
+
+	def dump(self, path:str):
+		# Write the report to `path`. Raises OSError if it cannot
+		tmp = path + ".tmp"
+		with open(tmp, "w") as f:
+			f.write(self.report() + "\n")
+		os.replace(tmp, path)
+
+# Shared by everything that is timed
+metrics = YDIMetrics()
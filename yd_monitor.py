@@ -0,0 +1,384 @@
+# -*- coding: utf-8 -*-
+
+"""
+	This file is part of Yandex Disk indicator and control (YDI).
+
+	Copyright 2025 Dandelion Systems <dandelion.systems@gmail.com>
+
+	YDI is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	YDI is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. 
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+"""
+
+from threading import Thread
+
+from yd_cli import YDStatusWatcher, SyncState
+from yd_snapshot import YDISnapshotter, diff_snapshots
+from yd_progress import YDIProgressEstimator
+from yd_metrics import metrics
+from yd_events import events, EVENT_INFO
+
+
+# Status update scheduling ----------------------------------
+#
+
+# Status update scheduler profiles selectable with the "frequency"
+# setting. Intervals are in seconds for each sync core state, 
+# "stopped" stands for the daemon not running or not reachable.
+# While the daemon is syncing (busy or index) the interval stays 
+# as it is. Otherwise it grows `backoff` times with every check 
+# that brings no news up to `ceiling`. Any of these values can be
+# overridden per profile with the "profiles" setting. `cli_poll` is
+# the longest time between two `yandex-disk status` runs however 
+# quiet the status file is, `cli_gap` the shortest between two of
+# them for sync core state changes, see YDStatusWatcher. Without a
+# status file to watch the CLI is polled at intervals up to `poll`
+# and never backs off, or short lived states would go unseen
+SCHEDULER_PROFILES = {
+	"power_saver": {
+		"busy": 2, "index": 2, 
+		"idle": 5, "paused": 5, "error": 5, "stopped": 5,
+		"backoff": 2, "ceiling": 60, "cli_poll": 600, "cli_gap": 60,
+		"poll": 2
+	},
+	"medium": {
+		"busy": 1, "index": 1, 
+		"idle": 2, "paused": 2, "error": 2, "stopped": 2,
+		"backoff": 2, "ceiling": 30, "cli_poll": 300, "cli_gap": 30,
+		"poll": 2
+	},
+	"high": {
+		"busy": 0.5, "index": 0.5, 
+		"idle": 1, "paused": 1, "error": 1, "stopped": 1,
+		"backoff": 1.5, "ceiling": 10, "cli_poll": 120, "cli_gap": 10,
+		"poll": 1
+	}
+}
+
+# Sync core states that keep the update interval tight
+SCHEDULER_ACTIVE_STATES = ["busy", "index"]
+
+class YDIScheduler:
+	# Scheduler profile, see SCHEDULER_PROFILES
+	__profile:dict = None
+
+	# Last observed sync core state
+	__state = "stopped"
+
+	# Current update interval in seconds
+	__interval = 0
+
+	def __init__(self, profile:dict):
+		self.set_profile(profile)
+
+	def set_profile(self, profile:dict):
+		self.__profile = profile
+		self.reset()
+
+	def reset(self):
+		# Drop any backoff, to be called on user commands
+		self.__interval = self.__profile[self.__state]
+
+	def get_interval(self):
+		return self.__interval
+
+	def most_active(self, sync_statuses:list):
+		# The sync core state of several daemons that needs the
+		# tightest updates
+		return min(
+			sync_statuses, 
+			key=lambda status: self.__profile.get(status, self.__profile["stopped"])
+			)
+
+	def next_interval(self, sync_status:str, changed:bool, polling:bool=False):
+		# Work out the interval till the next status update from the 
+		# sync core state just observed and whether anything has 
+		# changed since the previous update. `polling` is for a daemon
+		# without a status file to watch, whose changes are only seen
+		# at updates, so there is no backing off then and the interval
+		# is `poll` at the most
+		state = sync_status if sync_status in self.__profile else "stopped"
+		if polling:
+			self.__state = state
+			self.__interval = min(self.__profile[state], self.__profile["poll"])
+		elif changed or state != self.__state or state in SCHEDULER_ACTIVE_STATES:
+			self.__state = state
+			self.__interval = self.__profile[state]
+		else:
+			ceiling = max(self.__profile["ceiling"], self.__profile[state])
+			self.__interval = min(
+				self.__interval * self.__profile["backoff"], 
+				ceiling
+				)
+		return self.__interval
+
+
+
+# Status monitor --------------------------------------------
+#
+
+# Status updates of several yandex-disk instances run concurrently
+# in a pool of up to this many threads
+MAX_STATUS_WORKERS = 4
+
+class YDIMonitor:
+	# The status updater: waits for status changes of one or more 
+	# yandex-disk instances, takes status snapshots and hands their 
+	# differences to `on_changes`, paced by a YDIScheduler shared by 
+	# all instances. Nothing here touches Gtk, `on_changes` is called
+	# on the updater thread
+
+	# yandex-disk instances, one per account
+	__disks:list = None
+
+	# Keep __disks status up to date watching the daemon status files
+	__status_watchers:list = None
+
+	# Works out status update intervals
+	__scheduler:YDIScheduler = None
+
+	# Status of every instance as last passed on, only changes to 
+	# these go to __on_changes
+	__snapshotter:YDISnapshotter = None
+	__snapshots:list = None
+
+	# Called with the instance number and a dict of changed 
+	# YDISnapshot fields 
+	__on_changes = None
+
+	# Called with the instance number and every new status record,
+	# also those with no change the indicator shows. None if not wanted
+	__on_status = None
+
+	# Restart daemons when they are unhealthy, None entries
+	# for instances left alone
+	__watchdogs:list = None
+
+	# Sync rate and time left of every instance
+	__progress:list = None
+
+	# Keep a record of status changes, None entries for
+	# instances with no history
+	__histories:list = None
+
+	# Exports status to monitoring systems, None if not wanted
+	__exporter = None
+
+	# Keep every recently synced item reported, None entries for
+	# instances that do not
+	__synced:list = None
+
+	# Tell when the quota is running out, None entries for
+	# instances that do not. (label, warning) of every forecast as
+	# last shown
+	__forecasts:list = None
+	__forecasts_shown:list = None
+	__labels:dict = None
+
+	# Sync core state of every instance as last seen
+	__states:list = None
+
+	# Status updater thread
+	__updater = None
+
+	# Status updater run flag (simple semaphore)
+	__monitoring = False
+
+	def __init__(self, disks:list, profile:dict, labels:dict, on_changes, 
+	             watchdogs:list=None, histories:list=None, exporter=None,
+	             synced:list=None, forecasts:list=None, on_status=None):
+		self.__disks = disks
+		self.__status_watchers = [YDStatusWatcher(disk, profile["cli_poll"], profile["cli_gap"]) for disk in disks]
+		self.__scheduler = YDIScheduler(profile)
+		self.__snapshotter = YDISnapshotter(labels)
+		self.__labels = labels
+		self.__snapshots = [None] * len(disks)
+		self.__on_changes = on_changes
+		self.__on_status = on_status
+		self.__watchdogs = watchdogs if watchdogs is not None else [None] * len(disks)
+		self.__progress = [YDIProgressEstimator() for disk in disks]
+		self.__histories = histories if histories is not None else [None] * len(disks)
+		self.__exporter = exporter
+		self.__synced = synced if synced is not None else [None] * len(disks)
+		self.__forecasts = forecasts if forecasts is not None else [None] * len(disks)
+		self.__forecasts_shown = [None] * len(disks)
+		self.__states = [None] * len(disks)
+
+	def is_monitoring(self):
+		return self.__monitoring
+
+	def get_snapshot(self, n:int=0):
+		return self.__snapshots[n]
+
+	def set_profile(self, profile:dict):
+		self.__scheduler.set_profile(profile)
+		for watcher in self.__status_watchers:
+			watcher.set_cli_poll(profile["cli_poll"], profile["cli_gap"])
+			watcher.invalidate()
+
+	def refresh(self):
+		# Update the status right away
+		self.__scheduler.reset()
+		for watcher in self.__status_watchers:
+			watcher.invalidate()
+
+	def monitor(self):
+		# Start updating yandex-disk status as the daemons report changes,
+		# checking at least at intervals set by the scheduler.
+		# Use desist() to stop
+		if not self.__monitoring:
+			self.__monitoring = True
+			self.refresh()
+			self.__updater = Thread(target=self.__update_worker)
+			self.__updater.start()
+
+	def desist(self):
+		# Stop updating yandex-disk status
+		self.__monitoring = False
+		for watcher in self.__status_watchers:
+			watcher.interrupt()
+		if self.__updater is not None:
+			self.__updater.join()
+
+	def close(self):
+		self.desist()
+		for watcher in self.__status_watchers:
+			watcher.close()
+
+	def __update_worker(self):
+		# Imported here to keep it off the start up path
+		from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+		interval = self.__scheduler.get_interval()
+
+		# Updates in progress, instance numbers keyed by future
+		pending = {}
+
+		workers = min(len(self.__disks), MAX_STATUS_WORKERS)
+		with ThreadPoolExecutor(max_workers=workers) as pool:
+			while self.__monitoring:
+				# Every instance waits for its own status to change 
+				# and that is what is handled first 
+				waiting = set(pending.values())
+				for n in range(len(self.__disks)):
+					if n not in waiting:
+						future = pool.submit(self.__status_watchers[n].update, interval)
+						pending[future] = n
+				(done, _) = wait(pending, return_when=FIRST_COMPLETED)
+
+				changed = False
+				for future in done:
+					n = pending.pop(future)
+					if self.__monitoring:
+						t = metrics.start()
+						changed = self.__update(n, future.result()) or changed
+						metrics.stop("update", t)
+				metrics.count("update.cycles")
+
+				previous = interval
+				interval = self.__scheduler.next_interval(
+					self.__scheduler.most_active(
+						[disk.get_sync_status() for disk in self.__disks]
+						),
+					changed,
+					not all(watcher.is_watching() for watcher in self.__status_watchers)
+					)
+
+				# Have the instances still waiting with a longer
+				# interval start over with the new one
+				if interval < previous:
+					for n in pending.values():
+						self.__status_watchers[n].interrupt()
+
+			for n in pending.values():
+				self.__status_watchers[n].interrupt()
+
+	def __update(self, n:int, changed:bool):
+		# Pass on the changes of instance `n` if there are any
+		# and return True, False if nothing has changed
+		disk = self.__disks[n]
+
+		# The watchdog needs to see time pass even if nothing
+		# changes, e.g. to notice a stalled sync
+		watchdog = self.__watchdogs[n]
+		if watchdog is not None and watchdog.check(disk.get_status()):
+			self.__scheduler.reset()
+			self.__status_watchers[n].invalidate()
+
+		# So does the forecast, the days left go down and samples
+		# are taken hourly all the same. An "alert" change, the 
+		# warning of the forecast, asks for a notification
+		forecast = self.__forecasts[n]
+		alert = False
+		forecast_moved = False
+		if forecast is not None:
+			alert = forecast.update(disk.get_status())
+			shown = (forecast.describe(self.__labels), forecast.get_warning())
+			forecast_moved = shown != self.__forecasts_shown[n]
+			self.__forecasts_shown[n] = shown
+
+		if changed:
+			metrics.count("update.changed")
+			self.__record(n, disk.get_status())
+		elif not (alert or forecast_moved):
+			return False
+
+		t = metrics.start()
+		snapshot = self.__snapshotter.take(disk, self.__progress[n], forecast)
+		metrics.stop("update.snapshot", t)
+		t = metrics.start()
+		changes = diff_snapshots(self.__snapshots[n], snapshot)
+		metrics.stop("update.diff", t)
+		self.__snapshots[n] = snapshot
+		if alert:
+			changes["alert"] = forecast.get_warning()
+
+		if changes != {}:
+			metrics.count("update.posted")
+			self.__on_changes(n, changes)
+			return True
+		return False
+
+	def __record(self, n:int, status):
+		# Hand a changed status of instance `n` to everything that
+		# keeps track of it
+		watchdog = self.__watchdogs[n]
+		if status.sync_state != self.__states[n]:
+			events.log(
+				EVENT_INFO, "state", account=n, 
+				state=status.sync_status or "stopped",
+				was=None if self.__states[n] is None else self.__states[n].value or "stopped"
+				)
+			self.__states[n] = status.sync_state
+		if status.sync_state == SyncState.BUSY:
+			self.__progress[n].update(status.sync_done, status.sync_total)
+		else:
+			self.__progress[n].reset()
+
+		history = self.__histories[n]
+		if history is not None:
+			t = metrics.start()
+			history.record(status)
+			metrics.stop("update.history", t)
+
+		synced = self.__synced[n]
+		if synced is not None:
+			t = metrics.start()
+			synced.record(status.lastfiles, status.lastdirs)
+			metrics.stop("update.synced", t)
+
+		if self.__exporter is not None:
+			self.__exporter.update(
+				n, status, 
+				0 if watchdog is None else watchdog.get_restart_count(),
+				self.__disks[n].get_status_calls()
+				)
+
+		if self.__on_status is not None:
+			self.__on_status(n, status)
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+
+"""
+	This file is part of Yandex Disk indicator and control (YDI).
+
+	Copyright 2025 Dandelion Systems <dandelion.systems@gmail.com>
+
+	YDI is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	YDI is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. 
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+"""
+
+from collections import OrderedDict
+from typing import NamedTuple
+from threading import Lock
+from time import time, monotonic
+from bisect import bisect_left, bisect_right
+import json
+import os
+
+# Every file and folder the daemon has reported as recently synced,
+# not just the few it lists at the moment. Kept in a JSON file per
+# account, the least recently seen go once there are too many
+SYNCED_DIR = os.path.join(os.path.expanduser("~"), ".config", "yandex-disk")
+SYNCED_FILE = "ydi-synced.json"
+SYNCED_CAPACITY = 50000
+SYNCED_VERSION = 1
+
+# Changes are saved at most this often, in seconds, and on close
+SYNCED_SAVE_INTERVAL = 60
+
+# Kinds of synced items
+SYNCED_FILE_KIND = "file"
+SYNCED_DIR_KIND = "dir"
+
+# Most search results returned
+SYNCED_SEARCH_LIMIT = 200
+
+class YDISyncedItem(NamedTuple):
+	path: str
+	kind: str
+	first_seen: float
+	last_seen: float
+
+def synced_file(n:int=0):
+	# Synced items file path of account `n`
+	if n == 0:
+		return os.path.join(SYNCED_DIR, SYNCED_FILE)
+	(name, ext) = os.path.splitext(SYNCED_FILE)
+	return os.path.join(SYNCED_DIR, "%s-%d%s" % (name, n, ext))
+
+class YDISyncedIndex:
+	# Synced files and folders, each once, with the times they were
+	# first and last reported. Searched by the start of the name or
+	# by any part of the path, case insensitive. The file is read on
+	# first use rather than at start up
+
+	__path = ""
+	__capacity = SYNCED_CAPACITY
+
+	# YDISyncedItem keyed by (kind, path), least recently seen first.
+	# None until loaded
+	__items:OrderedDict = None
+
+	# Lists as last recorded, to tell what is new
+	__last_files:tuple = None
+	__last_dirs:tuple = None
+
+	__dirty = False
+	__saved = 0.0
+
+	# Search index, built on the first search after a change:
+	# lower case paths joined by "\n", where each of them starts in
+	# the text, the items in the same order and (lower case name,
+	# item number) pairs sorted
+	__text = None
+	__starts:list = None
+	__ordered:list = None
+	__names:list = None
+
+	# record() runs on the updater thread, search() on the main one
+	__lock:Lock = None
+
+	def __init__(self, path:str=None, capacity:int=SYNCED_CAPACITY):
+		self.__path = synced_file() if path is None else path
+		self.__capacity = capacity
+		self.__lock = Lock()
+		self.__saved = monotonic()
+
+	def get_path(self):
+		return self.__path
+
+	def __len__(self):
+		with self.__lock:
+			self.__load()
+			return len(self.__items)
+
+	def record(self, files, dirs, now:float=None):
+		# Take the recently synced lists of a status. Paths are
+		# relative to the Yandex Disk folder
+		files = tuple(files)
+		dirs = tuple(dirs)
+		if files == self.__last_files and dirs == self.__last_dirs:
+			return
+		now = time() if now is None else now
+		with self.__lock:
+			self.__load()
+			if files != self.__last_files:
+				self.__see(SYNCED_FILE_KIND, files, now)
+			if dirs != self.__last_dirs:
+				self.__see(SYNCED_DIR_KIND, dirs, now)
+			self.__last_files = files
+			self.__last_dirs = dirs
+			if monotonic() - self.__saved >= SYNCED_SAVE_INTERVAL:
+				self.__save()
+
+	def search(self, query:str, limit:int=SYNCED_SEARCH_LIMIT):
+		# Items whose name starts with `query` go first, those with
+		# `query` anywhere in the path follow. Most recently seen
+		# first within each
+		query = query.lower()
+		with self.__lock:
+			self.__load()
+			if query == "":
+				return list(reversed(self.__items.values()))[:limit]
+			self.__index()
+
+			# Every name starting with `query` sorts before `query`
+			# followed by the highest code point there is
+			found = set()
+			first = bisect_left(self.__names, (query, -1))
+			last = bisect_left(self.__names, (query + chr(0x10FFFF), -1))
+			for (_, i) in self.__names[first:last]:
+				found.add(i)
+			by_name = sorted(found, reverse=True)
+
+			rest = []
+			pos = self.__text.find(query)
+			while pos != -1:
+				i = bisect_right(self.__starts, pos) - 1
+				if i not in found:
+					found.add(i)
+					rest.append(i)
+				# On to the next path
+				if i + 1 == len(self.__starts):
+					break
+				pos = self.__text.find(query, self.__starts[i + 1])
+			rest.sort(reverse=True)
+
+			return [self.__ordered[i] for i in (by_name + rest)[:limit]]
+
+	def flush(self):
+		# Save what has changed since the last save. record() only
+		# saves every SYNCED_SAVE_INTERVAL
+		with self.__lock:
+			if self.__dirty:
+				self.__save()
+
+	def close(self):
+		self.flush()
+
+	def __see(self, kind:str, paths:tuple, now:float):
+		# The list comes newest first, the newest goes last here
+		for path in reversed(paths):
+			key = (kind, path)
+			item = self.__items.pop(key, None)
+			first_seen = now if item is None else item.first_seen
+			self.__items[key] = YDISyncedItem(path, kind, first_seen, now)
+		while len(self.__items) > self.__capacity:
+			self.__items.popitem(last=False)
+		self.__dirty = True
+		self.__text = None
+
+	def __index(self):
+		if self.__text is not None:
+			return
+		self.__ordered = list(self.__items.values())
+		paths = [item.path.lower() for item in self.__ordered]
+		self.__starts = []
+		pos = 0
+		for p in paths:
+			self.__starts.append(pos)
+			pos += len(p) + 1
+		self.__text = "\n".join(paths)
+		self.__names = sorted(
+			(os.path.basename(p.rstrip("/")), i) for (i, p) in enumerate(paths)
+			)
+
+	def __load(self):
+		if self.__items is not None:
+			return
+		self.__items = OrderedDict()
+		try:
+			with open(self.__path, "r", encoding="utf-8") as f:
+				data = json.load(f)
+			if type(data) is dict and data.get("version") == SYNCED_VERSION:
+				for (path, kind, first_seen, last_seen) in data.get("items", [])[-self.__capacity:]:
+					self.__items[(kind, path)] = YDISyncedItem(path, kind, first_seen, last_seen)
+		except (OSError, ValueError, TypeError):
+			# Nothing kept yet or not usable, start over
+			self.__items.clear()
+
+	def __save(self):
+		# Written to a temporary file renamed over the old one,
+		# least recently seen first
+		self.__saved = monotonic()
+		data = {
+			"version": SYNCED_VERSION,
+			"items": [list(item) for item in self.__items.values()]
+		}
+		tmp = self.__path + ".tmp"
+		try:
+			with open(tmp, "w", encoding="utf-8") as f:
+				json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+			os.replace(tmp, self.__path)
+			self.__dirty = False
+		except OSError:
+			pass
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+
+"""
+	This file is part of Yandex Disk indicator and control (YDI).
+
+	Copyright 2025 Dandelion Systems <dandelion.systems@gmail.com>
+
+	YDI is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	YDI is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. 
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+"""
+
+from collections import deque
+from time import monotonic, time
+
+from yd_cli import YandexDisk, YDStatus, SyncState
+from yd_executor import PRIORITY_WATCHDOG
+from yd_events import events, EVENT_WARNING
+
+# Watchdog tunables, all times in seconds. Any of these can be
+# overridden with the "watchdog" setting
+WATCHDOG_DEFAULTS = {
+	"enabled": True,
+	# How long the daemon may stay in an error state, e.g.
+	# `no internet access`, before it is restarted
+	"grace": 120,
+	# How long `Sync progress` may stay the same while busy
+	"stall": 600,
+	# Delay before the first restart after the grace period,
+	# doubled after every restart up to `backoff_max`. It drops
+	# back once the daemon has been healthy for `backoff_max`
+	"backoff": 30,
+	"backoff_max": 3600,
+	# If the daemon needs more than `flap_restarts` restarts
+	# within `flap_window`, it is left alone until it recovers
+	# or the user starts it again
+	"flap_restarts": 5,
+	"flap_window": 3600
+}
+
+# Restart reasons
+UNHEALTHY_STATE = "state"
+UNHEALTHY_STALLED = "stalled"
+UNHEALTHY_CRASHED = "crashed"
+
+# Restarts remembered for get_restarts()
+WATCHDOG_HISTORY = 100
+
+class YDIWatchdog:
+	# Restarts the yandex-disk daemon when the status the updater has
+	# parsed shows it is unhealthy: in an error state, stuck while
+	# busy or gone while the user wants it running
+
+	__disk:YandexDisk = None
+
+	# Tunables, see WATCHDOG_DEFAULTS
+	__config:dict = None
+
+	# Whether the user wants the daemon running, None until the
+	# first check. That takes it from whether the daemon runs when
+	# YDI starts, later only set_wanted() changes it. So a daemon
+	# started from a terminal is not taken for wanted
+	__wanted = None
+
+	# Since when the daemon is unhealthy (monotonic time) and why,
+	# None when it is healthy
+	__unhealthy_since = None
+	__reason = None
+
+	# Whether it was healthy at the last check and since when
+	__healthy = True
+	__healthy_since = 0.0
+
+	# Last busy progress and since when it has stayed the same
+	__progress = None
+	__progress_since = 0.0
+
+	# Status record looked at last and whether its progress was
+	# found stalled. Progress is only judged on new records, a 
+	# status file naming just the state brings no news of it
+	__seen:YDStatus = None
+	__stalled = False
+
+	# Delay till the restart after the next one and the earliest
+	# time the next one can be made
+	__delay = 0
+	__next_restart = 0.0
+
+	# Monotonic times of recent restarts for flap protection
+	__recent:deque = None
+	__flapping = False
+
+	# (wall clock time, reason) of restarts made, the latest 
+	# WATCHDOG_HISTORY of them, and how many there have been
+	__restarts:deque = None
+	__restart_count = 0
+
+	def __init__(self, disk:YandexDisk, config:dict=None):
+		self.__disk = disk
+		self.__config = dict(WATCHDOG_DEFAULTS)
+		if config is not None:
+			self.__config.update(config)
+		self.__delay = self.__config["backoff"]
+		self.__recent = deque()
+		self.__restarts = deque(maxlen=WATCHDOG_HISTORY)
+		self.__healthy_since = monotonic()
+
+	def set_config(self, config:dict):
+		# New tunables take effect from the next check
+		self.__config = dict(WATCHDOG_DEFAULTS)
+		self.__config.update(config)
+
+	def set_wanted(self, wanted:bool):
+		# To be called when the user starts or stops the daemon
+		self.__wanted = wanted
+		self.__unhealthy_since = None
+		if wanted:
+			self.__flapping = False
+			self.__recent.clear()
+			self.__delay = self.__config["backoff"]
+			self.__next_restart = 0.0
+
+	def is_flapping(self):
+		return self.__flapping
+
+	def get_restarts(self):
+		return list(self.__restarts)
+
+	def get_restart_count(self):
+		return self.__restart_count
+
+	def check(self, status:YDStatus):
+		# Look at the status just parsed and restart the daemon if it
+		# is due. Returns True if the daemon has been restarted
+		if not self.__config["enabled"]:
+			return False
+		now = monotonic()
+
+		if self.__wanted is None:
+			self.__wanted = status.sync_state != SyncState.STOPPED
+
+		reason = self.__diagnose(status, now)
+		self.__seen = status
+		if reason is None:
+			if not self.__healthy:
+				self.__healthy = True
+				self.__healthy_since = now
+				self.__flapping = False
+			elif now - self.__healthy_since >= self.__config["backoff_max"]:
+				self.__delay = self.__config["backoff"]
+			self.__unhealthy_since = None
+			return False
+
+		self.__healthy = False
+
+		if self.__unhealthy_since is None or reason != self.__reason:
+			self.__unhealthy_since = now
+			self.__reason = reason
+
+		# A stall is only reported once `stall` seconds have passed
+		grace = 0 if reason == UNHEALTHY_STALLED else self.__config["grace"]
+		if now - self.__unhealthy_since < grace or self.__flapping:
+			return False
+		if now < self.__next_restart:
+			return False
+
+		while self.__recent and now - self.__recent[0] > self.__config["flap_window"]:
+			self.__recent.popleft()
+		if len(self.__recent) >= self.__config["flap_restarts"]:
+			self.__flapping = True
+			events.log(EVENT_WARNING, "watchdog_flapping", restarts=len(self.__recent))
+			return False
+
+		self.__restart(reason, now)
+		return True
+
+	def __on_stopped(self, output:str):
+		# Called on the command thread. Start and stop queued together
+		# would cancel out, so start goes in once stop has run, unless
+		# the user has stopped the daemon meanwhile
+		if self.__wanted:
+			self.__disk.command_async("start", priority=PRIORITY_WATCHDOG)
+
+	def __diagnose(self, status:YDStatus, now:float):
+		# Returns why the daemon is unhealthy, None if it is not
+		match status.sync_state:
+			case (SyncState.ERROR | SyncState.OTHER):
+				self.__progress = None
+				return UNHEALTHY_STATE
+			case SyncState.STOPPED:
+				self.__progress = None
+				return UNHEALTHY_CRASHED if self.__wanted else None
+			case SyncState.BUSY:
+				if status is not self.__seen:
+					progress = (status.sync_prog, status.sync_done)
+					if status.sync_done is None or progress != self.__progress:
+						# Moving, or not known to be stuck
+						self.__progress = progress
+						self.__progress_since = now
+						self.__stalled = False
+					else:
+						self.__stalled = now - self.__progress_since >= self.__config["stall"]
+				return UNHEALTHY_STALLED if self.__stalled else None
+			case _:
+				self.__progress = None
+				return None
+
+	def __restart(self, reason:str, now:float):
+		events.log(EVENT_WARNING, "watchdog_restart", reason=reason, delay=self.__delay)
+		# Queued, not to hold up the status updates of every account
+		# while yandex-disk takes its time. The next checks see how
+		# it went
+		self.__disk.command_async(
+			"stop", 
+			priority=PRIORITY_WATCHDOG, 
+			callback=self.__on_stopped
+			)
+		self.__restarts.append((time(), reason))
+		self.__restart_count += 1
+		self.__recent.append(now)
+		self.__next_restart = now + self.__delay
+		self.__delay = min(self.__delay * 2, self.__config["backoff_max"])
+		self.__unhealthy_since = None
+		self.__progress = None
+		self.__stalled = False